@@ -0,0 +1,78 @@
+from flask import Blueprint, request, jsonify
+import hmac
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.usage_ledger import ledger as usage_ledger
+
+bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+def admin_denied():
+    """
+    Return an error response unless the request carries the admin token, else None.
+    Admin endpoints are off entirely when the ADMIN_TOKEN environment variable is not set.
+    """
+    token = os.getenv('ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Admin endpoints are disabled'}), 404
+    given = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(given.encode(), token.encode()):
+        return jsonify({'error': 'Admin token required'}), 403
+    return None
+
+def parse_limit(value):
+    """A quota limit from a request body: None (use the default) or a non-negative int."""
+    if value is None:
+        return None
+    limit = int(value)
+    if limit < 0:
+        raise ValueError('Limits must not be negative')
+    return limit
+
+@bp.route('/usage', methods=['GET'])
+def get_usage():
+    """
+    Get generation usage (calls, estimated tokens, model seconds, failures, rejected requests)
+    per user and per classroom, with the daily quotas in force.
+    Optional query args: days (default 1, max 31), user, classroom.
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+
+    days = request.args.get('days', 1, type=int)
+    if days is None or days < 1 or days > 31:
+        return jsonify({'error': 'Days must be between 1 and 31'}), 400
+    classroom = request.args.get('classroom')
+
+    report = usage_ledger.report(days, user=request.args.get('user'),
+                                 classroom=classroom.upper() if classroom else None)
+    return jsonify(dict(report, success=True))
+
+@bp.route('/quotas', methods=['POST'])
+def set_quota():
+    """
+    Override the daily generation quota of one user or classroom.
+    Body: user or classroom, and calls and/or tokens (0 for unlimited); omit both to restore the defaults.
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+
+    data = request.json or {}
+    user = data.get('user')
+    classroom = data.get('classroom')
+    if bool(user) == bool(classroom):
+        return jsonify({'error': 'Give either user or classroom'}), 400
+
+    try:
+        calls = parse_limit(data.get('calls'))
+        tokens = parse_limit(data.get('tokens'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid limit: {str(e)}'}), 400
+
+    if user:
+        usage_ledger.set_quota('users', user, calls, tokens)
+    else:
+        usage_ledger.set_quota('classrooms', classroom.upper(), calls, tokens)
+    return jsonify({'success': True, 'quotas': usage_ledger.report(1)['quotas']})
@@ -1,11 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 import csv
 import os
 import uuid
+from concurrent.futures import TimeoutError as RenderTimeoutError
 from datetime import datetime
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from api.classrooms import CLASSROOMS_CSV, MEMBERS_CSV
+from utils.assignment_index import assignments as assignment_index, word_key
+from utils import heatmap
 
 bp = Blueprint('classroom_assignments', __name__, url_prefix='/api/classroom-assignments')
 
@@ -105,6 +108,7 @@ def get_classroom_assignments(code):
     
     code = code.strip().upper()
     assignments = []
+    word_counts = assignment_index.word_counts()
     
     if os.path.exists(ASSIGNMENTS_CSV):
         with open(ASSIGNMENTS_CSV, 'r') as f:
@@ -113,13 +117,8 @@ def get_classroom_assignments(code):
                 if row.get('classroom_code', '').strip().upper() == code:
                     assignment_id = row.get('assignment_id', '')
                     
-                    # Count words in this assignment
-                    word_count = 0
-                    if os.path.exists(ASSIGNMENT_WORDS_CSV):
-                        with open(ASSIGNMENT_WORDS_CSV, 'r') as wf:
-                            word_reader = csv.DictReader(wf)
-                            word_count = sum(1 for wrow in word_reader 
-                                           if wrow.get('assignment_id', '') == assignment_id)
+                    # Word counts come precomputed from the assignment index
+                    word_count = word_counts.get(assignment_id, 0)
                     
                     assignments.append({
                         'assignment_id': assignment_id,
@@ -268,35 +267,14 @@ def get_student_assignment_progress(assignment_id, student_email):
         return jsonify({'error': 'Assignment ID and student email are required!'}), 400
     
     # Get assignment words
-    assignment_words = []
-    if os.path.exists(ASSIGNMENT_WORDS_CSV):
-        with open(ASSIGNMENT_WORDS_CSV, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('assignment_id', '') == assignment_id:
-                    assignment_words.append({
-                        'foreign': row.get('foreign', ''),
-                        'english': row.get('english', '')
-                    })
+    assignment_words = assignment_index.assignment_words(assignment_id)
     
     if not assignment_words:
         return jsonify({'error': 'Assignment not found or has no words!'}), 404
     
     # Get student progress
-    progress_dict = {}
-    if os.path.exists(ASSIGNMENT_PROGRESS_CSV):
-        with open(ASSIGNMENT_PROGRESS_CSV, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if (row.get('assignment_id', '') == assignment_id and 
-                    row.get('student_email', '').strip() == student_email.strip()):
-                    word_key = f"{row.get('word_foreign', '')}|{row.get('word_english', '')}"
-                    progress_dict[word_key] = {
-                        'count_seen': int(row.get('count_seen', 0)),
-                        'count_correct': int(row.get('count_correct', 0)),
-                        'count_incorrect': int(row.get('count_incorrect', 0)),
-                        'is_known': row.get('is_known', '0') == '1'
-                    }
+    student_progress = assignment_index.student_progress(assignment_id, student_email)
+    progress_dict = student_progress['words'] if student_progress else {}
     
     # Build progress for each word
     words_progress = []
@@ -305,8 +283,7 @@ def get_student_assignment_progress(assignment_id, student_email):
     not_started_count = 0
     
     for word in assignment_words:
-        word_key = f"{word['foreign']}|{word['english']}"
-        progress = progress_dict.get(word_key, {
+        progress = progress_dict.get(word_key(word['foreign'], word['english']), {
             'count_seen': 0,
             'count_correct': 0,
             'count_incorrect': 0,
@@ -371,64 +348,33 @@ def get_assignment_stats(assignment_id):
                 if row.get('classroom_code', '').strip().upper() == classroom_code:
                     students.append(row.get('student_email', '').strip())
     
-    # Get assignment words count
-    word_count = 0
-    if os.path.exists(ASSIGNMENT_WORDS_CSV):
-        with open(ASSIGNMENT_WORDS_CSV, 'r') as f:
-            reader = csv.DictReader(f)
-            word_count = sum(1 for row in reader if row.get('assignment_id', '') == assignment_id)
+    # Word count and per-student progress groups are precomputed by the assignment index
+    word_count = assignment_index.word_count(assignment_id)
+    progress_dict = assignment_index.assignment_progress(assignment_id)
     
     # Calculate stats for each student
     student_stats = []
     total_completion_sum = 0
     total_accuracy_sum = 0
     
-    # Get progress for each student
-    progress_dict = {}
-    if os.path.exists(ASSIGNMENT_PROGRESS_CSV):
-        with open(ASSIGNMENT_PROGRESS_CSV, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('assignment_id', '') == assignment_id:
-                    student_email = row.get('student_email', '').strip()
-                    if student_email in students:
-                        if student_email not in progress_dict:
-                            progress_dict[student_email] = {
-                                'words': {},
-                                'total_correct': 0,
-                                'total_incorrect': 0
-                            }
-                        
-                        word_key = f"{row.get('word_foreign', '')}|{row.get('word_english', '')}"
-                        if word_key not in progress_dict[student_email]['words']:
-                            progress_dict[student_email]['words'][word_key] = {
-                                'count_seen': 0,
-                                'count_correct': 0,
-                                'count_incorrect': 0,
-                                'is_known': False
-                            }
-                        
-                        word_progress = progress_dict[student_email]['words'][word_key]
-                        word_progress['count_seen'] += int(row.get('count_seen', 0))
-                        word_progress['count_correct'] += int(row.get('count_correct', 0))
-                        word_progress['count_incorrect'] += int(row.get('count_incorrect', 0))
-                        if row.get('is_known', '0') == '1':
-                            word_progress['is_known'] = True
-                        
-                        progress_dict[student_email]['total_correct'] += int(row.get('count_correct', 0))
-                        progress_dict[student_email]['total_incorrect'] += int(row.get('count_incorrect', 0))
-    
     for student_email in students:
-        student_progress = progress_dict.get(student_email, {'words': {}, 'total_correct': 0, 'total_incorrect': 0})
-        
-        known_count = sum(1 for w in student_progress['words'].values() if w['is_known'])
-        in_progress_count = sum(1 for w in student_progress['words'].values() if w['count_seen'] > 0 and not w['is_known'])
+        student_progress = progress_dict.get(student_email)
+        if student_progress is None:
+            known_count = 0
+            in_progress_count = 0
+            total_correct = 0
+            total_incorrect = 0
+        else:
+            known_count = student_progress['known_count']
+            in_progress_count = student_progress['in_progress_count']
+            total_correct = student_progress['total_correct']
+            total_incorrect = student_progress['total_incorrect']
         not_started_count = word_count - known_count - in_progress_count
         
         completion_percentage = (known_count / word_count * 100) if word_count > 0 else 0
         
-        total_attempts = student_progress['total_correct'] + student_progress['total_incorrect']
-        accuracy = (student_progress['total_correct'] / total_attempts * 100) if total_attempts > 0 else 0
+        total_attempts = total_correct + total_incorrect
+        accuracy = (total_correct / total_attempts * 100) if total_attempts > 0 else 0
         
         student_stats.append({
             'student_email': student_email,
@@ -436,8 +382,8 @@ def get_assignment_stats(assignment_id):
             'known_count': known_count,
             'in_progress_count': in_progress_count,
             'not_started_count': not_started_count,
-            'total_correct': student_progress['total_correct'],
-            'total_incorrect': student_progress['total_incorrect'],
+            'total_correct': total_correct,
+            'total_incorrect': total_incorrect,
             'accuracy': round(accuracy, 2)
         })
         
@@ -465,6 +411,54 @@ def get_assignment_stats(assignment_id):
         'student_stats': student_stats
     })
 
+@bp.route('/<assignment_id>/heatmap.png', methods=['GET'])
+def get_assignment_heatmap(assignment_id):
+    """Get a students x words heatmap of an assignment as a PNG (?metric=status|accuracy)."""
+    metric = request.args.get('metric', 'status')
+    if metric not in heatmap.METRICS:
+        return jsonify({'error': f"Metric must be one of: {', '.join(heatmap.METRICS)}"}), 400
+    
+    # Get assignment details
+    assignment = None
+    if os.path.exists(ASSIGNMENTS_CSV):
+        with open(ASSIGNMENTS_CSV, 'r') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if row.get('assignment_id', '') == assignment_id:
+                    assignment = row
+                    break
+    
+    if not assignment:
+        return jsonify({'error': 'Assignment not found!'}), 404
+    
+    classroom_code = assignment.get('classroom_code', '').strip().upper()
+    
+    # Get all students in the classroom
+    students = []
+    if os.path.exists(MEMBERS_CSV):
+        with open(MEMBERS_CSV, 'r') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if row.get('classroom_code', '').strip().upper() == classroom_code:
+                    students.append(row.get('student_email', '').strip())
+    
+    words = assignment_index.assignment_words(assignment_id)
+    if not students or not words:
+        return jsonify({'error': 'Assignment has no students or words to plot!'}), 404
+    
+    # The index version changes whenever assignment words or progress are written
+    cache_key = (assignment_id, metric, assignment_index.version(), tuple(students))
+    title = f"{assignment.get('assignment_name', '')} ({metric})"
+    try:
+        png = heatmap.get_heatmap(cache_key, title, students, words,
+                                  assignment_index.assignment_progress(assignment_id), metric)
+    except RenderTimeoutError:
+        return jsonify({'error': 'Heatmap is still rendering, try again shortly'}), 503
+    except Exception as e:
+        return jsonify({'error': f'Error rendering heatmap: {str(e)}'}), 500
+    
+    return Response(png, mimetype='image/png', headers={'Cache-Control': 'private, max-age=60'})
+
 @bp.route('/<assignment_id>/student/<email>/details', methods=['GET'])
 def get_student_assignment_details(assignment_id, email):
     """Get detailed student progress on an assignment."""
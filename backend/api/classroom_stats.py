@@ -1,12 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 import csv
+import json
 import os
 import sys
-import shutil
 import logging
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from utils import settings
-from models.walking_window import WalkingWindow
+from utils import settings, class_matrix
+from utils.event_log import rollups
+from utils.student_summary import get_summary, summary_stats, iter_summaries
+from utils.leaderboard_index import get_leaderboard
+from models.window_projection import project_walking_window
+from api.study import sessions
+from utils.word_category_index import (CategoryIndex, DEFAULT_SORTS, deck_index, page,
+                                       parse_page_args, ndjson_lines)
 
 logging.basicConfig(level=logging.INFO)
 
@@ -15,105 +21,27 @@ bp = Blueprint('classroom_stats', __name__, url_prefix='/api/classroom-stats')
 MEMBERS_CSV = 'ClassroomMembers.csv'
 CLASSROOMS_CSV = 'Classrooms.csv'
 
-def ensure_user_csv_initialized(student_email, language):
-    """Ensure a user's CSV file is initialized from template if it's empty or doesn't exist."""
+def student_deck_file(student_email, language):
+    """
+    The CSV to read a student's words from: their deck, or the template it will be copied from
+    if they have not studied the language yet. Instructor views never create the deck.
+    """
     user_file = f"UserWords/{student_email}_{language}.csv"
-    template_file = f"UserWords/Template_{language}.csv"
-    
-    # If file doesn't exist, copy from template
-    if not os.path.exists(user_file):
-        if os.path.exists(template_file):
-            shutil.copy(template_file, user_file)
-            return True
-        return False
-    
-    # If file exists but is empty (only header), initialize from template
-    try:
-        with open(user_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            row_count = sum(1 for row in reader)
-            if row_count == 0:  # Only header, no data rows
-                if os.path.exists(template_file):
-                    shutil.copy(template_file, user_file)
-                    return True
-    except Exception:
-        # If there's an error reading, try to initialize from template
-        if os.path.exists(template_file):
-            shutil.copy(template_file, user_file)
-            return True
-    
-    return False
+    if os.path.exists(user_file):
+        return user_file
+    return f"UserWords/Template_{language}.csv"
 
 def get_student_stats(student_email):
     """
     Calculate stats for a student across all languages.
     Returns: total_known, total_correct, total_incorrect, total_seen, accuracy
     """
-    total_known = 0
-    total_correct = 0
-    total_incorrect = 0
-    total_seen = 0
-    
     # Normalize email (strip whitespace)
     student_email = student_email.strip()
     
-    # Aggregate stats from all language CSV files
-    for lang in settings.LANGUAGE_OPTIONS:
-        # Ensure CSV is initialized if empty
-        ensure_user_csv_initialized(student_email, lang)
-        
-        user_file = f"UserWords/{student_email}_{lang}.csv"
-        if os.path.exists(user_file):
-            try:
-                row_count = 0
-                words_with_progress = 0
-                with open(user_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        # Skip empty rows
-                        foreign_word = row.get('Foreign', '').strip()
-                        if not foreign_word:
-                            continue
-                        
-                        row_count += 1
-                            
-                        try:
-                            seen = int(row.get('seen', 0) or 0)
-                            correct = int(row.get('correct', 0) or 0)
-                            wrong = int(row.get('wrong', 0) or 0)
-                            known = bool(int(row.get('known', 0) or 0))
-                            
-                            if seen > 0 or correct > 0 or wrong > 0 or known:
-                                words_with_progress += 1
-                            
-                            total_seen += seen
-                            total_correct += correct
-                            total_incorrect += wrong
-                            if known:
-                                total_known += 1
-                        except (ValueError, KeyError, TypeError) as e:
-                            # Log the error for debugging but continue processing
-                            logging.warning(f"Error processing row for {student_email} {lang}: {e}, row: {row}")
-                            continue
-                
-                logging.info(f"Stats for {student_email} {lang}: {row_count} words, {words_with_progress} with progress, known={total_known}, seen={total_seen}")
-            except Exception as e:
-                logging.error(f"Error reading {user_file} for {student_email}: {e}")
-                continue
-        else:
-            logging.warning(f"CSV file not found: {user_file} for {student_email}")
-    
-    # Calculate accuracy percentage
-    total_attempts = total_correct + total_incorrect
-    accuracy = (total_correct / total_attempts * 100) if total_attempts > 0 else 0.0
-    
-    return {
-        'total_known': total_known,
-        'total_correct': total_correct,
-        'total_incorrect': total_incorrect,
-        'total_seen': total_seen,
-        'accuracy': round(accuracy, 2)
-    }
+    # Totals are materialized per student and kept current by the study write path
+    summary = get_summary(student_email)
+    return summary_stats(summary)
 
 def get_classroom_instructor(classroom_code):
     """Get the instructor email for a classroom."""
@@ -141,35 +69,15 @@ def get_classroom_students(classroom_code):
                     students.append(student_email)
     return students
 
-def calculate_classroom_leaderboard(code):
-    """Calculate leaderboard for a classroom. Returns list of leaderboard entries."""
+def get_classroom_leaderboard_index(code):
+    """Get the rank-ordered leaderboard index for a classroom, synced with its current members."""
     code = code.strip().upper()
-    students = get_classroom_students(code)
-    
-    if not students:
-        return []
-    
-    # Calculate stats for each student
-    leaderboard = []
-    for student_email in students:
-        stats = get_student_stats(student_email)
-        leaderboard.append({
-            'student_email': student_email,
-            'total_known': stats['total_known'],
-            'total_correct': stats['total_correct'],
-            'total_incorrect': stats['total_incorrect'],
-            'total_seen': stats['total_seen'],
-            'accuracy': stats['accuracy']
-        })
-    
-    # Sort by total_known (descending), then by accuracy (descending)
-    leaderboard.sort(key=lambda x: (x['total_known'], x['accuracy']), reverse=True)
-    
-    # Add rank
-    for i, entry in enumerate(leaderboard, start=1):
-        entry['rank'] = i
-    
-    return leaderboard
+    return get_leaderboard(code, get_classroom_students(code), get_student_stats)
+
+def calculate_classroom_leaderboard(code, offset=0, limit=None):
+    """Calculate leaderboard for a classroom. Returns list of leaderboard entries."""
+    # Sorted by total_known (descending), then by accuracy (descending), with rank
+    return get_classroom_leaderboard_index(code).page(offset, limit)
 
 @bp.route('/leaderboard/<code>', methods=['GET'])
 def get_classroom_leaderboard(code):
@@ -177,7 +85,13 @@ def get_classroom_leaderboard(code):
     if not code:
         return jsonify({'error': 'Classroom code is required!'}), 400
     
-    leaderboard = calculate_classroom_leaderboard(code)
+    # Optional top-N paging: ?offset=0&limit=10
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 0:
+        return jsonify({'error': 'Limit must not be negative!'}), 400
+    
+    leaderboard = calculate_classroom_leaderboard(code, offset, limit)
     return jsonify({'success': True, 'leaderboard': leaderboard})
 
 @bp.route('/student/<code>/<email>', methods=['GET'])
@@ -196,17 +110,29 @@ def get_student_progress_in_classroom(code, email):
     
     stats = get_student_stats(email)
     
-    # Get leaderboard to find student's rank
-    leaderboard = calculate_classroom_leaderboard(code)
-    rank = next((entry['rank'] for entry in leaderboard if entry['student_email'] == email), None)
+    # Look up the student's rank in the classroom's ordered leaderboard
+    rank = get_classroom_leaderboard_index(code).rank(email)
     if rank is not None:
         stats['rank'] = rank
     
     return jsonify({'success': True, 'stats': stats})
 
+def dashboard_averages(student_stats_list):
+    """Average known words and accuracy over the students whose stats are available."""
+    num_ready = len(student_stats_list)
+    if num_ready == 0:
+        return 0, 0
+    average_known = round(sum(entry['total_known'] for entry in student_stats_list) / num_ready, 2)
+    average_accuracy = round(sum(entry['accuracy'] for entry in student_stats_list) / num_ready, 2)
+    return average_known, average_accuracy
+
 @bp.route('/dashboard/<code>', methods=['GET'])
 def get_instructor_dashboard(code):
-    """Get instructor dashboard with aggregate stats and individual student breakdowns."""
+    """
+    Get instructor dashboard with aggregate stats and individual student breakdowns.
+    Students without a materialized summary are rebuilt in parallel; pass ?stream=1
+    to receive newline-delimited JSON with one line per student as it becomes ready.
+    """
     if not code:
         return jsonify({'error': 'Classroom code is required!'}), 400
     
@@ -219,21 +145,44 @@ def get_instructor_dashboard(code):
             'total_students': 0,
             'average_known': 0,
             'average_accuracy': 0,
-            'students': []
+            'students': [],
+            'pending_students': []
         })
     
-    # Calculate stats for each student
-    student_stats_list = []
-    total_known_sum = 0
-    total_accuracy_sum = 0
+    if request.args.get('stream') == '1':
+        def generate():
+            ready = []
+            pending = []
+            for student_email, summary in iter_summaries(students):
+                if summary is None:
+                    pending.append(student_email)
+                    yield json.dumps({'student_email': student_email, 'pending': True}) + '\n'
+                    continue
+                entry = {'student_email': student_email, **summary_stats(summary)}
+                ready.append(entry)
+                yield json.dumps(entry) + '\n'
+            
+            average_known, average_accuracy = dashboard_averages(ready)
+            yield json.dumps({
+                'done': True,
+                'total_students': len(students),
+                'average_known': average_known,
+                'average_accuracy': average_accuracy,
+                'pending_students': pending
+            }) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
     
-    for student_email in students:
-        stats = get_student_stats(student_email)
-        total_known_sum += stats['total_known']
-        total_accuracy_sum += stats['accuracy']
+    # Calculate stats for each student, rebuilding missing summaries in parallel
+    student_stats_list = []
+    pending_students = []
+    for student_email, summary in iter_summaries(students):
+        if summary is None:
+            pending_students.append(student_email)
+            continue
         student_stats_list.append({
             'student_email': student_email,
-            **stats
+            **summary_stats(summary)
         })
     
     # Sort by total_known for dashboard display
@@ -244,18 +193,68 @@ def get_instructor_dashboard(code):
         entry['rank'] = i
     
     # Calculate averages
-    num_students = len(students)
-    average_known = round(total_known_sum / num_students, 2) if num_students > 0 else 0
-    average_accuracy = round(total_accuracy_sum / num_students, 2) if num_students > 0 else 0
+    average_known, average_accuracy = dashboard_averages(student_stats_list)
     
     return jsonify({
         'success': True,
-        'total_students': num_students,
+        'total_students': len(students),
         'average_known': average_known,
         'average_accuracy': average_accuracy,
-        'students': student_stats_list
+        'students': student_stats_list,
+        'pending_students': pending_students
+    })
+
+@bp.route('/hardest-words/<code>/<language>', methods=['GET'])
+def get_classroom_hardest_words(code, language):
+    """
+    Get class-wide word analytics for a language: the top-k hardest words,
+    per-word class accuracy and groups of students struggling on the same words.
+    Optional query args: k (default 10), min_attempts (default 3).
+    """
+    if not code or not language:
+        return jsonify({'error': 'Classroom code and language are required!'}), 400
+    
+    code = code.strip().upper()
+    if language not in settings.LANGUAGE_OPTIONS:
+        return jsonify({'error': 'Invalid language!'}), 400
+    
+    top_k = request.args.get('k', 10, type=int)
+    min_attempts = request.args.get('min_attempts', 3, type=int)
+    if top_k < 1 or min_attempts < 0:
+        return jsonify({'error': 'k must be positive and min_attempts must not be negative!'}), 400
+    
+    students = get_classroom_students(code)
+    matrix = class_matrix.get_matrix(code, language, students)
+    analytics = matrix.analyze(top_k=top_k, min_attempts=min_attempts)
+    
+    return jsonify({
+        'success': True,
+        'language': language,
+        'total_students': len(students),
+        'total_words': len(matrix.words),
+        **analytics
     })
 
+@bp.route('/activity/<code>', methods=['GET'])
+def get_classroom_activity(code):
+    """
+    Get daily class activity (answers, correct, incorrect, words marked known,
+    active students) from the event log rollups.
+    Optional query args: days (default 7, max 366), language (default all).
+    """
+    if not code:
+        return jsonify({'error': 'Classroom code is required!'}), 400
+    
+    days = request.args.get('days', 7, type=int)
+    language = request.args.get('language') or None
+    if days < 1 or days > 366:
+        return jsonify({'error': 'days must be between 1 and 366!'}), 400
+    if language is not None and language not in settings.LANGUAGE_OPTIONS:
+        return jsonify({'error': 'Invalid language!'}), 400
+    
+    activity = rollups.classroom_activity(code, days, language)
+    return jsonify({'success': True, 'classroom_code': code.strip().upper(), **activity})
+
 @bp.route('/student/<code>/<email>/walking-window', methods=['GET'])
 def get_student_walking_window(code, email):
     """Get a student's walking window (current words being studied) for instructor view."""
@@ -274,48 +273,10 @@ def get_student_walking_window(code, email):
     # For now, let's use the default language from settings
     language = request.args.get('language', settings.LANGUAGE)
     
-    # Ensure CSV is initialized if empty
-    ensure_user_csv_initialized(email, language)
-    
-    # Temporarily set the username and language for the walking window
-    original_username = settings.username
-    original_language = settings.LANGUAGE
-    
-    try:
-        settings.username = email
-        settings.LANGUAGE = language
-        
-        # Initialize walking window for this student
-        walking_window = WalkingWindow(size=settings.WALKING_WINDOW_SIZE)
-        
-        # Get current words from walking window
-        current_words = []
-        for word in walking_window.current_words:
-            current_words.append({
-                'foreign': word.foreign,
-                'english': word.english,
-                'count_seen': word.count_seen,
-                'count_correct': word.count_correct,
-                'count_incorrect': word.count_incorrect,
-                'is_known': word.is_known
-            })
-        
-        # Also get SRS queue words
-        srs_words = []
-        for word in walking_window.srs_queue:
-            srs_words.append({
-                'foreign': word.foreign,
-                'english': word.english,
-                'count_seen': word.count_seen,
-                'count_correct': word.count_correct,
-                'count_incorrect': word.count_incorrect,
-                'is_known': word.is_known
-            })
-        
-    finally:
-        # Restore original settings
-        settings.username = original_username
-        settings.LANGUAGE = original_language
+    # Read-only view: the student's live session if they are studying, else their saved deck
+    projection = project_walking_window(email, language, settings.WALKING_WINDOW_SIZE, sessions)
+    current_words = projection['current_words']
+    srs_words = projection['srs_queue']
     
     return jsonify({
         'success': True,
@@ -323,7 +284,8 @@ def get_student_walking_window(code, email):
         'srs_queue': srs_words,
         'walking_window_size': len(current_words),
         'srs_queue_size': len(srs_words),
-        'language': language
+        'language': language,
+        'source': projection['source']
     })
 
 @bp.route('/student/<code>/<email>/all-words/<language>', methods=['GET'])
@@ -343,70 +305,53 @@ def get_student_all_words(code, email, language):
     if language not in settings.LANGUAGE_OPTIONS:
         return jsonify({'error': 'Invalid language!'}), 400
     
-    # Ensure CSV is initialized if empty
-    ensure_user_csv_initialized(email, language)
-    
-    user_file = f"UserWords/{email}_{language}.csv"
+    user_file = student_deck_file(email, language)
     
-    known_words = []
-    learning_words = []
-    struggling_words = []
+    try:
+        index = deck_index(user_file) if os.path.exists(user_file) else CategoryIndex([])
+    except Exception as e:
+        return jsonify({'error': f'Failed to read word data: {str(e)}'}), 500
+    totals = index.totals()
     
-    if os.path.exists(user_file):
+    # Paged mode: ?category=&sort=&limit=&cursor=, plus format=ndjson to stream one word per line
+    if any(key in request.args for key in ('category', 'cursor', 'limit', 'sort', 'format')):
         try:
-            with open(user_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Skip empty rows
-                    if not row.get('Foreign', '').strip():
-                        continue
-                        
-                    try:
-                        foreign = row.get('Foreign', '').strip()
-                        english = row.get('English', '').strip()
-                        seen = int(row.get('seen', 0))
-                        correct = int(row.get('correct', 0))
-                        wrong = int(row.get('wrong', 0))
-                        known = bool(int(row.get('known', 0)))
-                        
-                        word_data = {
-                            'foreign': foreign,
-                            'english': english,
-                            'count_seen': seen,
-                            'count_correct': correct,
-                            'count_incorrect': wrong,
-                            'is_known': known
-                        }
-                        
-                        if known:
-                            known_words.append(word_data)
-                        elif wrong > correct and wrong > 2:  # Struggling: more wrong than correct and has multiple wrong attempts
-                            struggling_words.append(word_data)
-                        elif seen > 0:  # Learning: has been seen but not known
-                            learning_words.append(word_data)
-                    except (ValueError, KeyError):
-                        continue
-        except Exception as e:
-            return jsonify({'error': f'Failed to read word data: {str(e)}'}), 500
-    
-    # Sort struggling words by wrong count (descending)
-    struggling_words.sort(key=lambda x: x['count_incorrect'], reverse=True)
-    
-    # Sort learning words by seen count (descending)
-    learning_words.sort(key=lambda x: x['count_seen'], reverse=True)
-    
-    # Sort known words alphabetically
-    known_words.sort(key=lambda x: x['foreign'])
+            category, sort, cursor, limit = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        ordered = index.words(category, sort)
+        streaming = request.args.get('format') == 'ndjson'
+        if streaming and 'limit' not in request.args:
+            limit = max(len(ordered), 1)
+        words, next_cursor = page(ordered, cursor, limit)
+        
+        if streaming:
+            return Response(stream_with_context(ndjson_lines(words, next_cursor, totals)),
+                            mimetype='application/x-ndjson')
+        
+        return jsonify({
+            'success': True,
+            'language': language,
+            'category': category,
+            'sort': sort or DEFAULT_SORTS[category],
+            'words': words,
+            'next_cursor': next_cursor,
+            'total': totals[category],
+            'totals': totals
+        })
     
+    # Struggling words by wrong count (descending), learning words by seen count (descending),
+    # known words alphabetically
     return jsonify({
         'success': True,
         'language': language,
-        'known_words': known_words,
-        'learning_words': learning_words,
-        'struggling_words': struggling_words,
-        'total_known': len(known_words),
-        'total_learning': len(learning_words),
-        'total_struggling': len(struggling_words)
+        'known_words': index.words('known'),
+        'learning_words': index.words('learning'),
+        'struggling_words': index.words('struggling'),
+        'total_known': totals['known'],
+        'total_learning': totals['learning'],
+        'total_struggling': totals['struggling']
     })
 
 @bp.route('/student/<code>/<email>/wordlist-stats/<language>', methods=['GET'])
@@ -426,9 +371,6 @@ def get_student_wordlist_stats(code, email, language):
     if language not in settings.LANGUAGE_OPTIONS:
         return jsonify({'error': 'Invalid language!'}), 400
     
-    # Ensure CSV is initialized if empty
-    ensure_user_csv_initialized(email, language)
-    
     # Count total words in the template wordlist
     template_file = f"UserWords/Template_{language}.csv"
     total_wordlist_words = 0
@@ -444,7 +386,7 @@ def get_student_wordlist_stats(code, email, language):
         return jsonify({'error': f'Template wordlist for {language} not found!'}), 404
     
     # Get student's word stats for this language
-    user_file = f"UserWords/{email}_{language}.csv"
+    user_file = student_deck_file(email, language)
     student_known = 0
     student_total = 0
     student_seen = 0
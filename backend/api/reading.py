@@ -1,8 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 import sys
 import os
+import json
 import random
 import logging
+import time
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -14,24 +16,91 @@ load_dotenv(env_path)
 from models.walking_window import WalkingWindow
 from models.word import Word
 from utils import settings
-from api.study import sessions, word_to_dict
+from api.study import sessions, word_to_dict, split_session_id
+from utils.generation import get_generation_client, GENAI_AVAILABLE
+from utils import content_cache
+from utils.sentence_corpus import corpus as sentence_corpus
+from utils.vocab_highlighter import highlight
+from utils.usage_ledger import ledger as usage_ledger, QuotaExceeded, BACKGROUND_USER
+from utils.single_flight import Coalescer, GenerationBusy
+from utils.fill_in_blank import (SentencePool, build_prompt as build_fill_in_blank_prompt,
+                                 clean_generated_sentence, sentence_problem, build_batch_prompt,
+                                 parse_batch_reply)
 
 bp = Blueprint('reading', __name__, url_prefix='/api/reading')
 
-# Try to import Gemini API (will fail gracefully if not installed)
-try:
-    from google import genai
-    GENAI_AVAILABLE = True
-except ImportError:
-    GENAI_AVAILABLE = False
-    genai = None
-
-# Initialize Gemini API client
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-client = None
-if GEMINI_API_KEY and GENAI_AVAILABLE:
-    # Client automatically gets API key from GEMINI_API_KEY environment variable
-    client = genai.Client()
+PROMPT_VERSION = 1  # bump whenever a prompt below changes so cached content is regenerated
+
+# Identical concurrent generations share one model call, under global and per-user caps
+coalescer = Coalescer()
+
+def generation_unavailable():
+    """Return an error response if text generation is not configured, else None."""
+    if get_generation_client() is not None:
+        return None
+    if not GENAI_AVAILABLE:
+        return jsonify({'error': 'Google Generative AI package not installed. Please install: pip install google-genai'}), 500
+    return jsonify({'error': 'Gemini API key not configured or client not initialized'}), 500
+
+def session_user(session_id):
+    """Username part of a session id (username_language[_assignment_id]), the whole id if it names no known language."""
+    parts = split_session_id(session_id)
+    return parts[0] if parts else (session_id or '')
+
+def busy_response():
+    return jsonify({'error': 'Too many generation requests, try again shortly'}), 429, {'Retry-After': '2'}
+
+def quota_response(e):
+    return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+
+def metered_generate(prompt, user):
+    """Generate text for a prompt, charging the model call to the user's usage."""
+    started = time.perf_counter()
+    text = ''
+    failed = True
+    try:
+        text = get_generation_client().generate(prompt)
+        failed = False
+        return text
+    finally:
+        usage_ledger.record(user, prompt, text, time.perf_counter() - started, failed)
+
+def generate_cached(endpoint, language, words, prompt, user, topic=''):
+    """
+    Generate text for a prompt, serving it from the content cache when the same
+    endpoint, language, words and topic were generated before and sharing the
+    model call with identical requests already in flight.
+
+    param: endpoint: the reading endpoint, e.g. 'short-story'
+    param: language: the target language
+    param: words: word dicts used in the prompt
+    param: prompt: the prompt to send on a cache miss
+    param: user: who asked, for the per-user concurrency cap
+    param: topic: topic of the passage, '' if none
+    return: the generated text
+    raise: QuotaExceeded if the user is out of quota, GenerationBusy if no generation slot freed up in time
+    """
+    key = content_cache.make_key(endpoint, language, [w['foreign'] for w in words], topic, PROMPT_VERSION)
+    text = content_cache.cache.get(key)
+    if text is None:
+        usage_ledger.check(user)
+        def generate():
+            generated = metered_generate(prompt, user)
+            content_cache.cache.put(key, generated)
+            return generated
+        text = coalescer.do(key, user, generate)
+    return text
+
+def active_words():
+    """Yield (language, foreign) for every word in a walking window studied within SENTENCE_POOL_ACTIVE_SECONDS."""
+    for _, walking_window in sessions.active(settings.SENTENCE_POOL_ACTIVE_SECONDS):
+        for word in list(walking_window.current_words):
+            yield walking_window.language, word.foreign
+
+def generate_pool_sentence(language, foreign):
+    """Raw model reply for a pooled sentence, bypassing the content cache so each one differs."""
+    prompt = build_fill_in_blank_prompt(get_language_name_for_prompt(language), foreign)
+    return metered_generate(prompt, BACKGROUND_USER)
 
 def build_words_list(current_words):
     """Build a formatted string of words with their translations for the prompt."""
@@ -57,28 +126,31 @@ def get_language_name_for_prompt(language):
     }
     return language_map.get(language, language)
 
-@bp.route('/short-story', methods=['POST'])
-def generate_short_story():
+# Refills are held once the background quota is used up
+sentence_pool = SentencePool(generate_pool_sentence, active_words, lambda: usage_ledger.check(BACKGROUND_USER))
+
+def prepare_reading_request(data, with_topic=False):
     """
-    Generate a short story in the target language using words from the walking window.
+    Validate a story or passage request and build its prompt from up to 10 random walking window words
+
+    param: data: the request JSON
+    param: with_topic: whether a topic is required (topical passages)
+    return: (error_response, current_words, language, prompt, topic), error_response is None when valid
     """
-    if not GENAI_AVAILABLE:
-        return jsonify({'error': 'Google Generative AI package not installed. Please install: pip install google-genai'}), 500
-    
-    if not client:
-        return jsonify({'error': 'Gemini API key not configured or client not initialized'}), 500
-    
-    data = request.json
     session_id = data.get('session_id')
+    topic = data.get('topic', '').strip() if with_topic else ''
+    
+    if with_topic and not topic:
+        return (jsonify({'error': 'Topic is required'}), 400), None, None, None, None
     
     if session_id not in sessions:
-        return jsonify({'error': 'Session not found'}), 404
+        return (jsonify({'error': 'Session not found'}), 404), None, None, None, None
     
     walking_window = sessions[session_id]
     all_current_words = [word_to_dict(w) for w in walking_window.current_words]
     
     if not all_current_words:
-        return jsonify({'error': 'No words in walking window'}), 400
+        return (jsonify({'error': 'No words in walking window'}), 400), None, None, None, None
     
     # Limit to max 10 random words
     current_words = random.sample(all_current_words, min(10, len(all_current_words)))
@@ -87,55 +159,224 @@ def generate_short_story():
     language_name = get_language_name_for_prompt(language)
     words_list = build_words_list(current_words)
     
-    prompt = f"""Write a 2-3 paragraph story in {language_name} using: {words_list}."""
+    if with_topic:
+        prompt = f"""Write a 2-3 paragraph passage in {language_name} about {topic} using: {words_list}."""
+    else:
+        prompt = f"""Write a 2-3 paragraph story in {language_name} using: {words_list}."""
+    return None, current_words, language, prompt, topic
 
-    try:
-        # Prioritize fastest flash models first
-        model_names = ['gemini-1.5-flash', 'gemini-2.5-flash']
-        response = None
-        last_error = None
-        
-        for model_name in model_names:
+def sse_event(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def session_highlights(text, session_id):
+    """Deck words in a text for the session's student, see utils/vocab_highlighter.py."""
+    walking_window = sessions.get(session_id)
+    # A stream can outlive its session
+    if walking_window is None:
+        return []
+    return highlight(text, session_id, walking_window)
+
+def open_stream(endpoint, language, words, prompt, user, topic='', annotate=None):
+    """
+    Start or join the generation for a streaming request and return its Server-Sent
+    Events: the words used first, then the text in chunks as the model produces it,
+    then done (or error). Cached content is sent as a single chunk, fresh content is
+    cached once complete. When annotate is given, done carries annotate(full text)
+    as highlights, with offsets into the concatenated chunks.
+
+    raise: QuotaExceeded or GenerationBusy, before any event is produced, if the user is out
+           of quota or no generation slot freed up in time
+    """
+    key = content_cache.make_key(endpoint, language, [w['foreign'] for w in words], topic, PROMPT_VERSION)
+    text = content_cache.cache.get(key)
+    cached = text is not None
+    if cached:
+        chunks = iter([text])
+    else:
+        usage_ledger.check(user)
+        def produce():
+            parts = []
+            started = time.perf_counter()
+            failed = True
             try:
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt
-                )
-                break
-            except Exception as e:
-                last_error = e
-                continue
-        
-        if response is None:
-            raise Exception(f"Could not find a working model. Last error: {str(last_error)}")
-        
-        story_text = response.text.strip()
+                for chunk in get_generation_client().stream(prompt):
+                    parts.append(chunk)
+                    yield chunk
+                failed = False
+            finally:
+                usage_ledger.record(user, prompt, ''.join(parts), time.perf_counter() - started, failed)
+            content_cache.cache.put(key, ''.join(parts).strip())
+        chunks = coalescer.stream(key, user, produce)
+    
+    def events():
+        yield sse_event('words', {'words': words})
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield sse_event('chunk', {'text': chunk})
+        except Exception as e:
+            yield sse_event('error', {'error': f'Failed to generate text: {str(e)}'})
+            return
+        done = {'cached': cached}
+        if annotate is not None:
+            done['highlights'] = annotate(''.join(parts))
+        yield sse_event('done', done)
+    return events()
+
+def sse_response(events):
+    return Response(stream_with_context(events), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/short-story', methods=['POST'])
+def generate_short_story():
+    """
+    Generate a short story in the target language using words from the walking window.
+    """
+    unavailable = generation_unavailable()
+    if unavailable:
+        return unavailable
+    
+    error, current_words, language, prompt, _ = prepare_reading_request(request.json)
+    if error:
+        return error
+
+    try:
+        story_text = generate_cached('short-story', language, current_words, prompt,
+                                     session_user(request.json.get('session_id')))
         
         return jsonify({
             'success': True,
             'text': story_text,
-            'words': current_words
+            'words': current_words,
+            'highlights': session_highlights(story_text, request.json.get('session_id'))
         })
+    except GenerationBusy:
+        return busy_response()
+    except QuotaExceeded as e:
+        return quota_response(e)
     except Exception as e:
         return jsonify({'error': f'Failed to generate story: {str(e)}'}), 500
 
+@bp.route('/short-story/stream', methods=['POST'])
+def stream_short_story():
+    """
+    Stream a short story as Server-Sent Events: a words event with the words used,
+    chunk events with text as it is generated, then a done event with the highlights
+    of the whole story, or an error event.
+    """
+    unavailable = generation_unavailable()
+    if unavailable:
+        return unavailable
+    
+    error, current_words, language, prompt, _ = prepare_reading_request(request.json)
+    if error:
+        return error
+    
+    try:
+        session_id = request.json.get('session_id')
+        events = open_stream('short-story', language, current_words, prompt, session_user(session_id),
+                             annotate=lambda text: session_highlights(text, session_id))
+    except GenerationBusy:
+        return busy_response()
+    except QuotaExceeded as e:
+        return quota_response(e)
+    return sse_response(events)
+
 @bp.route('/topical-passage', methods=['POST'])
 def generate_topical_passage():
     """
     Generate a topical passage in the target language using words from the walking window.
     """
-    if not GENAI_AVAILABLE:
-        return jsonify({'error': 'Google Generative AI package not installed. Please install: pip install google-genai'}), 500
+    unavailable = generation_unavailable()
+    if unavailable:
+        return unavailable
+    
+    error, current_words, language, prompt, topic = prepare_reading_request(request.json, with_topic=True)
+    if error:
+        return error
+
+    try:
+        passage_text = generate_cached('topical-passage', language, current_words, prompt,
+                                       session_user(request.json.get('session_id')), topic)
+        
+        return jsonify({
+            'success': True,
+            'text': passage_text,
+            'words': current_words,
+            'highlights': session_highlights(passage_text, request.json.get('session_id'))
+        })
+    except GenerationBusy:
+        return busy_response()
+    except QuotaExceeded as e:
+        return quota_response(e)
+    except Exception as e:
+        return jsonify({'error': f'Failed to generate passage: {str(e)}'}), 500
+
+@bp.route('/topical-passage/stream', methods=['POST'])
+def stream_topical_passage():
+    """
+    Stream a topical passage as Server-Sent Events, same events as /short-story/stream.
+    """
+    unavailable = generation_unavailable()
+    if unavailable:
+        return unavailable
     
-    if not client:
-        return jsonify({'error': 'Gemini API key not configured or client not initialized'}), 500
+    error, current_words, language, prompt, topic = prepare_reading_request(request.json, with_topic=True)
+    if error:
+        return error
     
+    try:
+        session_id = request.json.get('session_id')
+        events = open_stream('topical-passage', language, current_words, prompt, session_user(session_id),
+                             topic, annotate=lambda text: session_highlights(text, session_id))
+    except GenerationBusy:
+        return busy_response()
+    except QuotaExceeded as e:
+        return quota_response(e)
+    return sse_response(events)
+
+@bp.route('/highlight', methods=['POST'])
+def highlight_text():
+    """
+    Mark the words of the session's deck that appear in a text, each span tagged
+    window, known or unknown. Body: session_id, text.
+    """
     data = request.json
     session_id = data.get('session_id')
-    topic = data.get('topic', '').strip()
+    text = data.get('text')
+    
+    if session_id not in sessions:
+        return jsonify({'error': 'Session not found'}), 404
+    if not isinstance(text, str):
+        return jsonify({'error': 'Text is required'}), 400
+    
+    return jsonify({
+        'success': True,
+        'highlights': session_highlights(text, session_id)
+    })
+
+def build_choices(target_word, all_current_words):
+    """Target word plus up to 3 other random window words for the dropdown, shuffled."""
+    # Get other words for the dropdown (excluding the target word)
+    other_words = [w for w in all_current_words if w['foreign'] != target_word['foreign']]
+    distractors = random.sample(other_words, min(3, len(other_words)))
+    choices = [target_word] + distractors
+    random.shuffle(choices)
+    return choices
+
+@bp.route('/fill-in-the-blank', methods=['POST'])
+def generate_fill_in_the_blank():
+    """
+    Generate a fill-in-the-blank sentence focusing on a single word from the walking window.
+    """
+    unavailable = generation_unavailable()
+    if unavailable:
+        return unavailable
     
-    if not topic:
-        return jsonify({'error': 'Topic is required'}), 400
+    data = request.json
+    session_id = data.get('session_id')
     
     if session_id not in sessions:
         return jsonify({'error': 'Session not found'}), 404
@@ -146,55 +387,63 @@ def generate_topical_passage():
     if not all_current_words:
         return jsonify({'error': 'No words in walking window'}), 400
     
-    # Limit to max 10 random words
-    current_words = random.sample(all_current_words, min(10, len(all_current_words)))
+    # Select one random word to focus on
+    target_word = random.choice(all_current_words)
     
     language = settings.LANGUAGE
     language_name = get_language_name_for_prompt(language)
-    words_list = build_words_list(current_words)
     
-    prompt = f"""Write a 2-3 paragraph passage in {language_name} about {topic} using: {words_list}."""
-
+    # Sentences stored in the corpus that this student has not seen yet are used first, then sentences
+    # pre-generated in the background; the model is only called when both come up empty
+    user = session_user(session_id)
+    foreign = target_word['foreign']
+    sentence_pool.start()
+    
     try:
-        # Prioritize fastest flash models first
-        model_names = ['gemini-1.5-flash', 'gemini-2.5-flash']
-        response = None
-        last_error = None
-        
-        for model_name in model_names:
-            try:
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt
-                )
-                break
-            except Exception as e:
-                last_error = e
-                continue
-        
-        if response is None:
-            raise Exception(f"Could not find a working model. Last error: {str(last_error)}")
-        
-        passage_text = response.text.strip()
+        sentence = sentence_corpus.take(language, foreign, user)
+        if sentence is None:
+            sentence = sentence_pool.pop(language, foreign)
+            problem = None
+            if sentence is None:
+                prompt = build_fill_in_blank_prompt(language_name, foreign)
+                key = content_cache.make_key('fill-in-the-blank', language, [foreign], '', PROMPT_VERSION)
+                usage_ledger.check(user)
+                raw_text = coalescer.do(key, user, lambda: metered_generate(prompt, user))
+                sentence = clean_generated_sentence(raw_text)
+                
+                # Log problems but continue (the word might be in a different form)
+                problem = sentence_problem(sentence, foreign)
+                if problem:
+                    logging.warning(problem)
+            if not problem:
+                sentence_corpus.keep(language, foreign, sentence, user)
+            sentence_pool.request_refill(language, foreign)
         
         return jsonify({
             'success': True,
-            'text': passage_text,
-            'words': current_words
+            'sentence': sentence,
+            'target_word': target_word,
+            'choices': build_choices(target_word, all_current_words)
         })
+    except GenerationBusy:
+        return busy_response()
+    except QuotaExceeded as e:
+        return quota_response(e)
     except Exception as e:
-        return jsonify({'error': f'Failed to generate passage: {str(e)}'}), 500
+        return jsonify({'error': f'Failed to generate sentence: {str(e)}'}), 500
 
-@bp.route('/fill-in-the-blank', methods=['POST'])
-def generate_fill_in_the_blank():
+@bp.route('/fill-in-the-blank/batch', methods=['POST'])
+def generate_fill_in_the_blank_batch():
     """
-    Generate a fill-in-the-blank sentence focusing on a single word from the walking window.
+    Generate a quiz set of fill-in-the-blank items for several different walking window words.
+    Corpus sentences the student has not seen and pooled sentences are used first and the rest
+    are requested from the model in one call;
+    words whose line fails validation are retried once in a second batch.
+    Optional body field: count (default settings.FILL_IN_BLANK_BATCH_DEFAULT).
     """
-    if not GENAI_AVAILABLE:
-        return jsonify({'error': 'Google Generative AI package not installed. Please install: pip install google-genai'}), 500
-    
-    if not client:
-        return jsonify({'error': 'Gemini API key not configured or client not initialized'}), 500
+    unavailable = generation_unavailable()
+    if unavailable:
+        return unavailable
     
     data = request.json
     session_id = data.get('session_id')
@@ -202,118 +451,76 @@ def generate_fill_in_the_blank():
     if session_id not in sessions:
         return jsonify({'error': 'Session not found'}), 404
     
+    try:
+        count = int(data.get('count', settings.FILL_IN_BLANK_BATCH_DEFAULT))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Count must be a number'}), 400
+    if count < 1 or count > settings.FILL_IN_BLANK_BATCH_MAX:
+        return jsonify({'error': f'Count must be between 1 and {settings.FILL_IN_BLANK_BATCH_MAX}'}), 400
+    
     walking_window = sessions[session_id]
     all_current_words = [word_to_dict(w) for w in walking_window.current_words]
     
     if not all_current_words:
         return jsonify({'error': 'No words in walking window'}), 400
     
-    # Select one random word to focus on
-    target_word = random.choice(all_current_words)
-    
-    # Get other words for the dropdown (excluding the target word)
-    other_words = [w for w in all_current_words if w['foreign'] != target_word['foreign']]
-    # Select up to 3 other random words for the dropdown
-    distractors = random.sample(other_words, min(3, len(other_words)))
-    
+    target_words = random.sample(all_current_words, min(count, len(all_current_words)))
     language = settings.LANGUAGE
     language_name = get_language_name_for_prompt(language)
     
-    prompt = f"""Write one complete sentence in {language_name} using "{target_word['foreign']}". Place the word in the middle or end of the sentence, not at the beginning. Avoid exclamations. No explanations, no English, just the sentence."""
+    user = session_user(session_id)
+    sentence_pool.start()
+    sentences = {}
+    from_corpus = set()
+    for word in target_words:
+        sentence = sentence_corpus.take(language, word['foreign'], user)
+        if sentence is not None:
+            from_corpus.add(word['foreign'])
+        else:
+            sentence = sentence_pool.pop(language, word['foreign'])
+        if sentence is not None:
+            sentences[word['foreign']] = sentence
     
     try:
-        # Prioritize fastest flash models first
-        model_names = ['gemini-1.5-flash', 'gemini-2.5-flash']
-        response = None
-        last_error = None
-        
-        for model_name in model_names:
-            try:
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt
-                )
+        for _ in range(2):
+            missing = [w['foreign'] for w in target_words if w['foreign'] not in sentences]
+            if not missing:
                 break
-            except Exception as e:
-                last_error = e
-                continue
-        
-        if response is None:
-            raise Exception(f"Could not find a working model. Last error: {str(last_error)}")
-        
-        raw_text = response.text.strip()
-        
-        # Extract only the sentence - remove any English explanations or metadata
-        # Split by common separators and take the first substantial line
-        lines = raw_text.split('\n')
-        sentence = None
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            # Skip lines that are clearly English explanations (contain common English words)
-            english_indicators = ['means', 'translation', 'example', 'sentence', 'word', 'here', 'this is']
-            if any(indicator in line.lower() for indicator in english_indicators):
-                continue
-            # Skip lines that are just punctuation or very short
-            if len(line) < 5:
-                continue
-            # Take the first substantial line that looks like a sentence
-            sentence = line
-            # Remove trailing punctuation that might be from formatting
-            sentence = sentence.rstrip('.,;:')
-            break
-        
-        # Fallback: if no good line found, use the first line and clean it
-        if not sentence:
-            sentence = raw_text.split('\n')[0].strip()
-            # Remove common prefixes/suffixes that might be added
-            prefixes_to_remove = ['Sentence:', 'Example:', 'Here is:', 'Translation:']
-            for prefix in prefixes_to_remove:
-                if sentence.lower().startswith(prefix.lower()):
-                    sentence = sentence[len(prefix):].strip()
-            sentence = sentence.rstrip('.,;:')
-        
-        # Final cleanup: remove quotes if the entire sentence is quoted
-        if sentence.startswith('"') and sentence.endswith('"'):
-            sentence = sentence[1:-1]
-        elif sentence.startswith("'") and sentence.endswith("'"):
-            sentence = sentence[1:-1]
-        
-        # Remove exclamation marks (replace with period if at end, or remove if in middle)
-        if '!' in sentence:
-            sentence = sentence.replace('!', '.')
-            # Remove duplicate periods
-            while '..' in sentence:
-                sentence = sentence.replace('..', '.')
-            sentence = sentence.rstrip('.')
-        
-        # Verify the sentence contains the target word (case-insensitive)
-        sentence_lower = sentence.lower()
-        target_word_lower = target_word['foreign'].lower()
-        
-        if target_word_lower not in sentence_lower:
-            # If target word not found, log warning but continue (word might be in different form)
-            logging.warning(f"Target word '{target_word['foreign']}' not found in generated sentence: {sentence}")
-        else:
-            # Check if word appears at the beginning (prefer middle/end)
-            # Find the position of the word in the sentence
-            word_pos = sentence_lower.find(target_word_lower)
-            # Check if word is at the very beginning (first 5 characters)
-            if word_pos >= 0 and word_pos < 5:
-                logging.warning(f"Target word '{target_word['foreign']}' appears near the beginning of sentence: {sentence}")
-        
-        # Build choices list: target word + distractors, shuffled
-        choices = [target_word] + distractors
-        random.shuffle(choices)
-        
-        return jsonify({
-            'success': True,
-            'sentence': sentence,
-            'target_word': target_word,
-            'choices': choices
-        })
+            prompt = build_batch_prompt(language_name, missing)
+            key = content_cache.make_key('fill-in-the-blank/batch', language, missing, '', PROMPT_VERSION)
+            usage_ledger.check(user)
+            raw_text = coalescer.do(key, user, lambda: metered_generate(prompt, user))
+            sentences.update(parse_batch_reply(raw_text, missing))
     except Exception as e:
-        return jsonify({'error': f'Failed to generate sentence: {str(e)}'}), 500
+        if not sentences:
+            if isinstance(e, GenerationBusy):
+                return busy_response()
+            if isinstance(e, QuotaExceeded):
+                return quota_response(e)
+            return jsonify({'error': f'Failed to generate sentences: {str(e)}'}), 500
+        logging.warning(f"Batch generation failed, returning {len(sentences)} pooled sentences: {e}")
+    
+    items = []
+    for word in target_words:
+        if word['foreign'] not in from_corpus:
+            sentence_pool.request_refill(language, word['foreign'])
+            if word['foreign'] in sentences:
+                sentence_corpus.keep(language, word['foreign'], sentences[word['foreign']], user)
+        if word['foreign'] in sentences:
+            items.append({
+                'sentence': sentences[word['foreign']],
+                'target_word': word,
+                'choices': build_choices(word, all_current_words)
+            })
+    
+    return jsonify({
+        'success': True,
+        'items': items,
+        'missing': [w['foreign'] for w in target_words if w['foreign'] not in sentences]
+    })
 
+@bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get counters of the generated content cache, the sentence pool and corpus, and request coalescing."""
+    return jsonify(dict(content_cache.cache.stats(), sentence_pool=sentence_pool.stats(),
+                        sentence_corpus=sentence_corpus.stats(), coalescing=coalescer.stats()))
@@ -3,6 +3,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils import settings
+from utils.deck_manifest import ensure_user_deck
 from models.walking_window import WalkingWindow
 
 bp = Blueprint('settings', __name__, url_prefix='/api/settings')
@@ -55,6 +56,7 @@ def update_settings():
     if session_id:
         username = session_id.split('_')[0]
         new_session_id = f"{username}_{settings.LANGUAGE}"
+        ensure_user_deck(username, settings.LANGUAGE)
         sessions[new_session_id] = WalkingWindow(size=settings.WALKING_WINDOW_SIZE)
         
         return jsonify({
@@ -3,6 +3,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils import settings
+from utils.event_log import rollups
 
 bp = Blueprint('stats', __name__, url_prefix='/api/stats')
 
@@ -49,3 +50,17 @@ def get_stats():
         'most_difficult': most_difficult
     })
 
+@bp.route('/activity/<email>', methods=['GET'])
+def get_activity(email):
+    """
+    Get a student's daily activity from the event log rollups.
+    Optional query args: days (default 7, max 366), language (default all).
+    """
+    days = request.args.get('days', 7, type=int)
+    language = request.args.get('language') or None
+    if days < 1 or days > 366:
+        return jsonify({'error': 'days must be between 1 and 366'}), 400
+    if language is not None and language not in settings.LANGUAGE_OPTIONS:
+        return jsonify({'error': 'Invalid language'}), 400
+    
+    return jsonify(rollups.user_activity(email, days, language))
@@ -1,15 +1,63 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from models.walking_window import WalkingWindow
 from models.word import Word
 from utils import settings
+from utils import class_matrix
+from utils import event_log
+from utils import audio_prewarm
+from utils.deck_manifest import ensure_user_deck
+from utils.student_summary import snapshot_word, apply_word_delta
+from utils.word_category_index import session_index, parse_page_args, page, ndjson_lines
 
 bp = Blueprint('study', __name__, url_prefix='/api/study')
 
+class SessionStore(dict):
+    """Study sessions by id, remembering when a request last used each one."""
+
+    def __init__(self):
+        super().__init__()
+        self.last_used = {}  # session id -> time of the last request that looked it up
+
+    def __setitem__(self, session_id, walking_window):
+        super().__setitem__(session_id, walking_window)
+        self.last_used[session_id] = time.time()
+
+    def __getitem__(self, session_id):
+        walking_window = super().__getitem__(session_id)
+        self.last_used[session_id] = time.time()
+        return walking_window
+
+    def active(self, seconds: float) -> list:
+        """(session id, walking window) of every session a request used in the last `seconds` seconds."""
+        cutoff = time.time() - seconds
+        return [(session_id, walking_window) for session_id, walking_window in list(self.items())
+                if self.last_used.get(session_id, 0) >= cutoff]
+
 # Store active sessions (in production, use Redis or database)
-sessions = {}
+sessions = SessionStore()
+
+def split_session_id(session_id):
+    """
+    Split a session id (username_language or username_language_assignment_<id>) into its parts.
+    Usernames are emails and may contain '_', so the id is split at a known language instead.
+
+    param: session_id: the study session id
+    return: (username, language, assignment_id or None), or None if no known language is found
+    """
+    session_id = session_id or ''
+    for language in settings.LANGUAGE_OPTIONS:
+        marker = f"_{language}_assignment_"
+        index = session_id.rfind(marker)
+        if index > 0:
+            return session_id[:index], language, session_id[index + len(marker):]
+    for language in settings.LANGUAGE_OPTIONS:
+        if session_id.endswith(f"_{language}") and len(session_id) > len(language) + 1:
+            return session_id[:-len(language) - 1], language, None
+    return None
 
 def word_to_dict(word):
     return {
@@ -21,6 +69,33 @@ def word_to_dict(word):
         'is_known': word.is_known
     }
 
+def save_word_progress(session_id, walking_window, word, before):
+    """
+    Persist a session after one of its words changed and record the change
+    in the event log, the student's summary and cached classroom matrices.
+
+    param: session_id: the study session id (username_language[...])
+    param: walking_window: the session's WalkingWindow
+    param: word: the Word that changed
+    param: before: snapshot_word(word) taken before the change
+    """
+    # Usernames may contain '_', and other sessions may be studying another language
+    parts = split_session_id(session_id)
+    username = parts[0] if parts else settings.username
+    language = walking_window.language
+    csv_name = f"{username}_{language}.csv"
+    walking_window.word_dict_to_csv(csv_name)
+    walking_window.revision += 1
+    after = snapshot_word(word)
+    event_log.record(username, language, walking_window.word_positions.get(word.foreign, -1), before, after)
+
+    # Assignment saves merge into the personal deck and refresh the summary themselves
+    if walking_window.is_assignment_mode:
+        class_matrix.invalidate_student(username, language)
+    else:
+        apply_word_delta(username, language, before, after)
+        class_matrix.record_word(username, language, word)
+
 @bp.route('/init', methods=['POST'])
 def init_study():
     try:
@@ -35,6 +110,9 @@ def init_study():
         settings.username = username
         settings.LANGUAGE = language
         
+        # Materialize this language's deck on first use (assignments sync into it too)
+        ensure_user_deck(username, language)
+        
         if assignment_id:
             # Assignment mode
             session_id = f"{username}_{language}_assignment_{assignment_id}"
@@ -48,6 +126,10 @@ def init_study():
             session_id = f"{username}_{language}"
             sessions[session_id] = WalkingWindow(size=settings.WALKING_WINDOW_SIZE)
         
+        # Pronunciations of the first cards are generated before they are shown
+        if settings.AUDIO_PREWARM_ON_INIT:
+            audio_prewarm.prewarm_session(session_id, language, sessions[session_id])
+        
         return jsonify({'success': True, 'session_id': session_id})
     except FileNotFoundError as e:
         import logging
@@ -119,13 +201,11 @@ def check_answer():
         if not isinstance(answer, str):
             answer = str(answer)
         
+        before = snapshot_word(flashword)
         is_correct = walking_window.check_word_definition(flashword, answer)
         
         # Auto-save after each answer to persist word statistics
-        # Extract username from session_id (format: username_language or username_language_assignment_id)
-        username = session_id.split('_')[0] if '_' in session_id else settings.username
-        csv_name = f"{username}_{settings.LANGUAGE}.csv"
-        walking_window.word_dict_to_csv(csv_name)
+        save_word_progress(session_id, walking_window, flashword, before)
         
         return jsonify({
             'correct': is_correct,
@@ -149,11 +229,10 @@ def mark_known():
     flashword = walking_window.words_dict.get(flashword_data['foreign'])
     
     if flashword:
+        before = snapshot_word(flashword)
         walking_window.mark_word_as_known(flashword)
         # Auto-save after marking as known (handles both assignment and personal modes)
-        username = session_id.split('_')[0] if '_' in session_id else settings.username
-        csv_name = f"{username}_{settings.LANGUAGE}.csv"
-        walking_window.word_dict_to_csv(csv_name)
+        save_word_progress(session_id, walking_window, flashword, before)
     
     return jsonify({'success': True})
 
@@ -174,6 +253,10 @@ def save_session():
 
 @bp.route('/get-known-words', methods=['POST'])
 def get_known_words():
+    """
+    Get the session's known words. Passing cursor, limit, sort or format
+    returns one page at a time; format "ndjson" streams one word per line.
+    """
     data = request.json
     session_id = data.get('session_id')
     
@@ -181,9 +264,28 @@ def get_known_words():
         return jsonify({'error': 'Session not found'}), 404
     
     walking_window = sessions[session_id]
-    known_words = [word_to_dict(w) for w in walking_window.words_dict.values() if w.is_known]
     
-    return jsonify({'words': known_words})
+    paged = any(key in data for key in ('cursor', 'limit', 'sort', 'format'))
+    if not paged:
+        # Original behaviour: every known word, in deck order
+        known_words = [word_to_dict(w) for w in walking_window.words_dict.values() if w.is_known]
+        return jsonify({'words': known_words})
+    
+    try:
+        _, sort, cursor, limit = parse_page_args(data, categories=('known',))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    ordered = session_index(session_id, walking_window, word_to_dict).words('known', sort)
+    if data.get('format') == 'ndjson' and 'limit' not in data:
+        limit = max(len(ordered), 1)
+    words, next_cursor = page(ordered, cursor, limit)
+    
+    if data.get('format') == 'ndjson':
+        return Response(stream_with_context(ndjson_lines(words, next_cursor, {'known': len(ordered)})),
+                        mimetype='application/x-ndjson')
+    
+    return jsonify({'words': words, 'next_cursor': next_cursor, 'total': len(ordered)})
 
 @bp.route('/get-current-words', methods=['POST'])
 def get_current_words():
@@ -222,12 +324,11 @@ def check_review_answer():
         return jsonify({'error': 'Word not found'}), 404
     
     # Check answer and update statistics (but don't move words in walking window)
+    before = snapshot_word(flashword)
     is_correct = flashword.check_definition(answer)
     
     # Auto-save after each review answer to persist word statistics
-    username = session_id.split('_')[0] if '_' in session_id else settings.username
-    csv_name = f"{username}_{settings.LANGUAGE}.csv"
-    walking_window.word_dict_to_csv(csv_name)
+    save_word_progress(session_id, walking_window, flashword, before)
     
     return jsonify({
         'correct': is_correct,
@@ -1,108 +1,198 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify, send_from_directory, Response
 import sys
 import os
 import urllib.parse
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils import settings
 from utils import text_to_speech
+from utils.tts_worker import tts_pool, TTSBusy
+from utils.audio_cache import audio_cache
+from utils.audio_pack import audio_packs
+from utils import audio_prewarm
 
 bp = Blueprint('words', __name__, url_prefix='/api/words')
 
+def audio_url(lang, audio_path):
+    """URL of an audio file, served by serve_audio."""
+    # URL encode the filename (just the filename, not the full path)
+    encoded_filename = urllib.parse.quote(os.path.basename(audio_path), safe='')
+    return f'/api/words/audio/{lang}/{encoded_filename}'
+
+def tts_status_url(word, language):
+    return f"/api/words/tts/status?{urllib.parse.urlencode({'word': word, 'language': language})}"
+
 @bp.route('/tts', methods=['POST'])
 def get_tts():
+    """
+    Get the pronunciation audio URL of a word, generating the audio on the TTS worker pool if needed.
+    Waits up to settings.TTS_WAIT_TIMEOUT seconds for new audio (or not at all with wait: false);
+    if it is not ready by then the answer is 202 with status pending and a status_url to poll.
+    """
     import logging
     
     data = request.json
     word = data.get('word')
     language = data.get('language', 'spanish')
+    wait = data.get('wait', True)
     
     if not word:
         return jsonify({'error': 'Word is required'}), 400
     
-    # Map language names to lowercase for TTS
-    lang_map = {
-        'Spanish': 'spanish',
-        'French': 'french',
-        'Arabic': 'arabic',
-        'Japanese': 'japanese',
-        'Mandarin': 'mandarin',
-        'Hieroglyphic': 'english',  # Fallback for hieroglyphic
-        'TokiPona': 'tokipona'
-    }
-    lang = lang_map.get(language, language.lower())
+    lang = text_to_speech.tts_lang(language)
+    
+    target = text_to_speech.audio_target(word, lang)
+    if target is None:
+        return jsonify({'error': 'Failed to generate pronunciation - file not created'}), 400
+    spoken_word, audio_path = target
+    
+    if audio_cache.contains(audio_path):
+        return jsonify({'success': True, 'status': 'ready', 'audio_url': audio_url(lang, audio_path)})
     
     logging.info(f"Generating TTS for word: '{word}' in language: {lang}")
     
     try:
-        audio_path = text_to_speech.generate_pronunciation(word, lang)
-        
-        if audio_path and os.path.exists(audio_path):
-            # Get the actual filename that was saved (just the filename, not the full path)
-            filename = os.path.basename(audio_path)
-            # URL encode the filename for the URL
-            encoded_filename = urllib.parse.quote(filename, safe='')
-            logging.info(f"TTS generated successfully: {audio_path}")
-            return jsonify({
-                'success': True,
-                'audio_url': f'/api/words/audio/{lang}/{encoded_filename}'
-            })
-        else:
-            logging.error(f"TTS generation failed: audio_path={audio_path}, exists={os.path.exists(audio_path) if audio_path else False}")
-            return jsonify({'error': 'Failed to generate pronunciation - file not created'}), 400
-    except Exception as e:
-        logging.error(f"Error in TTS generation: {str(e)}", exc_info=True)
-        return jsonify({'error': f'Failed to generate pronunciation: {str(e)}'}), 500
+        job = tts_pool.submit(spoken_word, lang, audio_path)
+    except TTSBusy as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '2'}
+    
+    if wait:
+        job.wait(settings.TTS_WAIT_TIMEOUT)
+    
+    if job.status == 'ready':
+        logging.info(f"TTS generated successfully: {audio_path}")
+        return jsonify({'success': True, 'status': 'ready', 'audio_url': audio_url(lang, audio_path)})
+    if job.status == 'failed':
+        return jsonify({'error': f'Failed to generate pronunciation: {job.error}'}), 502
+    return jsonify({
+        'success': False,
+        'status': 'pending',
+        'audio_url': audio_url(lang, audio_path),
+        'status_url': tts_status_url(word, language)
+    }), 202
+
+@bp.route('/tts/status', methods=['GET'])
+def get_tts_status():
+    """
+    Get where the pronunciation of a word stands: ready, pending, running, failed or missing.
+    Query args: word, language.
+    """
+    word = request.args.get('word')
+    language = request.args.get('language', 'spanish')
+    
+    if not word:
+        return jsonify({'error': 'Word is required'}), 400
+    
+    lang = text_to_speech.tts_lang(language)
+    target = text_to_speech.audio_target(word, lang)
+    if target is None:
+        return jsonify({'error': 'Pronunciation not available for this word'}), 400
+    spoken_word, audio_path = target
+    
+    status, error = tts_pool.status(spoken_word, lang, audio_path)
+    result = {'success': status == 'ready', 'status': status, 'audio_url': audio_url(lang, audio_path)}
+    if error:
+        result['error'] = error
+    return jsonify(result)
+
+@bp.route('/tts/stats', methods=['GET'])
+def get_tts_stats():
+    """Get counters of the TTS worker pool, the audio cache and the packed audio archives."""
+    return jsonify(dict(tts_pool.stats(), audio_cache=audio_cache.stats(), audio_packs=audio_packs.stats()))
+
+@bp.route('/prewarm', methods=['POST'])
+def start_prewarm():
+    """
+    Pre-generate pronunciations in the background for one word list:
+    session_id (the session's current words), assignment_id (its word list)
+    or template (a language, every word of Template_<language>.csv).
+    Assignment and template runs need the admin token and are resumable,
+    starting one again continues from its checkpoint.
+    """
+    data = request.json or {}
+    session_id = data.get('session_id')
+    assignment_id = data.get('assignment_id')
+    template = data.get('template')
+    
+    if len([source for source in (session_id, assignment_id, template) if source]) != 1:
+        return jsonify({'error': 'Give one of session_id, assignment_id or template'}), 400
+    
+    if not session_id:
+        # Whole word lists cost a TTS request per word, keep them to admins
+        from api.admin import admin_denied
+        denied = admin_denied()
+        if denied:
+            return denied
+    
+    if session_id:
+        from api.study import sessions
+        if session_id not in sessions:
+            return jsonify({'error': 'Session not found'}), 404
+        walking_window = sessions[session_id]
+        run = audio_prewarm.prewarm_session(session_id, walking_window.language, walking_window)
+    elif assignment_id:
+        language = data.get('language') or audio_prewarm.assignment_language(assignment_id)
+        words = audio_prewarm.assignment_words(assignment_id)
+        if not language or not words:
+            return jsonify({'error': 'Assignment not found'}), 404
+        run = audio_prewarm.prewarmer.start(f"assignment-{assignment_id}", language, words)
+    else:
+        if template not in settings.LANGUAGE_OPTIONS:
+            return jsonify({'error': f'Unknown language: {template}'}), 400
+        try:
+            words = audio_prewarm.template_words(template)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 404
+        run = audio_prewarm.prewarmer.start(f"template-{template}", template, words)
+    
+    return jsonify(dict(run.to_dict(), success=True,
+                        progress_url=f"/api/words/prewarm/{urllib.parse.quote(run.run_id, safe='')}")), 202
+
+@bp.route('/prewarm/<path:run_id>', methods=['GET'])
+def get_prewarm_progress(run_id):
+    """Get the progress of a pre-warm run: counts of ready, generated, failed and unsupported words."""
+    progress = audio_prewarm.prewarmer.progress(urllib.parse.unquote(run_id))
+    if progress is None:
+        return jsonify({'error': 'Pre-warm run not found'}), 404
+    return jsonify(dict(progress, success=True))
 
 @bp.route('/audio/<lang>/<path:filename>')
 def serve_audio(lang, filename):
-    """Serve audio files from the audio_files directory."""
-    from flask import Response, make_response
+    """
+    Serve an audio file from the language's packed archive, or else from the audio cache.
+    The file name is the content hash from audio_url, or a word for URLs from the old flat layout.
+    """
+    from flask import make_response
     import logging
     
-    # Get the base directory (backend directory)
-    # From backend/api/words.py, go up 2 levels: api -> backend
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    audio_dir = os.path.join(base_dir, 'audio_files', lang)
-    
     # Decode the filename from URL encoding
     decoded_filename = urllib.parse.unquote(filename)
     
-    # Security: ensure filename doesn't contain path traversal
-    # After decoding, check if it's just a filename (no path separators)
-    if '..' in decoded_filename or os.path.sep in decoded_filename or '/' in decoded_filename:
-        logging.warning(f"Invalid filename attempted: {decoded_filename}")
+    # Security: only known languages, the file name is only ever used to look up a hashed path
+    file_path = audio_cache.path_for_name(lang, decoded_filename) if lang in text_to_speech.LANGUAGES else None
+    if file_path is None:
+        logging.warning(f"Invalid audio file requested: {lang}/{decoded_filename}")
         return jsonify({'error': 'Invalid filename'}), 400
     
-    # Ensure the file exists
-    file_path = os.path.join(audio_dir, decoded_filename)
-    
-    # Log for debugging
-    logging.info(f"Attempting to serve audio: {file_path}")
-    logging.info(f"Audio directory: {audio_dir}")
-    logging.info(f"Decoded filename: {decoded_filename}")
-    
-    if not os.path.exists(file_path):
-        # Log for debugging
-        logging.error(f"Audio file not found: {file_path}")
-        logging.error(f"Looking in directory: {audio_dir}")
-        if os.path.exists(audio_dir):
-            try:
-                files = os.listdir(audio_dir)
-                logging.error(f"Files in directory: {files}")
-            except Exception as e:
-                logging.error(f"Error listing directory: {e}")
-        else:
-            logging.error(f"Directory does not exist: {audio_dir}")
-        logging.error(f"Requested filename: {decoded_filename}")
+    key = os.path.basename(file_path)[:-4]
+    packed = audio_packs.get(lang, key)
+    if packed is not None:
+        # Slice of the mapped pack; WSGI servers only take bytes, so it is copied once on the way out
+        response = Response(bytes(packed), mimetype='audio/mpeg')
+        response.set_etag(key)
+        response.make_conditional(request, accept_ranges=True, complete_length=len(packed))
+    elif not audio_cache.contains(file_path):
+        logging.info(f"Audio file not found: {lang}/{decoded_filename}")
         
         # Return JSON error for easier debugging
-        response = make_response(jsonify({'error': 'Audio file not found', 'requested': decoded_filename, 'path': file_path}), 404)
+        response = make_response(jsonify({'error': 'Audio file not found', 'requested': decoded_filename}), 404)
         response.headers['Content-Type'] = 'application/json'
         return response
+    else:
+        response = send_from_directory(os.path.dirname(file_path), os.path.basename(file_path),
+                                       mimetype='audio/mpeg', as_attachment=False)
     
     # Serve the file with proper CORS headers
-    response = send_from_directory(audio_dir, decoded_filename, mimetype='audio/mpeg', as_attachment=False)
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
     return response
-
@@ -9,7 +9,8 @@ allowed_origins = os.getenv('ALLOWED_ORIGINS', 'http://localhost:5173,https://sm
 CORS(app, origins=allowed_origins, supports_credentials=True)
 
 # Import API routes
-from api import auth, words, study, stats, settings_api, reading, classrooms, classroom_stats, classroom_assignments
+from api import auth, words, study, stats, settings_api, reading, classrooms, classroom_stats, classroom_assignments, admin
+from utils.audio_pack import audio_packs
 
 # Register blueprints
 app.register_blueprint(auth.bp)
@@ -21,6 +22,7 @@ app.register_blueprint(reading.bp)
 app.register_blueprint(classrooms.bp)
 app.register_blueprint(classroom_stats.bp)
 app.register_blueprint(classroom_assignments.bp)
+app.register_blueprint(admin.bp)
 
 # Ensure directories exist on startup (for both local and Cloud Run)
 os.makedirs('UserWords', exist_ok=True)
@@ -30,6 +32,9 @@ os.makedirs('audio_files', exist_ok=True)
 for lang in ['english', 'spanish', 'french', 'arabic', 'japanese', 'mandarin', 'tokipona']:
     os.makedirs(f'audio_files/{lang}', exist_ok=True)
 
+# Map the packed audio archives (python -m utils.audio_pack) before the first request
+audio_packs.load()
+
 if __name__ == '__main__':
     # Get port from environment variable (Cloud Run sets PORT)
     port = int(os.getenv('PORT', 5000))
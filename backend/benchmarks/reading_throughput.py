@@ -0,0 +1,169 @@
+"""
+ReadingThroughput.py
+================
+End-to-end throughput and tail latency of the reading endpoints, run
+offline against the local generation provider. Requests go through the
+Flask app (session lookup, content cache, sentence pool, hedging client)
+from a pool of concurrent clients; only the model itself is simulated.
+
+Run from backend/:
+    python benchmarks/reading_throughput.py --requests 400 --concurrency 16 --users 30 --latency 0.4 --jitter 0.6
+
+The app runs in a temporary copy of UserWords so caches start cold and no
+real data is touched.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import argparse
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ['short-story', 'topical-passage', 'fill-in-the-blank', 'fill-in-the-blank/batch']
+STREAMING = {'short-story', 'topical-passage'}
+
+def percentile(values: list, percent: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the reading endpoints against the local generation provider.')
+    parser.add_argument('--requests', type=int, default=200, help='total requests to send')
+    parser.add_argument('--concurrency', type=int, default=8, help='requests in flight at once')
+    parser.add_argument('--users', type=int, default=8, help='simulated students, each with their own study session')
+    parser.add_argument('--endpoints', nargs='+', default=ENDPOINTS, choices=ENDPOINTS, help='endpoints to mix round-robin')
+    parser.add_argument('--stream', action='store_true', help='use the streaming story and passage endpoints')
+    parser.add_argument('--latency', type=float, default=0.3, help='simulated model latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.3, help='extra simulated latency drawn from [0, jitter)')
+    parser.add_argument('--chunk-delay', type=float, default=0.01, help='seconds between streamed chunks')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of model calls that fail')
+    parser.add_argument('--seed', type=int, default=0, help='seed for simulated latency and errors')
+    return parser.parse_args(argv)
+
+def configure_environment(args):
+    """Select the local provider before the app (and its generation client) is imported."""
+    os.environ['GENERATION_PROVIDER'] = 'local'
+    os.environ['LOCAL_PROVIDER_LATENCY'] = str(args.latency)
+    os.environ['LOCAL_PROVIDER_JITTER'] = str(args.jitter)
+    os.environ['LOCAL_PROVIDER_CHUNK_DELAY'] = str(args.chunk_delay)
+    os.environ['LOCAL_PROVIDER_ERROR_RATE'] = str(args.error_rate)
+    os.environ['LOCAL_PROVIDER_SEED'] = str(args.seed)
+
+def start_app(users: int):
+    """Import the app inside a scratch working directory and open one study session per simulated student."""
+    work_dir = tempfile.mkdtemp(prefix='reading-bench-')
+    shutil.copytree(os.path.join(BACKEND_DIR, 'UserWords'), os.path.join(work_dir, 'UserWords'))
+    os.chdir(work_dir)
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+    from utils import settings
+    # Audio is not part of this benchmark, keep study init from queueing TTS jobs
+    settings.AUDIO_PREWARM_ON_INIT = False
+
+    client = app.test_client()
+    session_ids = []
+    for i in range(users):
+        email = f"benchmark{i}@example.com"
+        client.post('/api/auth/register', json={'email': email, 'password': 'benchmark', 'role': 'Student'})
+        response = client.post('/api/study/init', json={'username': email, 'language': 'Spanish'})
+        session_ids.append(response.json['session_id'])
+    return app, session_ids, work_dir
+
+def send(client, endpoint: str, session_id: str, stream: bool):
+    """
+    Send one request
+
+    return: (ok, seconds to complete, seconds to the first text chunk or None)
+    """
+    body = {'session_id': session_id}
+    if endpoint == 'topical-passage':
+        body['topic'] = 'the market'
+    path = f"/api/reading/{endpoint}"
+    started = time.perf_counter()
+    if stream and endpoint in STREAMING:
+        response = client.post(f"{path}/stream", json=body, buffered=False)
+        first_chunk = None
+        ok = response.status_code == 200
+        for part in response.response:
+            part = part.decode() if isinstance(part, bytes) else part
+            if first_chunk is None and part.startswith('event: chunk'):
+                first_chunk = time.perf_counter() - started
+            if part.startswith('event: error'):
+                ok = False
+        response.close()
+        return ok, time.perf_counter() - started, first_chunk
+    response = client.post(path, json=body)
+    return response.status_code == 200, time.perf_counter() - started, None
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    previous_dir = os.getcwd()
+    app, session_ids, work_dir = start_app(args.users)
+
+    clients = threading.local()
+    latencies = defaultdict(list)
+    first_chunks = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def task(i):
+        if not hasattr(clients, 'client'):
+            clients.client = app.test_client()
+        endpoint = args.endpoints[i % len(args.endpoints)]
+        ok, seconds, first_chunk = send(clients.client, endpoint, session_ids[i % len(session_ids)], args.stream)
+        with lock:
+            latencies[endpoint].append(seconds)
+            if first_chunk is not None:
+                first_chunks[endpoint].append(first_chunk)
+            if not ok:
+                errors[endpoint] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(task, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    from utils import content_cache
+    from utils.usage_ledger import ledger as usage_ledger
+    from utils.account_store import accounts
+    from utils.generation import get_generation_client
+    from api import reading
+    from api.reading import sentence_pool
+
+    print(f"{args.requests} requests from {args.users} students, concurrency {args.concurrency}, model latency {args.latency}s "
+          f"+ [0, {args.jitter})s, error rate {args.error_rate}")
+    print(f"{'endpoint':<26}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'ttfc p50':>10}")
+    for endpoint in args.endpoints:
+        values = latencies[endpoint]
+        if not values:
+            continue
+        ttfc = f"{percentile(first_chunks[endpoint], 50) * 1000:.0f}" if first_chunks[endpoint] else '-'
+        print(f"{endpoint:<26}{len(values):>7}{errors[endpoint]:>8}"
+              f"{percentile(values, 50) * 1000:>10.0f}{percentile(values, 95) * 1000:>10.0f}"
+              f"{percentile(values, 99) * 1000:>10.0f}{max(values) * 1000:>10.0f}{ttfc:>10}")
+    print(f"throughput: {args.requests / elapsed:.1f} requests/s over {elapsed:.2f}s")
+    print(f"model calls: {len(get_generation_client().provider.calls)}")
+    print(f"content cache: {content_cache.cache.stats()}")
+    print(f"sentence pool: {sentence_pool.stats()}")
+    print(f"coalescing: {reading.coalescer.stats()}")
+
+    # Background writers and the atexit flushes work relative to the scratch directory,
+    # finish them before it goes away
+    sentence_pool.stop(wait=True)
+    usage_ledger.stop()
+    accounts.flush_rehashes()
+    os.chdir(previous_dir)
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
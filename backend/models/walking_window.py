@@ -17,6 +17,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils import settings
 from models.word import Word
+from utils.student_summary import empty_totals, set_language_totals
+from utils.assignment_index import assignments as assignment_index, file_signature
 
 class WalkingWindow:
 
@@ -36,12 +38,16 @@ class WalkingWindow:
         self.srs_queue = deque(maxlen=settings.SRS_QUEUE_LENGTH)
         self.assignment_id = assignment_id
         self.student_email = student_email or settings.username
+        self.language = settings.LANGUAGE  # the language the deck was loaded for
         self.is_assignment_mode = assignment_id is not None
+        self.revision = 0  # bumped whenever a word's progress is saved, lets readers cache derived views
         
         if self.is_assignment_mode:
             self.words_dict = self.assignment_to_words_dict(assignment_id, student_email)
         else:
             self.words_dict = self.csv_to_words_dict(csv_name = f"{settings.username}_{settings.LANGUAGE}.csv")
+        # Position of each word in its deck, recorded with study events
+        self.word_positions = {foreign: i for i, foreign in enumerate(self.words_dict)}
         
         self.current_words = []
         self.init_current_words(self.size)
@@ -227,6 +233,7 @@ class WalkingWindow:
         from datetime import datetime
         
         # Read existing progress
+        signature_before = file_signature(ASSIGNMENT_PROGRESS_CSV)
         existing_progress = {}
         if os.path.exists(ASSIGNMENT_PROGRESS_CSV):
             with open(ASSIGNMENT_PROGRESS_CSV, 'r', encoding='utf-8') as f:
@@ -258,6 +265,12 @@ class WalkingWindow:
             writer.writeheader()
             writer.writerows(existing_progress.values())
         
+        # Keep the grouped assignment aggregates current without re-reading the file
+        student_rows = [row for row in existing_progress.values()
+                        if row.get('assignment_id', '') == self.assignment_id and
+                        row.get('student_email', '').strip() == self.student_email.strip()]
+        assignment_index.replace_student_progress(self.assignment_id, self.student_email, student_rows,
+                                                  signature_before, file_signature(ASSIGNMENT_PROGRESS_CSV))
         logging.info(f"Assignment progress saved for {self.assignment_id}")
     
     def sync_to_personal_csv(self, csv_name: str):
@@ -325,6 +338,7 @@ class WalkingWindow:
                 }
         
         # Write updated personal CSV
+        totals = empty_totals()
         with open(csv_path, 'w', newline='', encoding='utf-8') as f:
             fieldnames = ['Foreign', 'English', 'seen', 'correct', 'wrong', 'known']
             writer = csv.DictWriter(f, fieldnames=fieldnames)
@@ -340,7 +354,13 @@ class WalkingWindow:
                     'known': '1' if word_data['known'] else '0'
                 }
                 writer.writerow(row)
+                totals['seen'] += word_data['seen']
+                totals['correct'] += word_data['correct']
+                totals['incorrect'] += word_data['wrong']
+                totals['known'] += int(word_data['known'])
         
+        # The merged deck is already in memory, so refresh the student's summary from it
+        set_language_totals(self.student_email, self.language, totals)
         logging.info(f"Assignment progress synced to personal CSV: {csv_name}")
 
     def init_current_words(self, num_words: int):
@@ -0,0 +1,99 @@
+"""
+WindowProjection.py
+================
+Read-only projection of a student's walking window for instructor views.
+Reads the student's live study session when one exists, otherwise streams
+the persisted word CSV only until the window is full, the same words a new
+WalkingWindow would pick. Nothing is written and no global settings change.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import csv
+import logging
+import os
+
+def _word_dict(foreign, english, seen, correct, incorrect, known) -> dict:
+    return {
+        'foreign': foreign,
+        'english': english,
+        'count_seen': seen,
+        'count_correct': correct,
+        'count_incorrect': incorrect,
+        'is_known': known
+    }
+
+def _parse_known(known_value) -> bool:
+    """Known may be stored as 'True'/'False' or '1'/'0', same as WalkingWindow.csv_to_words_dict."""
+    if known_value.lower() == 'true':
+        return True
+    if known_value.lower() == 'false':
+        return False
+    try:
+        return bool(int(known_value))
+    except (ValueError, TypeError):
+        return False
+
+def _project_from_session(walking_window) -> dict:
+    current_words = [_word_dict(w.foreign, w.english, w.count_seen, w.count_correct,
+                                w.count_incorrect, w.is_known) for w in list(walking_window.current_words)]
+    srs_words = [_word_dict(w.foreign, w.english, w.count_seen, w.count_correct,
+                            w.count_incorrect, w.is_known) for w in list(walking_window.srs_queue)]
+    return {'current_words': current_words, 'srs_queue': srs_words, 'source': 'session'}
+
+def _project_from_csv(csv_path: str, size: int) -> dict:
+    current_words = []
+    seen_foreign = set()
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            foreign = row.get('Foreign', '').strip()
+            english = row.get('English', '').strip()
+            # Skip empty rows and repeats, a word dict keeps only the first position of a word
+            if not foreign or not english or foreign in seen_foreign:
+                continue
+            seen_foreign.add(foreign)
+            try:
+                known = _parse_known(row.get('known', '0') or '0')
+                if known:
+                    continue
+                current_words.append(_word_dict(foreign, english,
+                                                int(row.get('seen', 0) or 0),
+                                                int(row.get('correct', 0) or 0),
+                                                int(row.get('wrong', 0) or 0),
+                                                known))
+            except ValueError as e:
+                logging.warning(f"Error reading row from {csv_path}: {e}")
+                continue
+            if len(current_words) >= size:
+                break
+    # A freshly loaded window always starts with an empty SRS queue
+    return {'current_words': current_words, 'srs_queue': [], 'source': 'saved'}
+
+def project_walking_window(email: str, language: str, size: int, sessions: dict = None) -> dict:
+    """
+    Build a read-only view of a student's walking window
+
+    param: email: the student's email
+    param: language: the language of the window
+    param: size: the walking window size
+    param: sessions: active study sessions keyed by session id, if available
+    return: dict with current_words, srs_queue (lists of word dicts) and source
+            ('session', 'saved', 'template' or 'none')
+    """
+    session = (sessions or {}).get(f"{email}_{language}")
+    if session is not None:
+        return _project_from_session(session)
+
+    user_file = f"UserWords/{email}_{language}.csv"
+    if os.path.exists(user_file):
+        return _project_from_csv(user_file, size)
+
+    # The deck has not been materialized yet, it will start as a copy of the template
+    template_file = f"UserWords/Template_{language}.csv"
+    if os.path.exists(template_file):
+        projection = _project_from_csv(template_file, size)
+        projection['source'] = 'template'
+        return projection
+
+    return {'current_words': [], 'srs_queue': [], 'source': 'none'}
@@ -0,0 +1,54 @@
+import os
+import shutil
+import sys
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+@pytest.fixture(scope='session')
+def client(tmp_path_factory):
+    """A test client of the app running in a scratch copy of UserWords with the local generation provider."""
+    os.environ['GENERATION_PROVIDER'] = 'local'
+    os.environ['LOCAL_PROVIDER_LATENCY'] = '0'
+    os.environ['LOCAL_PROVIDER_ERROR_RATE'] = '0'
+    work_dir = tmp_path_factory.mktemp('app')
+    shutil.copytree(os.path.join(BACKEND_DIR, 'UserWords'), work_dir / 'UserWords')
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    from app import app
+    from utils import settings
+    from utils.usage_ledger import ledger as usage_ledger
+    from api.reading import sentence_pool
+    # Audio is not under test, keep study init from queueing TTS jobs
+    settings.AUDIO_PREWARM_ON_INIT = False
+    yield app.test_client()
+    # Background writers work relative to the scratch directory, finish them before leaving it
+    sentence_pool.stop(wait=True)
+    usage_ledger.stop()
+    os.chdir(previous_dir)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty scratch directory with a UserWords folder and empty in-memory summaries and manifests."""
+    from utils import deck_manifest, student_summary
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'UserWords').mkdir()
+    monkeypatch.setattr(student_summary, '_summaries', {})
+    monkeypatch.setattr(deck_manifest, '_manifests', {})
+    return tmp_path
+
+@pytest.fixture
+def audio_root(tmp_path, monkeypatch):
+    """Point the shared audio cache and pack reader at an empty scratch audio_files directory."""
+    from utils.audio_cache import audio_cache
+    from utils.audio_pack import audio_packs
+    root = tmp_path / 'audio_files'
+    root.mkdir()
+    monkeypatch.setattr(audio_cache, 'root', str(root))
+    monkeypatch.setattr(audio_cache, '_index', None)
+    monkeypatch.setattr(audio_cache, '_total', 0)
+    monkeypatch.setattr(audio_packs, 'root', str(root))
+    monkeypatch.setattr(audio_packs, '_packs', {})
+    monkeypatch.setattr(audio_packs, '_checked', None)
+    return root
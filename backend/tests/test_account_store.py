@@ -0,0 +1,55 @@
+import csv
+from utils.account_store import AccountStore
+
+def write_accounts(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Email', 'Password', 'Role'])
+        writer.writerows(rows)
+
+def read_passwords(path):
+    with open(path, newline='') as f:
+        return [(row['Email'], row['Password']) for row in csv.DictReader(f)]
+
+def test_lookup_ignores_case_and_spaces(tmp_path):
+    path = tmp_path / 'accounts.csv'
+    write_accounts(path, [['Ana@Example.com', 'pbkdf2:x', 'Student']])
+    store = AccountStore(str(path))
+    assert store.get(' ana@example.COM ')['Email'] == 'Ana@Example.com'
+    assert store.add('ANA@example.com', 'pbkdf2:y', 'Student') is False
+    assert store.get('ben@example.com') is None
+
+def test_rehashes_are_written_in_one_batch(tmp_path):
+    path = tmp_path / 'accounts.csv'
+    write_accounts(path, [['ana@example.com', 'plain1', 'Student'], ['ben@example.com', 'plain2', 'Student'],
+                          ['cy@example.com', 'plain3', 'Student']])
+    store = AccountStore(str(path), rehash_batch_size=2, rehash_flush_interval=60)
+    store.schedule_rehash('ana@example.com', 'pbkdf2:a')
+    # The index sees the upgrade at once, the file only when the batch fills up
+    assert store.get('ana@example.com')['Password'] == 'pbkdf2:a'
+    assert read_passwords(path)[0] == ('ana@example.com', 'plain1')
+    store.schedule_rehash('BEN@example.com', 'pbkdf2:b')
+    assert read_passwords(path) == [('ana@example.com', 'pbkdf2:a'), ('ben@example.com', 'pbkdf2:b'),
+                                    ('cy@example.com', 'plain3')]
+
+def test_queued_rehash_survives_an_outside_edit(tmp_path):
+    path = tmp_path / 'accounts.csv'
+    write_accounts(path, [['ana@example.com', 'plain1', 'Student']])
+    store = AccountStore(str(path), rehash_batch_size=10, rehash_flush_interval=60)
+    store.schedule_rehash('ana@example.com', 'pbkdf2:a')
+    with open(path, 'a', newline='') as f:
+        csv.writer(f).writerow(['ben@example.com', 'plain2', 'Student'])
+    assert store.get('ana@example.com')['Password'] == 'pbkdf2:a'
+    assert store.get('ben@example.com') is not None
+    assert store.flush_rehashes() == 1
+
+def test_emails_differing_only_by_case_stay_apart(tmp_path):
+    path = tmp_path / 'accounts.csv'
+    write_accounts(path, [['Ana@example.com', 'plain1', 'Student'], ['ana@example.com', 'plain2', 'Instructor']])
+    store = AccountStore(str(path), rehash_batch_size=10, rehash_flush_interval=60)
+    assert store.get('ana@example.com')['Role'] == 'Instructor'
+    assert store.get('Ana@example.com')['Role'] == 'Student'
+    assert store.get('ANA@example.com') is None
+    store.schedule_rehash('ana@example.com', 'pbkdf2:b')
+    store.flush_rehashes()
+    assert read_passwords(path) == [('Ana@example.com', 'plain1'), ('ana@example.com', 'pbkdf2:b')]
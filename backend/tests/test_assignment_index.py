@@ -0,0 +1,60 @@
+import csv
+from utils.assignment_index import AssignmentIndex, file_signature
+
+PROGRESS_FIELDS = ['assignment_id', 'student_email', 'word_foreign', 'word_english',
+                   'count_seen', 'count_correct', 'count_incorrect', 'is_known', 'last_updated']
+
+def progress_row(assignment_id, email, foreign, seen, correct, incorrect, known):
+    return {'assignment_id': assignment_id, 'student_email': email, 'word_foreign': foreign, 'word_english': foreign,
+            'count_seen': str(seen), 'count_correct': str(correct), 'count_incorrect': str(incorrect),
+            'is_known': '1' if known else '0', 'last_updated': ''}
+
+def write_progress(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=PROGRESS_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def index_for(tmp_path):
+    words = tmp_path / 'words.csv'
+    words.write_text('assignment_id,foreign,english,word_order\n'
+                     'a1,gato,cat,2\na1,perro,dog,1\na2,sol,sun,1\n', encoding='utf-8')
+    return AssignmentIndex(str(words), str(tmp_path / 'progress.csv'))
+
+def test_words_are_grouped_per_assignment(tmp_path):
+    index = index_for(tmp_path)
+    assert index.word_counts() == {'a1': 2, 'a2': 1}
+    assert [word['foreign'] for word in index.assignment_words('a1')] == ['gato', 'perro']
+    assert index.word_count('missing') == 0
+
+def test_progress_groups_and_counters(tmp_path):
+    index = index_for(tmp_path)
+    write_progress(index.progress_csv, [progress_row('a1', 'ana@example.com', 'gato', 3, 2, 1, True),
+                                        progress_row('a1', 'ana@example.com', 'perro', 1, 0, 1, False),
+                                        progress_row('a1', 'ben@example.com', 'gato', 0, 0, 0, False)])
+    group = index.student_progress('a1', ' ana@example.com ')
+    assert (group['known_count'], group['in_progress_count'], group['total_correct'], group['total_incorrect']) == (1, 1, 2, 2)
+    assert index.student_progress('a1', 'ben@example.com')['in_progress_count'] == 0
+    assert index.student_progress('a2', 'ana@example.com') is None
+
+def test_study_path_patches_its_group(tmp_path):
+    index = index_for(tmp_path)
+    write_progress(index.progress_csv, [progress_row('a1', 'ana@example.com', 'gato', 1, 0, 1, False)])
+    index.assignment_progress('a1')
+    before = file_signature(index.progress_csv)
+    rows = [progress_row('a1', 'ana@example.com', 'gato', 2, 1, 1, True)]
+    write_progress(index.progress_csv, rows)
+    index.replace_student_progress('a1', 'ana@example.com', rows, before, file_signature(index.progress_csv))
+    assert index.student_progress('a1', 'ana@example.com')['known_count'] == 1
+
+def test_stale_index_reloads_instead_of_patching(tmp_path):
+    index = index_for(tmp_path)
+    write_progress(index.progress_csv, [progress_row('a1', 'ana@example.com', 'gato', 1, 0, 1, False)])
+    index.assignment_progress('a1')
+    # Someone else rewrote the file in between, so the patch must not be trusted
+    write_progress(index.progress_csv, [progress_row('a1', 'ana@example.com', 'gato', 1, 0, 1, False),
+                                        progress_row('a1', 'ben@example.com', 'gato', 5, 5, 0, True)])
+    stale = ('stale', 0)
+    index.replace_student_progress('a1', 'ana@example.com', [], stale, stale)
+    assert index.student_progress('a1', 'ben@example.com')['known_count'] == 1
+    assert index.student_progress('a1', 'ana@example.com')['in_progress_count'] == 1
@@ -0,0 +1,48 @@
+import os
+from utils.audio_cache import AudioCache, audio_key
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    return path
+
+def test_least_recently_used_files_are_evicted(audio_root):
+    cache = AudioCache(str(audio_root), max_bytes=25)
+    gato, perro, casa = (cache.path(word, 'spanish') for word in ('gato', 'perro', 'casa'))
+    cache.add(write(gato, 10))
+    cache.add(write(perro, 10))
+    assert cache.contains(gato)  # gato is now the most recently used
+    cache.add(write(casa, 10))
+    assert not os.path.exists(perro) and not cache.contains(perro, touch=False)
+    assert cache.contains(gato) and cache.contains(casa)
+    stats = cache.stats()
+    assert stats['files'] == 2 and stats['bytes'] == 20 and stats['evictions'] == 1
+
+def test_recency_survives_a_restart(audio_root):
+    cache = AudioCache(str(audio_root), max_bytes=100)
+    old, new = cache.path('gato', 'spanish'), cache.path('perro', 'spanish')
+    write(old, 10)
+    write(new, 10)
+    os.utime(old, (1000, 1000))
+    os.utime(new, (2000, 2000))
+    restarted = AudioCache(str(audio_root), max_bytes=15)
+    assert restarted.stats()['files'] == 1
+    assert os.path.exists(new) and not os.path.exists(old)
+
+def test_files_of_the_flat_layout_are_moved_on_first_scan(audio_root):
+    legacy = write(str(audio_root / 'spanish' / 'los.mp3'), 5)
+    cache = AudioCache(str(audio_root), max_bytes=100)
+    path = cache.path_for_name('spanish', 'los.mp3')
+    assert cache.contains(path) and not os.path.exists(legacy)
+    assert path == str(audio_root / 'spanish' / audio_key('los', 'spanish')[:2] / f"{audio_key('los', 'spanish')}.mp3")
+    assert cache.path_for_name('spanish', os.path.basename(path)) == path
+    assert cache.stats()['migrated'] == 1
+
+def test_files_removed_behind_its_back_are_misses(audio_root):
+    cache = AudioCache(str(audio_root), max_bytes=100)
+    path = write(cache.path('gato', 'spanish'), 10)
+    cache.add(path)
+    os.remove(path)
+    assert not cache.contains(path)
+    assert cache.stats()['bytes'] == 0
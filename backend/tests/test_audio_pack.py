@@ -0,0 +1,61 @@
+import os
+from utils import settings
+from utils.audio_cache import audio_key
+from utils.audio_pack import AudioPacks, pack_language, pack_paths, read_index
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def loose_path(root, word):
+    key = audio_key(word, 'spanish')
+    return os.path.join(str(root), 'spanish', key[:2], f"{key}.mp3")
+
+def test_packing_indexes_loose_files_and_removes_them(audio_root):
+    write(loose_path(audio_root, 'gato'), b'gato-audio')
+    write(str(audio_root / 'spanish' / 'los.mp3'), b'los')  # old flat layout
+    assert pack_language(str(audio_root), 'spanish') == {'packed': 2, 'already_packed': 0, 'bytes': 13}
+    assert os.listdir(audio_root / 'spanish') == []
+    data_path, index_path = pack_paths(str(audio_root), 'spanish')
+    entries = read_index(index_path, os.path.getsize(data_path))
+    with open(data_path, 'rb') as f:
+        data = f.read()
+    offset, length = entries[audio_key('gato', 'spanish')]
+    assert data[offset:offset + length] == b'gato-audio'
+    write(loose_path(audio_root, 'perro'), b'perro')
+    assert pack_language(str(audio_root), 'spanish')['packed'] == 1
+
+def test_an_interrupted_run_is_trimmed_before_appending(audio_root):
+    write(loose_path(audio_root, 'gato'), b'gato-audio')
+    pack_language(str(audio_root), 'spanish')
+    data_path, index_path = pack_paths(str(audio_root), 'spanish')
+    # Data written without its index line, then a partial index line
+    with open(data_path, 'ab') as f:
+        f.write(b'orphan')
+    with open(index_path, 'a', encoding='ascii') as f:
+        f.write('abc 10')
+    assert list(read_index(index_path, os.path.getsize(data_path))) == [audio_key('gato', 'spanish')]
+    write(loose_path(audio_root, 'perro'), b'perro')
+    pack_language(str(audio_root), 'spanish')
+    assert os.path.getsize(data_path) == len(b'gato-audio') + len(b'perro')
+    packs = AudioPacks(str(audio_root))
+    assert bytes(packs.get('spanish', audio_key('perro', 'spanish'))) == b'perro'
+
+def test_entries_past_the_end_of_the_data_are_skipped(tmp_path):
+    index_path = tmp_path / 'spanish.pack.idx'
+    index_path.write_text('aaa 0 4\nbbb 4 10\n', encoding='ascii')
+    assert read_index(str(index_path), 8) == {'aaa': (0, 4)}
+
+def test_a_miss_sees_audio_packed_since_the_last_check(audio_root, monkeypatch):
+    monkeypatch.setattr(settings, 'AUDIO_PACK_RELOAD_INTERVAL', 3600.0)
+    write(loose_path(audio_root, 'gato'), b'gato-audio')
+    pack_language(str(audio_root), 'spanish')
+    packs = AudioPacks(str(audio_root))
+    assert packs.contains('spanish', audio_key('gato', 'spanish'))
+    write(loose_path(audio_root, 'perro'), b'perro')
+    pack_language(str(audio_root), 'spanish')
+    # Within the reload interval, yet the loose file is already gone
+    assert bytes(packs.get('spanish', audio_key('perro', 'spanish'))) == b'perro'
+    assert packs.get('spanish', audio_key('casa', 'spanish')) is None
+    assert packs.stats()['reloads'] == 2
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from utils import settings
+from utils.audio_cache import audio_cache
+from utils.audio_prewarm import AudioPrewarmer, _words_digest
+
+WORDS = ['gato', 'perro', 'casa', 'mesa', 'silla']
+
+class FakeJob:
+    status = 'ready'
+
+    def wait(self, timeout=None):
+        return True
+
+class FakePool:
+    """Writes the audio at once instead of synthesizing it."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, word, lang, path, background=False):
+        assert background
+        self.submitted.append(word)
+        audio_cache.add(write_audio(path))
+        return FakeJob()
+
+def write_audio(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'mp3')
+    return path
+
+def test_a_run_generates_missing_audio_and_checkpoints(audio_root, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'AUDIO_PREWARM_CHECKPOINT_EVERY', 2)
+    write_audio(audio_cache.path('perro', 'spanish'))
+    pool = FakePool()
+    prewarmer = AudioPrewarmer(pool=pool, directory=str(tmp_path / 'AudioPrewarm'))
+    progress = []
+    run = prewarmer.run('template-Spanish', 'Spanish', WORDS, on_progress=lambda run: progress.append(run.position))
+    assert pool.submitted == ['gato', 'casa', 'mesa', 'silla']
+    assert run.counts == {'ready': 1, 'generated': 4, 'failed': 0, 'unsupported': 0}
+    # Positions only move past words whose jobs have settled
+    assert progress == sorted(progress) and progress[-1] == 5
+    saved = json.loads((tmp_path / 'AudioPrewarm' / 'template-Spanish.json').read_text())
+    assert saved['status'] == 'done' and saved['digest'] == _words_digest(WORDS)
+
+def test_an_interrupted_run_resumes_and_recounts_earlier_words(audio_root, tmp_path):
+    directory = tmp_path / 'AudioPrewarm'
+    directory.mkdir()
+    # Stopped after three words, with stale counters; casa never got its audio
+    (directory / 'template-Spanish.json').write_text(json.dumps({
+        'run_id': 'template-Spanish', 'status': 'running', 'position': 3, 'digest': _words_digest(WORDS),
+        'ready': 9, 'generated': 9, 'failed': 0, 'unsupported': 0}))
+    write_audio(audio_cache.path('gato', 'spanish'))
+    write_audio(audio_cache.path('perro', 'spanish'))
+    pool = FakePool()
+    run = AudioPrewarmer(pool=pool, directory=str(directory)).run('template-Spanish', 'Spanish', WORDS)
+    assert run.resumed and pool.submitted == ['mesa', 'silla']
+    assert run.counts == {'ready': 2, 'generated': 2, 'failed': 1, 'unsupported': 0}
+
+def test_a_changed_word_list_starts_over(audio_root, tmp_path):
+    directory = tmp_path / 'AudioPrewarm'
+    directory.mkdir()
+    (directory / 'template-Spanish.json').write_text(json.dumps({
+        'run_id': 'template-Spanish', 'status': 'running', 'position': 3, 'digest': _words_digest(WORDS[:3])}))
+    pool = FakePool()
+    run = AudioPrewarmer(pool=pool, directory=str(directory)).run('template-Spanish', 'Spanish', WORDS)
+    assert not run.resumed and pool.submitted == WORDS
+
+def test_session_runs_are_not_checkpointed(audio_root, tmp_path):
+    prewarmer = AudioPrewarmer(pool=FakePool(), directory=str(tmp_path / 'AudioPrewarm'))
+    run = prewarmer.start('session-ana_Spanish', 'Spanish', WORDS, checkpoint=False)
+    waited = threading.Event()
+    for _ in range(500):
+        if run.status == 'done':
+            break
+        waited.wait(0.01)
+    assert prewarmer.progress('session-ana_Spanish')['generated'] == 5
+    assert not (tmp_path / 'AudioPrewarm').exists()
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+import pytest
+from utils import class_matrix, deck_manifest
+
+HEADER = 'Foreign,English,seen,correct,wrong,known\n'
+
+def write_deck(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER + ''.join(f"{row}\n" for row in rows))
+
+def studied_word(foreign, seen, correct, incorrect, known=False):
+    return SimpleNamespace(foreign=foreign, count_seen=seen, count_correct=correct,
+                           count_incorrect=incorrect, is_known=known)
+
+@pytest.fixture
+def classroom(workdir, monkeypatch):
+    monkeypatch.setattr(class_matrix, '_matrices', {})
+    monkeypatch.setattr(class_matrix, '_writes', {})
+    write_deck('UserWords/Template_Spanish.csv', ['gato,cat,0,0,0,0', 'perro,dog,0,0,0,0', 'sol,sun,0,0,0,0'])
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['gato,cat,5,1,4,0', 'perro,dog,4,4,0,1', 'sol,sun,0,0,0,0'])
+    write_deck('UserWords/ben@example.com_Spanish.csv', ['gato,cat,4,1,3,0', 'perro,dog,2,1,1,0', 'sol,sun,1,1,0,0'])
+    return ['ana@example.com', 'ben@example.com']
+
+def test_hardest_words_and_clusters(classroom):
+    analytics = class_matrix.get_matrix('ABC123', 'Spanish', classroom).analyze(top_k=2, min_attempts=2)
+    assert [word['foreign'] for word in analytics['hardest_words']] == ['gato', 'perro']
+    assert analytics['hardest_words'][0]['class_accuracy'] == round(2 / 9 * 100, 2)
+    assert analytics['struggling_clusters'] == [{'words': ['gato'], 'students': classroom}]
+    assert [word['foreign'] for word in analytics['word_accuracy']] == ['gato', 'perro', 'sol']
+
+def test_writes_patch_cached_matrices(classroom):
+    matrix = class_matrix.get_matrix('ABC123', 'Spanish', classroom)
+    class_matrix.record_word('ana@example.com', 'Spanish', studied_word('sol', 3, 0, 3))
+    assert class_matrix.get_matrix('ABC123', 'Spanish', classroom) is matrix
+    assert matrix.incorrect[0, matrix.word_columns['sol']] == 3
+    # A word the matrix has no column for forces a rebuild
+    class_matrix.record_word('ana@example.com', 'Spanish', studied_word('luna', 1, 1, 0))
+    assert class_matrix.get_matrix('ABC123', 'Spanish', classroom) is not matrix
+
+def test_a_write_during_the_build_is_not_lost(classroom, monkeypatch):
+    build = class_matrix.ClassroomWordMatrix.__init__
+    builds = []
+    def racing_build(self, *args):
+        build(self, *args)
+        builds.append(self)
+        if len(builds) == 1:
+            # The student answers after their deck was read but before the matrix is cached
+            write_deck('UserWords/ana@example.com_Spanish.csv', ['gato,cat,6,2,4,0', 'perro,dog,4,4,0,1', 'sol,sun,0,0,0,0'])
+            class_matrix.record_word('ana@example.com', 'Spanish', studied_word('gato', 6, 2, 4))
+    monkeypatch.setattr(class_matrix.ClassroomWordMatrix, '__init__', racing_build)
+    matrix = class_matrix.get_matrix('ABC123', 'Spanish', classroom)
+    assert len(builds) == 2 and not matrix.stale
+    assert matrix.correct[0, matrix.word_columns['gato']] == 2
+
+def test_replaced_decks_mark_matrices_stale(classroom):
+    matrix = class_matrix.get_matrix('ABC123', 'Spanish', classroom)
+    deck_manifest.reset_user_decks('ana@example.com', ['Spanish'])
+    assert matrix.stale
+    rebuilt = class_matrix.get_matrix('ABC123', 'Spanish', classroom)
+    assert rebuilt.seen[0].sum() == 0
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['gato,cat,1,1,0,0'])
+    deck_manifest.ensure_user_deck('ana@example.com', 'Spanish')
+    write_deck('UserWords/ana@example.com_Spanish.csv', [])
+    deck_manifest.ensure_user_deck('ana@example.com', 'Spanish')
+    assert rebuilt.stale
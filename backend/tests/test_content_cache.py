@@ -0,0 +1,45 @@
+from utils.content_cache import ContentCache, make_key
+
+def test_key_ignores_word_order_and_topic_spacing():
+    assert make_key('short-story', 'Spanish', ['b', 'a'], ' The  Market', 1) == \
+        make_key('short-story', 'Spanish', ['a', 'b'], 'the market', 1)
+    assert make_key('short-story', 'Spanish', ['a'], '', 1) != make_key('short-story', 'Spanish', ['a'], '', 2)
+
+def test_entries_expire(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('utils.content_cache.time.time', lambda: now[0])
+    cache = ContentCache(str(tmp_path), ttl=10)
+    cache.put('k', 'story')
+    assert cache.get('k') == 'story'
+    now[0] += 11
+    assert cache.get('k') is None
+    # Expired on disk too, so a fresh process does not serve it
+    assert ContentCache(str(tmp_path), ttl=10).get('k') is None
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    ContentCache(str(tmp_path)).put('k', {'text': 'hola'})
+    cache = ContentCache(str(tmp_path))
+    assert cache.get('k') == {'text': 'hola'}
+    assert cache.stats()['disk_hits'] == 1
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = ContentCache(str(tmp_path), memory_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.stats()['memory_evictions'] == 1
+    assert cache.get('b') == 2
+    assert cache.stats()['disk_hits'] == 1
+
+def test_disk_tier_evicts_least_recently_used(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('utils.content_cache.time.time', lambda: now[0])
+    cache = ContentCache(str(tmp_path), memory_entries=1, disk_bytes=100)
+    for key in ('a', 'b', 'c'):
+        now[0] += 1
+        cache.put(key, 'x' * 20)
+    stats = cache.stats()
+    assert stats['disk_bytes'] <= 100 and stats['disk_evictions'] >= 1
+    assert cache.get('a') is None
+    assert cache.get('c') == 'x' * 20
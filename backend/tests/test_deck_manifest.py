@@ -0,0 +1,42 @@
+import os
+from utils import deck_manifest, student_summary
+
+HEADER = 'Foreign,English,seen,correct,wrong,known\n'
+
+def write_deck(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER + ''.join(f"{row}\n" for row in rows))
+
+def test_first_use_copies_the_template(workdir):
+    write_deck('UserWords/Template_Spanish.csv', ['que,that,0,0,0,0', 'no,no,0,0,0,0'])
+    assert deck_manifest.ensure_user_deck('ana@example.com', 'Spanish')
+    assert os.path.exists('UserWords/ana@example.com_Spanish.csv')
+    assert deck_manifest._load_manifest('ana@example.com')['decks']['Spanish']['source'] == 'template'
+    # Languages never studied stay unmaterialized
+    assert not os.path.exists('UserWords/ana@example.com_French.csv')
+
+def test_existing_deck_is_kept(workdir):
+    write_deck('UserWords/Template_Spanish.csv', ['que,that,0,0,0,0'])
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,4,3,1,1'])
+    assert deck_manifest.ensure_user_deck('ana@example.com', 'Spanish')
+    assert student_summary.compute_language_totals('ana@example.com', 'Spanish')['seen'] == 4
+
+def test_emptied_deck_is_recopied_and_summary_follows(workdir):
+    write_deck('UserWords/Template_Spanish.csv', ['que,that,0,0,0,0', 'no,no,0,0,0,0'])
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,4,3,1,1'])
+    deck_manifest.ensure_user_deck('ana@example.com', 'Spanish')
+    assert student_summary.get_summary('ana@example.com')['total_known'] == 1
+    write_deck('UserWords/ana@example.com_Spanish.csv', [])
+    assert deck_manifest.ensure_user_deck('ana@example.com', 'Spanish')
+    assert student_summary.get_summary('ana@example.com')['total_known'] == 0
+
+def test_no_template(workdir):
+    assert not deck_manifest.ensure_user_deck('ana@example.com', 'Spanish')
+
+def test_reset_removes_decks(workdir):
+    write_deck('UserWords/Template_Spanish.csv', ['que,that,0,0,0,0'])
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,4,3,1,1'])
+    deck_manifest.ensure_user_deck('ana@example.com', 'Spanish')
+    deck_manifest.reset_user_decks('ana@example.com', ['Spanish'])
+    assert not os.path.exists('UserWords/ana@example.com_Spanish.csv')
+    assert student_summary.get_summary('ana@example.com')['total_seen'] == 0
@@ -0,0 +1,64 @@
+import os
+import time
+from utils.event_log import CORRECT, INCORRECT, KNOWN, EventLog, RollupStore
+
+def stores(tmp_path):
+    segments = str(tmp_path / 'segments')
+    return EventLog(segments), segments, str(tmp_path / 'rollups.json')
+
+def test_rollup_resumes_from_its_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    events, segments, rollups_file = stores(tmp_path)
+    events.append('ana@example.com', 'Spanish', 3, [CORRECT, KNOWN])
+    events.append('ana@example.com', 'Spanish', 4, [INCORRECT])
+    rollups = RollupStore(segments, rollups_file)
+    assert rollups.rollup() == 3
+    assert rollups.rollup() == 0
+
+    events.append('ana@example.com', 'Spanish', 5, [CORRECT])
+    events.close()
+    # A new store reads the checkpoint back and only folds in the new event
+    reopened = RollupStore(segments, rollups_file)
+    assert reopened.rollup() == 1
+    totals = reopened.user_activity('ana@example.com', days=1)['totals']
+    assert totals == {'answers': 3, 'correct': 2, 'incorrect': 1, 'known': 1}
+
+def test_rollup_waits_for_a_partial_record(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    events, segments, rollups_file = stores(tmp_path)
+    events.append('ana@example.com', 'Spanish', 1, [CORRECT])
+    events.close()
+    segment = os.path.join(segments, os.listdir(segments)[0])
+    with open(segment, 'a', encoding='utf-8') as f:
+        f.write(f"{int(time.time())},ana@example.com,Span")
+    rollups = RollupStore(segments, rollups_file)
+    assert rollups.rollup() == 1
+    with open(segment, 'a', encoding='utf-8') as f:
+        f.write("ish,2,c\n")
+    assert rollups.rollup() == 1
+    assert rollups.user_activity('ana@example.com', days=1)['totals']['correct'] == 2
+
+def test_classroom_rollups(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'ClassroomMembers.csv').write_text(
+        'classroom_code,student_email\nabc123,ana@example.com\nabc123,ben@example.com\n', encoding='utf-8')
+    events, segments, rollups_file = stores(tmp_path)
+    events.append('ana@example.com', 'Spanish', 1, [CORRECT])
+    events.append('ana@example.com', 'Spanish', 2, [INCORRECT])
+    events.append('ben@example.com', 'Spanish', 1, [CORRECT])
+    events.close()
+    rollups = RollupStore(segments, rollups_file)
+    rollups.rollup()
+    totals = rollups.classroom_activity('ABC123', days=1)['totals']
+    assert totals['answers'] == 3 and totals['active_students'] == 2
+
+def test_cli_rolls_up_before_printing(tmp_path, monkeypatch, capsys):
+    from utils import event_log
+    monkeypatch.chdir(tmp_path)
+    events, segments, rollups_file = stores(tmp_path)
+    events.append('ana@example.com', 'Spanish', 1, [CORRECT])
+    events.close()
+    monkeypatch.setattr(event_log, 'rollups', RollupStore(segments, rollups_file))
+    event_log.main(['--user', 'ana@example.com', '--days', '1'])
+    output = capsys.readouterr().out
+    assert output.startswith('Rolled up 1 events') and '"correct": 1' in output
@@ -0,0 +1,18 @@
+from utils.fill_in_blank import parse_batch_reply
+
+def test_parse_batch_reply():
+    reply = '\n'.join([
+        'Here are your sentences:',
+        '1. Todos los días como una manzana.',
+        '2) Mi hermano tiene un perro grande!',
+        '2. Ayer vi otro perro en el parque.',
+        '3. Gato es un animal.',
+        '7. Fuera de rango con casa.',
+    ])
+    assert parse_batch_reply(reply, ['manzana', 'perro', 'gato']) == {
+        'manzana': 'Todos los días como una manzana',
+        'perro': 'Mi hermano tiene un perro grande',
+    }
+
+def test_parse_batch_reply_without_numbered_lines():
+    assert parse_batch_reply('No puedo hacerlo.', ['casa']) == {}
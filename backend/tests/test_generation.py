@@ -0,0 +1,48 @@
+import time
+import pytest
+from utils.generation import GenerationClient, GenerationError
+from utils.generation_providers import LocalProvider, ProviderError
+
+def client_for(provider, attempt_timeout=2.0, hedge_delay=0.05):
+    return GenerationClient(provider, models=['first', 'second'], attempt_timeout=attempt_timeout,
+                            hedge_delay=hedge_delay, workers=4)
+
+def answer_with_model(model, prompt):
+    return f"answer from {model}"
+
+def test_failed_model_falls_back_at_once():
+    provider = LocalProvider(latency=0.0, failures={'first': ProviderError('down')}, respond=answer_with_model)
+    client = client_for(provider, hedge_delay=5.0)
+    started = time.monotonic()
+    assert client.generate('prompt') == 'answer from second'
+    assert time.monotonic() - started < 1.0 and provider.calls == ['first', 'second']
+
+def test_slow_model_is_hedged():
+    provider = LocalProvider(latency={'first': 1.0, 'second': 0.0}, respond=answer_with_model)
+    client = client_for(provider)
+    started = time.monotonic()
+    assert client.generate('prompt') == 'answer from second'
+    assert time.monotonic() - started < 0.8
+
+def test_fast_model_is_not_hedged():
+    provider = LocalProvider(latency=0.0, respond=answer_with_model)
+    assert client_for(provider, hedge_delay=1.0).generate('prompt') == 'answer from first'
+    assert provider.calls == ['first']
+
+def test_every_attempt_timing_out_raises():
+    provider = LocalProvider(latency=0.5, respond=answer_with_model)
+    with pytest.raises(GenerationError, match='timed out'):
+        client_for(provider, attempt_timeout=0.1, hedge_delay=5.0).generate('prompt')
+
+def test_empty_answers_count_as_failures():
+    provider = LocalProvider(respond=lambda model, prompt: '' if model == 'first' else 'ok')
+    assert client_for(provider, hedge_delay=5.0).generate('prompt') == 'ok'
+
+def test_stream_follows_the_first_model_to_produce_text():
+    provider = LocalProvider(latency={'first': 1.0, 'second': 0.0}, respond=lambda model, prompt: f"{model} una vez")
+    client = client_for(provider)
+    assert ''.join(client.stream('prompt')) == 'second una vez'
+
+def test_stream_falls_back_when_a_model_fails():
+    provider = LocalProvider(failures={'first': ProviderError('down')}, respond=lambda model, prompt: f"{model} dos")
+    assert ''.join(client_for(provider, hedge_delay=5.0).stream('prompt')) == 'second dos'
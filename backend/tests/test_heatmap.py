@@ -0,0 +1,52 @@
+import threading
+import pytest
+from utils import heatmap
+
+WORDS = [{'foreign': 'gato', 'english': 'cat'}, {'foreign': 'perro', 'english': 'dog'}]
+PROGRESS = {
+    'ana@example.com': {'words': {
+        'gato|cat': {'count_seen': 3, 'count_correct': 3, 'count_incorrect': 1, 'is_known': True},
+        'perro|dog': {'count_seen': 1, 'count_correct': 0, 'count_incorrect': 1, 'is_known': False}}},
+}
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(heatmap, '_cache', heatmap.OrderedDict())
+    monkeypatch.setattr(heatmap, '_in_flight', {})
+
+def test_cells():
+    students = ['ana@example.com', 'ben@example.com']
+    assert heatmap.build_cells(students, WORDS, PROGRESS, 'status') == [[2, 1], [0, 0]]
+    assert heatmap.build_cells(students, WORDS, PROGRESS, 'accuracy') == [[75.0, 0.0], [None, None]]
+
+def test_render_png():
+    for metric in heatmap.METRICS:
+        cells = heatmap.build_cells(['ana@example.com'], WORDS, PROGRESS, metric)
+        png = heatmap.render_png('Week 1', ['ana@example.com'], ['gato', 'perro'], cells, metric)
+        assert png.startswith(b'\x89PNG')
+
+def test_concurrent_requests_share_one_render_and_later_ones_hit_the_cache(monkeypatch):
+    release = threading.Event()
+    renders = []
+    def slow_render(*args):
+        renders.append(args)
+        release.wait(5)
+        return b'png'
+    monkeypatch.setattr(heatmap, 'render_png', slow_render)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        heatmap.get_heatmap(('a1', 'status', 1), 'Week 1', ['ana@example.com'], WORDS, PROGRESS, 'status')))
+        for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while not renders:
+        release.wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [b'png'] * 3 and len(renders) == 1
+    assert heatmap.get_heatmap(('a1', 'status', 1), 'Week 1', [], [], {}, 'status') == b'png'
+    assert len(renders) == 1
+    # New data gets a new version in its key and renders again
+    heatmap.get_heatmap(('a1', 'status', 2), 'Week 1', ['ana@example.com'], WORDS, PROGRESS, 'status')
+    assert len(renders) == 2
@@ -0,0 +1,49 @@
+from utils import leaderboard_index
+from utils.leaderboard_index import ClassroomLeaderboard
+
+def stats(known, accuracy):
+    return {'total_known': known, 'total_correct': 0, 'total_incorrect': 0, 'total_seen': 0, 'accuracy': accuracy}
+
+def test_ranks_follow_known_then_accuracy_then_email():
+    board = ClassroomLeaderboard('ABC123')
+    board.update('cy@example.com', stats(5, 50.0))
+    board.update('ana@example.com', stats(5, 80.0))
+    board.update('ben@example.com', stats(9, 10.0))
+    board.update('dee@example.com', stats(5, 50.0))
+    assert [entry['student_email'] for entry in board.page()] == \
+        ['ben@example.com', 'ana@example.com', 'cy@example.com', 'dee@example.com']
+    assert board.rank('cy@example.com') == 3
+    assert board.rank('nobody@example.com') is None
+
+def test_update_moves_a_student():
+    board = ClassroomLeaderboard('ABC123')
+    board.update('ana@example.com', stats(1, 0.0))
+    board.update('ben@example.com', stats(2, 0.0))
+    board.update('ana@example.com', stats(3, 0.0))
+    assert board.rank('ana@example.com') == 1 and len(board) == 2
+
+def test_pages_carry_their_ranks():
+    board = ClassroomLeaderboard('ABC123')
+    for known in range(5):
+        board.update(f"s{known}@example.com", stats(known, 0.0))
+    page = board.page(offset=1, limit=2)
+    assert [(entry['student_email'], entry['rank']) for entry in page] == [('s3@example.com', 2), ('s2@example.com', 3)]
+    assert board.page(offset=4, limit=10)[0]['rank'] == 5
+
+def test_membership_changes_and_summary_updates(monkeypatch):
+    monkeypatch.setattr(leaderboard_index, '_boards', {})
+    monkeypatch.setattr(leaderboard_index, '_student_classrooms', {})
+    looked_up = []
+    def stats_for_student(email):
+        looked_up.append(email)
+        return stats(1, 0.0)
+    board = leaderboard_index.get_leaderboard('ABC123', ['ana@example.com', 'ben@example.com'], stats_for_student)
+    assert len(board) == 2
+    board = leaderboard_index.get_leaderboard('ABC123', ['ben@example.com', 'cy@example.com'], stats_for_student)
+    # Only the student who joined is looked up again, the one who left is dropped
+    assert sorted(looked_up) == ['ana@example.com', 'ben@example.com', 'cy@example.com']
+    assert 'ana@example.com' not in board
+    leaderboard_index._on_summary_changed('cy@example.com', {'total_known': 7, 'total_correct': 3,
+                                                             'total_incorrect': 1, 'total_seen': 4})
+    assert board.rank('cy@example.com') == 1
+    assert board.page(limit=1)[0]['accuracy'] == 75.0
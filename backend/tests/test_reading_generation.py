@@ -0,0 +1,36 @@
+from api import reading
+from utils import settings
+from utils.generation import get_generation_client
+
+def start_session(client, email):
+    response = client.post('/api/study/init', json={'username': email, 'language': 'Spanish'})
+    assert response.status_code == 200
+    return response.json['session_id']
+
+def test_short_story_is_generated_once_then_cached(client, monkeypatch):
+    # Stories use a random sample of the window, take the same words both times
+    monkeypatch.setattr(reading.random, 'sample', lambda words, count: words[:count])
+    session_id = start_session(client, 'reader_one@example.com')
+    calls = get_generation_client().provider.calls
+    first = client.post('/api/reading/short-story', json={'session_id': session_id})
+    assert first.status_code == 200 and first.json['text']
+    made = len(calls)
+    second = client.post('/api/reading/short-story', json={'session_id': session_id})
+    assert second.json['text'] == first.json['text']
+    assert len(calls) == made
+
+def test_fill_in_the_blank(client):
+    session_id = start_session(client, 'reader_two@example.com')
+    response = client.post('/api/reading/fill-in-the-blank', json={'session_id': session_id})
+    assert response.status_code == 200 and response.json['sentence']
+    assert response.json['target_word'] in response.json['choices']
+
+def test_out_of_quota_is_rejected_before_the_model_call(client, monkeypatch):
+    session_id = start_session(client, 'reader_three@example.com')
+    monkeypatch.setattr(settings, 'USAGE_USER_DAILY_CALLS', 1)
+    client.post('/api/reading/topical-passage', json={'session_id': session_id, 'topic': 'el mercado'})
+    calls = get_generation_client().provider.calls
+    made = len(calls)
+    response = client.post('/api/reading/topical-passage', json={'session_id': session_id, 'topic': 'la playa'})
+    assert response.status_code == 429 and 'Retry-After' in response.headers
+    assert len(calls) == made
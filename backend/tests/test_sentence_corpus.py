@@ -0,0 +1,48 @@
+import json
+from utils.sentence_corpus import SentenceCorpus
+
+def test_sentences_are_served_once_per_student(tmp_path):
+    corpus = SentenceCorpus(str(tmp_path), max_per_word=5)
+    corpus.keep('Spanish', 'Gato', 'Veo un gato.', user='ana@example.com')
+    corpus.keep('Spanish', 'gato', 'El gato duerme.')
+    corpus.keep('Spanish', 'gato', 'El gato duerme.')  # stored once
+    assert corpus.take('Spanish', ' GATO ', 'ana@example.com') == 'El gato duerme.'
+    assert corpus.take('Spanish', 'gato', 'ana@example.com') is None
+    assert corpus.take('Spanish', 'gato', 'luis@example.com') == 'Veo un gato.'
+    assert corpus.stats() == {'hits': 2, 'misses': 1, 'stored': 2, 'sentences': 2, 'words': 1}
+
+def test_lookups_read_the_line_at_the_indexed_offset(tmp_path):
+    corpus = SentenceCorpus(str(tmp_path), max_per_word=5)
+    for sentence in ('Mañana veo el árbol.', 'El árbol es alto.', 'Hay un árbol aquí.'):
+        corpus.keep('Spanish', 'árbol', sentence)
+    index = corpus._languages['Spanish']
+    with open(index.path, 'rb') as f:
+        data = f.read()
+    for sentence_id, offset in index.offsets.items():
+        line = data[offset:data.index(b'\n', offset)]
+        assert json.loads(line)['id'] == sentence_id
+    assert index.read(2) == 'Hay un árbol aquí.'
+
+def test_a_new_corpus_rebuilds_the_index_and_seen_sentences(tmp_path):
+    corpus = SentenceCorpus(str(tmp_path), max_per_word=2)
+    corpus.keep('Spanish', 'perro', 'El perro corre.', user='ana@example.com')
+    corpus.keep('Spanish', 'perro', 'Tengo un perro.')
+    corpus.keep('Spanish', 'perro', 'Mi perro come.')  # over max_per_word, not stored
+    restarted = SentenceCorpus(str(tmp_path), max_per_word=2)
+    assert restarted.take('Spanish', 'perro', 'ana@example.com') == 'Tengo un perro.'
+    assert restarted.take('Spanish', 'perro', 'ana@example.com') is None
+    restarted.keep('Spanish', 'gato', 'Veo un gato.')
+    assert restarted._languages['Spanish'].sentences[('gato', 'Veo un gato.')] == 2
+
+def test_a_partial_last_line_is_dropped_on_load(tmp_path):
+    corpus = SentenceCorpus(str(tmp_path), max_per_word=5)
+    corpus.keep('Spanish', 'casa', 'Mi casa es grande.')
+    path = corpus._languages['Spanish'].path
+    size = (tmp_path / 'Spanish.jsonl').stat().st_size
+    with open(path, 'ab') as f:
+        f.write(b'{"id": 1, "word": "casa", "sen')
+    restarted = SentenceCorpus(str(tmp_path), max_per_word=5)
+    restarted.keep('Spanish', 'casa', 'La casa es azul.')
+    assert restarted.take('Spanish', 'casa', 'ana@example.com') == 'Mi casa es grande.'
+    assert restarted.take('Spanish', 'casa', 'ana@example.com') == 'La casa es azul.'
+    assert restarted._languages['Spanish'].offsets[1] == size
@@ -0,0 +1,66 @@
+import itertools
+import pytest
+from utils import settings
+from utils.fill_in_blank import SentencePool
+from utils.usage_ledger import BACKGROUND_USER, QuotaExceeded, UsageLedger
+
+def recording_generate(calls):
+    numbers = itertools.count(1)
+    def generate(language, foreign):
+        calls.append(foreign)
+        return f"Todos los días veo {foreign} en la calle {next(numbers)}."
+    return generate
+
+def drain(pool):
+    # stop() drops queued generations, let them finish first
+    pool._executor.shutdown(wait=True)
+    pool.stop()
+
+def test_refills_fill_each_word_up_to_the_pool_size():
+    calls = []
+    pool = SentencePool(recording_generate(calls), lambda: [('Spanish', 'gato'), ('Spanish', 'perro')],
+                        pool_size=2, workers=2)
+    pool.scan()
+    drain(pool)
+    assert sorted(calls) == ['gato', 'gato', 'perro', 'perro']
+    assert pool.stats()['ready_sentences'] == 4 and pool.stats()['in_flight'] == 0
+    assert pool.pop('Spanish', 'gato').startswith('Todos los días veo gato')
+
+def test_words_no_longer_studied_are_dropped():
+    active = [('Spanish', 'gato')]
+    pool = SentencePool(recording_generate([]), lambda: list(active), pool_size=1, workers=1)
+    pool.scan()
+    drain(pool)
+    active.clear()
+    pool.scan()
+    assert pool.pop('Spanish', 'gato') is None
+
+def test_refills_hold_while_the_check_fails():
+    calls = []
+    allowed = [False]
+    def check():
+        if not allowed[0]:
+            raise QuotaExceeded('quota used up', 60)
+    pool = SentencePool(recording_generate(calls), lambda: [('Spanish', 'gato')], check=check,
+                        pool_size=2, workers=1)
+    pool.scan()
+    pool.scan()
+    assert calls == [] and pool.stats()['in_flight'] == 0
+    allowed[0] = True
+    pool.scan()
+    drain(pool)
+    assert calls == ['gato', 'gato'] and pool.stats()['ready_sentences'] == 2
+
+def test_background_generation_has_its_own_quota(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, 'USAGE_BACKGROUND_DAILY_CALLS', 2)
+    monkeypatch.setattr(settings, 'USAGE_USER_DAILY_CALLS', 1)
+    ledger = UsageLedger(str(tmp_path / 'UsageLedger'), str(tmp_path / 'UsageLedger' / 'quotas.json'))
+    ledger.record(BACKGROUND_USER, 'prompt', 'reply', 0.1)
+    ledger.check(BACKGROUND_USER)
+    ledger.record(BACKGROUND_USER, 'prompt', 'reply', 0.1)
+    with pytest.raises(QuotaExceeded):
+        ledger.check(BACKGROUND_USER)
+    # Students are not charged for background work
+    ledger.check('ana@example.com')
+    ledger.stop()
@@ -0,0 +1,73 @@
+import threading
+import time
+import pytest
+from utils.single_flight import Coalescer, GenerationBusy
+
+def in_threads(count, target):
+    results = [None] * count
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def test_concurrent_calls_share_one_result():
+    coalescer = Coalescer(max_concurrent=4, max_per_user=4, queue_timeout=1)
+    release = threading.Event()
+    calls = []
+    def generate():
+        calls.append(1)
+        release.wait(2)
+        return 'story'
+    threads, results = in_threads(5, lambda: coalescer.do('key', 'ana', generate))
+    while coalescer.stats()['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ['story'] * 5 and len(calls) == 1
+
+def test_errors_reach_every_caller():
+    coalescer = Coalescer(max_concurrent=4, max_per_user=4, queue_timeout=1)
+    release = threading.Event()
+    def generate():
+        release.wait(2)
+        raise RuntimeError('model down')
+    threads, results = in_threads(3, lambda: coalescer.do('key', 'ana', generate))
+    while coalescer.stats()['coalesced'] < 2:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_per_user_cap_rejects_after_the_queue_timeout():
+    coalescer = Coalescer(max_concurrent=4, max_per_user=1, queue_timeout=0.1)
+    release = threading.Event()
+    threads, _ = in_threads(1, lambda: coalescer.do('first', 'ana', lambda: release.wait(2)))
+    while coalescer.stats()['active'] < 1:
+        time.sleep(0.01)
+    with pytest.raises(GenerationBusy):
+        coalescer.do('second', 'ana', lambda: 'never')
+    assert coalescer.do('third', 'ben', lambda: 'ok') == 'ok'
+    release.set()
+    threads[0].join()
+    assert coalescer.stats()['rejected'] == 1
+
+def test_late_stream_joiners_replay_earlier_chunks():
+    coalescer = Coalescer(max_concurrent=4, max_per_user=4, queue_timeout=1)
+    release = threading.Event()
+    def produce():
+        yield 'Había '
+        release.wait(2)
+        yield 'una vez'
+    first = coalescer.stream('key', 'ana', produce)
+    assert next(first) == 'Había '
+    second = coalescer.stream('key', 'ben', produce)
+    release.set()
+    assert ''.join(second) == 'Había una vez'
+    assert ''.join(first) == 'una vez'
@@ -0,0 +1,62 @@
+import threading
+from utils import settings
+from utils import student_summary
+
+HEADER = 'Foreign,English,seen,correct,wrong,known\n'
+
+def write_deck(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER + ''.join(f"{row}\n" for row in rows))
+
+def test_rebuild_sums_every_language(workdir):
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,4,3,1,1', 'no,no,2,0,2,0'])
+    write_deck('UserWords/ana@example.com_French.csv', ['oui,yes,1,1,0,0'])
+    summary = student_summary.rebuild_summary('ana@example.com')
+    assert (summary['total_seen'], summary['total_correct'], summary['total_incorrect'], summary['total_known']) == (7, 4, 3, 1)
+    assert summary['languages']['French']['seen'] == 1
+
+def test_deltas_match_a_rebuild(workdir, monkeypatch):
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,4,3,1,0'])
+    student_summary.get_summary('ana@example.com')
+    changes = []
+    monkeypatch.setattr(student_summary, '_listeners', [lambda email, summary: changes.append(email)])
+    student_summary.apply_word_delta('ana@example.com', 'Spanish', (4, 3, 1, False), (5, 4, 1, True))
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,5,4,1,1'])
+    assert student_summary.get_summary('ana@example.com')['languages']['Spanish'] == \
+        student_summary.compute_language_totals('ana@example.com', 'Spanish')
+    assert changes == ['ana@example.com']
+
+def test_unchanged_word_writes_nothing(workdir):
+    student_summary.apply_word_delta('ana@example.com', 'Spanish', (1, 1, 0, False), (1, 1, 0, False))
+    assert not (workdir / 'StudentSummaries').exists()
+
+def test_summary_survives_a_restart(workdir, monkeypatch):
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,4,3,1,1'])
+    student_summary.get_summary('ana@example.com')
+    monkeypatch.setattr(student_summary, '_summaries', {})
+    # Read back from StudentSummaries/, not recomputed from the deck
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,9,9,0,1'])
+    assert student_summary.get_summary('ana@example.com')['total_seen'] == 4
+
+def test_iter_summaries_streams_materialized_first_and_stops_at_the_deadline(workdir, monkeypatch):
+    write_deck('UserWords/ana@example.com_Spanish.csv', ['que,that,4,3,1,1'])
+    student_summary.get_summary('ana@example.com')
+    release = threading.Event()
+    compute = student_summary.compute_student_languages
+    def slow_compute(email):
+        if email == 'slow@example.com':
+            release.wait(5)
+        return compute(email)
+    monkeypatch.setattr(student_summary, 'compute_student_languages', slow_compute)
+    monkeypatch.setattr(student_summary, '_executor', None)
+    monkeypatch.setattr(settings, 'DASHBOARD_POOL', 'thread')
+
+    results = list(student_summary.iter_summaries(['ana@example.com', 'ben@example.com', 'slow@example.com'],
+                                                  deadline=0.2))
+    assert results[0][0] == 'ana@example.com'
+    assert dict(results)['ben@example.com']['total_seen'] == 0
+    assert dict(results)['slow@example.com'] is None
+    # The late rebuild still finishes and is stored
+    release.set()
+    student_summary._executor.shutdown(wait=True)
+    assert 'slow@example.com' in student_summary._summaries
@@ -0,0 +1,19 @@
+from utils import student_summary
+
+def start_session(client, email, language):
+    response = client.post('/api/study/init', json={'username': email, 'language': language})
+    assert response.status_code == 200
+    return response.json['session_id']
+
+def test_answers_are_charged_to_the_full_email_and_the_session_language(client):
+    session_id = start_session(client, 'first_last@example.com', 'Spanish')
+    # Another student starting a French session must not move this one's answers to French
+    start_session(client, 'someone@example.com', 'French')
+    word = client.post('/api/study/get-current-words', json={'session_id': session_id}).json['words'][0]
+    response = client.post('/api/study/check-answer', json={'session_id': session_id, 'flashword': word,
+                                                            'answer': word['english']})
+    assert response.status_code == 200
+    summary = student_summary.get_summary('first_last@example.com')
+    assert summary['languages']['Spanish']['seen'] == 1
+    assert summary['languages']['French']['seen'] == 0
+    assert student_summary._load_summary('first') is None
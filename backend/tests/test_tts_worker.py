@@ -0,0 +1,89 @@
+import os
+import threading
+import pytest
+from utils import tts_worker
+from utils.tts_worker import TTSBusy, TTSWorkerPool
+
+class BlockingSynthesize:
+    """Records synthesized words and holds each one until released."""
+
+    def __init__(self):
+        self.started = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, word, lang, path):
+        with self._lock:
+            self.started.append(word)
+        self.release.wait(5)
+        if word == 'roto':
+            raise RuntimeError('no voice')
+        with open(path, 'wb') as f:
+            f.write(b'mp3')
+
+@pytest.fixture(autouse=True)
+def files_only(monkeypatch):
+    # Keep the shared audio cache away from the real audio directory
+    monkeypatch.setattr(tts_worker.audio_cache, 'contains', lambda path, touch=True: os.path.exists(path))
+
+def wait_until(condition):
+    event = threading.Event()
+    for _ in range(500):
+        if condition():
+            return
+        event.wait(0.01)
+    raise AssertionError('condition not reached')
+
+def test_requests_for_one_word_share_a_job(tmp_path):
+    synthesize = BlockingSynthesize()
+    pool = TTSWorkerPool(workers=4, max_per_language=4, max_pending=10, synthesize=synthesize)
+    path = str(tmp_path / 'gato.mp3')
+    jobs = [pool.submit('gato', 'es', path) for _ in range(3)]
+    assert jobs[0] is jobs[1] is jobs[2]
+    wait_until(lambda: synthesize.started)
+    assert pool.status('gato', 'es', path) == ('running', None)
+    synthesize.release.set()
+    assert jobs[0].wait(5) and jobs[0].status == 'ready'
+    assert synthesize.started == ['gato']
+    assert pool.status('gato', 'es', path) == ('ready', None)
+    stats = pool.stats()
+    assert stats['submitted'] == 1 and stats['joined'] == 2 and stats['pending'] == 0
+
+def test_a_busy_language_does_not_hold_back_another(tmp_path):
+    synthesize = BlockingSynthesize()
+    pool = TTSWorkerPool(workers=4, max_per_language=1, max_pending=10, synthesize=synthesize)
+    first = pool.submit('gato', 'es', str(tmp_path / 'gato.mp3'))
+    second = pool.submit('perro', 'es', str(tmp_path / 'perro.mp3'))
+    french = pool.submit('chat', 'fr', str(tmp_path / 'chat.mp3'))
+    wait_until(lambda: len(synthesize.started) == 2)
+    assert sorted(synthesize.started) == ['chat', 'gato']
+    assert second.status == 'pending' and pool.stats()['running'] == {'es': 1, 'fr': 1}
+    synthesize.release.set()
+    assert first.wait(5) and second.wait(5) and french.wait(5)
+    assert synthesize.started[-1] == 'perro'
+
+def test_interactive_jobs_start_before_background_ones(tmp_path):
+    synthesize = BlockingSynthesize()
+    pool = TTSWorkerPool(workers=2, max_per_language=1, max_pending=10, synthesize=synthesize)
+    pool.submit('gato', 'es', str(tmp_path / 'gato.mp3'))
+    wait_until(lambda: synthesize.started)
+    background = pool.submit('perro', 'es', str(tmp_path / 'perro.mp3'), background=True)
+    waiting = pool.submit('casa', 'es', str(tmp_path / 'casa.mp3'), background=True)
+    pool.submit('mesa', 'es', str(tmp_path / 'mesa.mp3'))
+    # A request for a background word promotes it behind the interactive queue
+    assert pool.submit('casa', 'es', str(tmp_path / 'casa.mp3')) is waiting and not waiting.background
+    synthesize.release.set()
+    assert background.wait(5)
+    assert synthesize.started == ['gato', 'mesa', 'casa', 'perro']
+
+def test_failures_are_reported_and_full_queues_refuse(tmp_path):
+    synthesize = BlockingSynthesize()
+    pool = TTSWorkerPool(workers=1, max_per_language=1, max_pending=2, synthesize=synthesize)
+    broken = pool.submit('roto', 'es', str(tmp_path / 'roto.mp3'))
+    pool.submit('gato', 'es', str(tmp_path / 'gato.mp3'))
+    with pytest.raises(TTSBusy):
+        pool.submit('perro', 'es', str(tmp_path / 'perro.mp3'))
+    synthesize.release.set()
+    assert broken.wait(5) and broken.status == 'failed'
+    assert pool.status('roto', 'es', str(tmp_path / 'roto.mp3')) == ('failed', 'no voice')
+    assert pool.stats()['refused'] == 1
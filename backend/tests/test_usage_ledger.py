@@ -0,0 +1,47 @@
+import pytest
+from utils import settings
+from utils.usage_ledger import QuotaExceeded, UsageLedger
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, 'USAGE_USER_DAILY_CALLS', 2)
+    monkeypatch.setattr(settings, 'USAGE_USER_DAILY_TOKENS', 0)
+    monkeypatch.setattr(settings, 'USAGE_CLASSROOM_DAILY_CALLS', 0)
+    monkeypatch.setattr(settings, 'USAGE_CLASSROOM_DAILY_TOKENS', 0)
+    ledger = UsageLedger(str(tmp_path / 'UsageLedger'), str(tmp_path / 'UsageLedger' / 'quotas.json'))
+    yield ledger
+    ledger.stop()
+
+def test_user_call_quota(ledger):
+    for _ in range(2):
+        ledger.check('ana@example.com')
+        ledger.record('ana@example.com', 'prompt', 'reply', 0.1)
+    with pytest.raises(QuotaExceeded) as e:
+        ledger.check('ana@example.com')
+    assert e.value.retry_after > 0
+    ledger.check('ben@example.com')
+    assert ledger.report(user='ana@example.com')['days'].popitem()[1]['users']['ana@example.com']['rejected'] == 1
+
+def test_user_override(ledger):
+    ledger.set_quota('users', 'ana@example.com', calls=0, tokens=5)
+    ledger.record('ana@example.com', 'x' * 12, 'y' * 8, 0.1)
+    with pytest.raises(QuotaExceeded):
+        ledger.check('ana@example.com')
+
+def test_classroom_quota_covers_its_members(ledger, tmp_path):
+    (tmp_path / 'ClassroomMembers.csv').write_text(
+        'classroom_code,student_email\nabc123,ana@example.com\nabc123,ben@example.com\n', encoding='utf-8')
+    ledger.set_quota('classrooms', 'ABC123', calls=1)
+    ledger.record('ana@example.com', 'prompt', 'reply', 0.1)
+    with pytest.raises(QuotaExceeded):
+        ledger.check('ben@example.com')
+
+def test_usage_is_flushed_and_read_back(ledger, tmp_path):
+    ledger.record('ana@example.com', 'prompt', 'reply', 0.1)
+    ledger.flush()
+    reopened = UsageLedger(ledger.directory, ledger.quotas_file)
+    reopened.record('ana@example.com', 'prompt', 'reply', 0.1)
+    with pytest.raises(QuotaExceeded):
+        reopened.check('ana@example.com')
+    reopened.stop()
@@ -0,0 +1,19 @@
+from utils.vocab_highlighter import Automaton, surface_forms
+
+def test_spans_prefers_leftmost_then_longest():
+    automaton = Automaton({'el': 'el', 'el perro': 'el perro', 'perro': 'perro'})
+    text = 'Veo el perro grande'
+    assert [(text[start:end], payload) for start, end, payload in automaton.spans(text)] == [('el perro', 'el perro')]
+
+def test_spans_skip_matches_inside_longer_words():
+    automaton = Automaton({'sol': 'sol'})
+    assert automaton.spans('El soldado mira el sol.') == [(19, 22, 'sol')]
+
+def test_spans_fold_case_and_keep_offsets():
+    automaton = Automaton({'casa': 'casa'})
+    text = 'Mi CASA es tu Casa'
+    assert [text[start:end] for start, end, _ in automaton.spans(text)] == ['CASA', 'Casa']
+
+def test_spans_match_inside_unsegmented_text():
+    automaton = Automaton({form: '的de' for form in surface_forms('的de')})
+    assert automaton.spans('我的书') == [(1, 2, '的de')]
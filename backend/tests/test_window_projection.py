@@ -0,0 +1,43 @@
+import os
+from models.walking_window import WalkingWindow
+from models.window_projection import project_walking_window
+from utils import settings
+
+HEADER = 'Foreign,English,seen,correct,wrong,known\n'
+
+def write_deck(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER + ''.join(f"{row}\n" for row in rows))
+
+DECK = ['uno,one,3,1,2,1', 'dos,two,1,1,0,0', 'dos,two again,0,0,0,0', 'tres,three,0,0,0,False',
+        'cuatro,four,2,2,0,True', 'cinco,five,0,0,0,0', 'seis,six,0,0,0,0']
+
+def test_saved_deck_gives_the_words_a_new_window_would_pick(workdir, monkeypatch):
+    write_deck('UserWords/ana@example.com_Spanish.csv', DECK)
+    projection = project_walking_window('ana@example.com', 'Spanish', 3)
+    assert projection['source'] == 'saved' and projection['srs_queue'] == []
+    monkeypatch.setattr(settings, 'username', 'ana@example.com')
+    monkeypatch.setattr(settings, 'LANGUAGE', 'Spanish')
+    window = WalkingWindow(size=3)
+    assert [word['foreign'] for word in projection['current_words']] == [word.foreign for word in window.current_words]
+    assert projection['current_words'][0]['count_seen'] == 1
+
+def test_template_when_the_deck_was_never_materialized(workdir):
+    write_deck('UserWords/Template_Spanish.csv', DECK)
+    projection = project_walking_window('ana@example.com', 'Spanish', 2)
+    assert projection['source'] == 'template'
+    assert [word['foreign'] for word in projection['current_words']] == ['dos', 'tres']
+    # Instructor views never create the student's deck
+    assert not os.path.exists('UserWords/ana@example.com_Spanish.csv')
+
+def test_live_session_wins(workdir, monkeypatch):
+    write_deck('UserWords/ana@example.com_Spanish.csv', DECK)
+    monkeypatch.setattr(settings, 'username', 'ana@example.com')
+    monkeypatch.setattr(settings, 'LANGUAGE', 'Spanish')
+    window = WalkingWindow(size=2)
+    window.current_words[0].count_seen = 9
+    projection = project_walking_window('ana@example.com', 'Spanish', 2, {'ana@example.com_Spanish': window})
+    assert projection['source'] == 'session' and projection['current_words'][0]['count_seen'] == 9
+
+def test_nothing_to_show(workdir):
+    assert project_walking_window('ana@example.com', 'Spanish', 2) == {'current_words': [], 'srs_queue': [], 'source': 'none'}
@@ -0,0 +1,47 @@
+import pytest
+from utils.word_category_index import CategoryIndex, decode_cursor, encode_cursor, page, parse_page_args
+
+def word(foreign, seen=0, correct=0, incorrect=0, known=False):
+    return {'foreign': foreign, 'english': foreign, 'count_seen': seen, 'count_correct': correct,
+            'count_incorrect': incorrect, 'is_known': known}
+
+def test_categories():
+    index = CategoryIndex([word('a', known=True), word('b', seen=5, incorrect=4), word('c', seen=1), word('d')])
+    assert index.totals() == {'known': 1, 'learning': 1, 'struggling': 1}
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(250)) == 250
+    assert decode_cursor(None) == 0
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor(-1)])
+def test_bad_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_pages_cover_every_word_once():
+    words = list(range(7))
+    seen, cursor = [], None
+    while True:
+        items, cursor = page(words, cursor, 3)
+        seen.extend(items)
+        if cursor is None:
+            break
+    assert seen == words
+
+def test_parse_page_args_caps_limit():
+    assert parse_page_args({'category': 'learning', 'limit': '5000'}) == ('learning', None, None, 1000)
+    with pytest.raises(ValueError):
+        parse_page_args({'limit': '0'})
+
+@pytest.mark.parametrize('args', [{'limit': None}, {'limit': [5]}, {'sort': ['foreign']}, {'category': ['known']},
+                                  {'cursor': 12}])
+def test_parse_page_args_rejects_json_of_the_wrong_type(args):
+    with pytest.raises(ValueError):
+        parse_page_args(args)
+
+def test_known_words_endpoint_answers_bad_limits_with_400(client):
+    session_id = client.post('/api/study/init', json={'username': 'pager@example.com', 'language': 'Spanish'}).json['session_id']
+    response = client.post('/api/study/get-known-words', json={'session_id': session_id, 'limit': None})
+    assert response.status_code == 400
+    response = client.post('/api/study/get-known-words', json={'session_id': session_id, 'limit': 2})
+    assert response.status_code == 200 and response.json['words'] == []
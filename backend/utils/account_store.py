@@ -0,0 +1,249 @@
+"""
+AccountStore.py
+================
+In-memory index over AccountInformation.csv keyed by normalized email.
+The CSV is parsed once and kept in sync with write-through appends, so
+login and duplicate-email checks are dictionary lookups instead of scans.
+Plain-text password upgrades are queued and written back in batches with
+an atomic rewrite of the whole file.
+
+Lookups used to be case-sensitive, so an existing CSV can hold accounts
+whose emails differ only by case. They are logged at load and are not
+merged: each of them only matches its exact spelling, and no new account
+can be registered under another spelling of the same email.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import atexit
+import csv
+import logging
+import os
+import tempfile
+import threading
+
+ACCOUNTS_CSV = 'AccountInformation.csv'
+DEFAULT_FIELDNAMES = ['Email', 'Password', 'Role']
+REHASH_BATCH_SIZE = 20 #number of queued password upgrades that triggers a rewrite
+REHASH_FLUSH_INTERVAL = 30.0 #seconds before a partial batch of upgrades is written anyway
+
+def normalize_email(email: str) -> str:
+    """Return the lookup key used for an email address."""
+    return (email or '').strip().lower()
+
+def is_password_hashed(stored_password: str) -> bool:
+    """Werkzeug hashes start with pbkdf2: or scrypt:, anything else is legacy plain text."""
+    return stored_password.startswith('pbkdf2:') or stored_password.startswith('scrypt:')
+
+class AccountStore:
+
+    def __init__(self, csv_path: str = ACCOUNTS_CSV,
+                 rehash_batch_size: int = REHASH_BATCH_SIZE,
+                 rehash_flush_interval: float = REHASH_FLUSH_INTERVAL):
+        """
+        Create an account store backed by a CSV file
+
+        param: csv_path: path of the account CSV
+        param: rehash_batch_size: queued password upgrades that force a flush
+        param: rehash_flush_interval: seconds before a partial batch is flushed
+        """
+        self.csv_path = csv_path
+        self.rehash_batch_size = rehash_batch_size
+        self.rehash_flush_interval = rehash_flush_interval
+        self._lock = threading.RLock()
+        self._accounts = {}
+        self._collisions = {}  # normalized email -> {exact email: row} for emails that differ only by case
+        self._fieldnames = list(DEFAULT_FIELDNAMES)
+        self._signature = None
+        self._pending_rehash = {}
+        self._flush_timer = None
+
+    def _file_signature(self):
+        """Cheap fingerprint of the CSV used to notice edits made outside this process."""
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        """
+        Parse the account CSV into the index. The first row for an email wins, as with the old scan.
+        Emails that differ only by case are kept apart in _collisions and logged.
+        """
+        accounts = {}
+        collisions = {}
+        fieldnames = list(DEFAULT_FIELDNAMES)
+        if os.path.exists(self.csv_path):
+            with open(self.csv_path, 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                if reader.fieldnames:
+                    fieldnames = list(reader.fieldnames)
+                for row in reader:
+                    key = normalize_email(row.get('Email'))
+                    if not key:
+                        continue
+                    if key not in accounts:
+                        accounts[key] = row
+                        continue
+                    first = accounts[key]
+                    exact = row.get('Email').strip()
+                    if exact != first.get('Email').strip():
+                        spellings = collisions.setdefault(key, {first.get('Email').strip(): first})
+                        spellings.setdefault(exact, row)
+
+        if collisions:
+            spellings = '; '.join(', '.join(emails) for emails in collisions.values())
+            logging.warning(f"{self.csv_path} has accounts whose emails differ only by case, "
+                            f"each only matches its exact spelling: {spellings}")
+
+        self._accounts = accounts
+        self._collisions = collisions
+
+        # Queued upgrades survive a reload triggered by an outside edit
+        for rehash_key, password_hash in self._pending_rehash.items():
+            row = self._lookup(rehash_key)
+            if row is not None:
+                row['Password'] = password_hash
+
+        self._fieldnames = fieldnames
+        self._signature = self._file_signature()
+        logging.info(f"Loaded {len(accounts)} accounts from {self.csv_path}")
+
+    def _rehash_key(self, email: str) -> str:
+        """Key of a queued password upgrade: the exact email for accounts that collide by case."""
+        key = normalize_email(email)
+        return (email or '').strip() if key in self._collisions else key
+
+    def _lookup(self, email: str):
+        """The indexed row of an email; emails that collide by case need their exact spelling."""
+        key = normalize_email(email)
+        spellings = self._collisions.get(key)
+        if spellings is not None:
+            return spellings.get((email or '').strip())
+        return self._accounts.get(key)
+
+    def _ensure_loaded(self):
+        if self._signature is None or self._signature != self._file_signature():
+            self._load()
+
+    def get(self, email: str):
+        """
+        Look up an account
+
+        param: email: the email as typed by the user
+        return: a copy of the account row, or None if there is no such account
+        """
+        with self._lock:
+            self._ensure_loaded()
+            row = self._lookup(email)
+            return dict(row) if row is not None else None
+
+    def exists(self, email: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return normalize_email(email) in self._accounts
+
+    def add(self, email: str, password_hash: str, role: str) -> bool:
+        """
+        Append a new account to the CSV and the index
+
+        param: email: the new account's email
+        param: password_hash: the already hashed password
+        param: role: Student or Instructor
+        return: False if the email is already registered
+        """
+        key = normalize_email(email)
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._accounts:
+                return False
+
+            # Ensure Role is in fieldnames for files created before roles existed
+            fieldnames = list(self._fieldnames)
+            if 'Role' not in fieldnames:
+                fieldnames.append('Role')
+
+            row = {'Email': email, 'Password': password_hash, 'Role': role}
+            file_exists = os.path.exists(self.csv_path)
+            with open(self.csv_path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                if not file_exists:
+                    writer.writeheader()
+                writer.writerow(row)
+
+            self._accounts[key] = row
+            self._fieldnames = fieldnames
+            self._signature = self._file_signature()
+            return True
+
+    def schedule_rehash(self, email: str, password_hash: str):
+        """
+        Queue a password upgrade. The index sees the new hash immediately,
+        the CSV is rewritten once the batch fills up or the timer fires.
+
+        param: email: the account to upgrade
+        param: password_hash: the new hashed password
+        """
+        with self._lock:
+            self._ensure_loaded()
+            row = self._lookup(email)
+            if row is None:
+                return
+            row['Password'] = password_hash
+            self._pending_rehash[self._rehash_key(email)] = password_hash
+
+            if len(self._pending_rehash) >= self.rehash_batch_size:
+                self.flush_rehashes()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.rehash_flush_interval, self.flush_rehashes)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush_rehashes(self) -> int:
+        """
+        Write all queued password upgrades in a single atomic rewrite
+
+        return: the number of accounts that were updated
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending_rehash or not os.path.exists(self.csv_path):
+                self._pending_rehash.clear()
+                return 0
+
+            # Re-read the file rather than the index so rows we never index (duplicates) are kept
+            rows = []
+            updated = 0
+            with open(self.csv_path, 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                fieldnames = list(reader.fieldnames or self._fieldnames)
+                for row in reader:
+                    password_hash = self._pending_rehash.get(self._rehash_key(row.get('Email')))
+                    if password_hash is not None:
+                        row['Password'] = password_hash
+                        updated += 1
+                    rows.append(row)
+
+            directory = os.path.dirname(os.path.abspath(self.csv_path))
+            fd, tmp_path = tempfile.mkstemp(prefix='.accounts-', suffix='.csv', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=fieldnames)
+                    writer.writeheader()
+                    writer.writerows(rows)
+                os.replace(tmp_path, self.csv_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            self._pending_rehash.clear()
+            self._signature = self._file_signature()
+            logging.info(f"Rewrote {self.csv_path} with {updated} upgraded password hashes")
+            return updated
+
+accounts = AccountStore()
+atexit.register(accounts.flush_rehashes)
@@ -0,0 +1,175 @@
+"""
+AssignmentIndex.py
+================
+Grouped, cached aggregates over the classroom assignment CSVs.
+ClassroomAssignmentWords.csv is indexed into per-assignment word lists and
+counts, and ClassroomAssignmentProgress.csv is grouped by
+(assignment, student) in a single streaming pass with completion counters
+precomputed per group. Both are rebuilt only when the file changes on
+disk, and the assignment study path patches its own group in place.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import csv
+import logging
+import os
+import threading
+
+ASSIGNMENT_WORDS_CSV = 'ClassroomAssignmentWords.csv'
+ASSIGNMENT_PROGRESS_CSV = 'ClassroomAssignmentProgress.csv'
+
+def file_signature(path: str):
+    """Cheap fingerprint of a file used to notice when it has been rewritten."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def word_key(foreign: str, english: str) -> str:
+    return f"{foreign}|{english}"
+
+def _new_group() -> dict:
+    return {'words': {}, 'total_correct': 0, 'total_incorrect': 0, 'known_count': 0, 'in_progress_count': 0}
+
+def _add_progress_row(group: dict, row: dict):
+    """Fold one progress row into a (assignment, student) group."""
+    key = word_key(row.get('word_foreign', ''), row.get('word_english', ''))
+    word_progress = group['words'].get(key)
+    if word_progress is None:
+        word_progress = {'count_seen': 0, 'count_correct': 0, 'count_incorrect': 0, 'is_known': False}
+        group['words'][key] = word_progress
+
+    correct = int(row.get('count_correct', 0))
+    incorrect = int(row.get('count_incorrect', 0))
+    word_progress['count_seen'] += int(row.get('count_seen', 0))
+    word_progress['count_correct'] += correct
+    word_progress['count_incorrect'] += incorrect
+    if row.get('is_known', '0') == '1':
+        word_progress['is_known'] = True
+
+    group['total_correct'] += correct
+    group['total_incorrect'] += incorrect
+
+def _finish_group(group: dict):
+    """Recompute the completion counters of a group from its words."""
+    group['known_count'] = sum(1 for w in group['words'].values() if w['is_known'])
+    group['in_progress_count'] = sum(1 for w in group['words'].values()
+                                     if w['count_seen'] > 0 and not w['is_known'])
+
+class AssignmentIndex:
+
+    def __init__(self, words_csv: str = ASSIGNMENT_WORDS_CSV, progress_csv: str = ASSIGNMENT_PROGRESS_CSV):
+        """
+        Create an index over the assignment words and progress CSVs
+
+        param: words_csv: path of ClassroomAssignmentWords.csv
+        param: progress_csv: path of ClassroomAssignmentProgress.csv
+        """
+        self.words_csv = words_csv
+        self.progress_csv = progress_csv
+        self._lock = threading.RLock()
+        self._words = {}
+        self._words_signature = False  # False means never loaded (None means the file is missing)
+        self._progress = {}
+        self._progress_signature = False
+
+    def _ensure_words(self):
+        signature = file_signature(self.words_csv)
+        if signature == self._words_signature:
+            return
+        words = {}
+        if signature is not None:
+            with open(self.words_csv, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    words.setdefault(row.get('assignment_id', ''), []).append({
+                        'foreign': row.get('foreign', ''),
+                        'english': row.get('english', ''),
+                        'word_order': int(row.get('word_order', 0) or 0)
+                    })
+        self._words = words
+        self._words_signature = signature
+        logging.info(f"Indexed words for {len(words)} assignments")
+
+    def _ensure_progress(self):
+        signature = file_signature(self.progress_csv)
+        if signature == self._progress_signature:
+            return
+        progress = {}
+        if signature is not None:
+            with open(self.progress_csv, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    groups = progress.setdefault(row.get('assignment_id', ''), {})
+                    student_email = row.get('student_email', '').strip()
+                    group = groups.get(student_email)
+                    if group is None:
+                        group = _new_group()
+                        groups[student_email] = group
+                    _add_progress_row(group, row)
+            for groups in progress.values():
+                for group in groups.values():
+                    _finish_group(group)
+        self._progress = progress
+        self._progress_signature = signature
+        logging.info(f"Aggregated progress for {len(progress)} assignments")
+
+    def version(self) -> tuple:
+        """Signatures of the words and progress CSVs, changes whenever any assignment data does."""
+        with self._lock:
+            self._ensure_words()
+            self._ensure_progress()
+            return (self._words_signature, self._progress_signature)
+
+    def word_counts(self) -> dict:
+        """Return assignment_id -> number of words."""
+        with self._lock:
+            self._ensure_words()
+            return {assignment_id: len(words) for assignment_id, words in self._words.items()}
+
+    def word_count(self, assignment_id: str) -> int:
+        with self._lock:
+            self._ensure_words()
+            return len(self._words.get(assignment_id, ()))
+
+    def assignment_words(self, assignment_id: str) -> list:
+        """Return the words of an assignment in file order (do not mutate)."""
+        with self._lock:
+            self._ensure_words()
+            return self._words.get(assignment_id, [])
+
+    def assignment_progress(self, assignment_id: str) -> dict:
+        """Return student_email -> progress group for an assignment (do not mutate)."""
+        with self._lock:
+            self._ensure_progress()
+            return self._progress.get(assignment_id, {})
+
+    def student_progress(self, assignment_id: str, student_email: str):
+        """Return one student's progress group for an assignment, or None (do not mutate)."""
+        return self.assignment_progress(assignment_id).get(student_email.strip())
+
+    def replace_student_progress(self, assignment_id: str, student_email: str, rows: list,
+                                 signature_before, signature_after):
+        """
+        Patch the group of a student after the study path rewrote the progress file.
+        If the index was not current before that write it is left to reload instead.
+
+        param: assignment_id: the assignment that was saved
+        param: student_email: the student that was saved
+        param: rows: the progress rows written for this student and assignment
+        param: signature_before: file_signature() of the progress CSV before the write
+        param: signature_after: file_signature() of the progress CSV after the write
+        """
+        with self._lock:
+            if self._progress_signature != signature_before:
+                return
+            group = _new_group()
+            for row in rows:
+                _add_progress_row(group, row)
+            _finish_group(group)
+            self._progress.setdefault(assignment_id, {})[student_email.strip()] = group
+            self._progress_signature = signature_after
+
+assignments = AssignmentIndex()
@@ -0,0 +1,189 @@
+"""
+AudioCache.py
+================
+Content-addressed store for pronunciation audio.
+Each (language, spoken word) pair is hashed and its mp3 lives at
+audio_files/<lang>/<hash[:2]>/<hash>.mp3, so no directory grows past a
+few hundred files and any word, whatever characters it contains, gets a
+safe file name. An in-memory index of every file's size and last access,
+ordered least recently used first, is built from one scan of the tree on
+first use. Once the total passes settings.AUDIO_CACHE_MAX_BYTES the least
+recently used files are removed.
+
+Last access is written back to the file's modification time (at most once
+a minute per file) so recency survives a restart. Files from the old flat
+layout (audio_files/<lang>/<word>.mp3) are moved into place during the
+first scan, and their old URLs keep working. Audio moved into a packed
+archive by utils.audio_pack counts as cached without a loose file.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+from utils.audio_pack import audio_packs
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_DIR = os.path.join(BACKEND_DIR, 'audio_files')
+HASHED_NAME = re.compile(r'^[0-9a-f]{64}\.mp3$')
+TOUCH_INTERVAL = 60  # seconds between writes of a file's access time to disk
+
+def audio_key(word: str, lang: str) -> str:
+    return hashlib.sha256(f"{lang}\n{word}".encode('utf-8')).hexdigest()
+
+class AudioCache:
+
+    def __init__(self, root: str = AUDIO_DIR, max_bytes: int = None):
+        """
+        Create an audio cache
+
+        param: root: the audio_files directory
+        param: max_bytes: total size of the audio files before least recently used ones are evicted
+        """
+        self.root = root
+        self.max_bytes = max_bytes or settings.AUDIO_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._index = None  # key -> [lang, size, last access, last access written to disk], LRU first
+        self._total = 0
+        self._metrics = {'hits': 0, 'misses': 0, 'added': 0, 'evictions': 0, 'migrated': 0}
+
+    def path(self, word: str, lang: str) -> str:
+        """Where the audio of a spoken word goes, whether or not it exists yet."""
+        key = audio_key(word, lang)
+        return os.path.join(self.root, lang, key[:2], f"{key}.mp3")
+
+    def path_for_name(self, lang: str, filename: str) -> str:
+        """
+        Path of an audio URL's file name: a hashed name, or a word for URLs from the old flat layout
+
+        return: the path, or None if the name cannot be an audio file
+        """
+        if HASHED_NAME.match(filename):
+            return os.path.join(self.root, lang, filename[:2], filename)
+        if filename.endswith('.mp3') and len(filename) > 4:
+            return self.path(filename[:-4], lang)
+        return None
+
+    def _load(self):
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.root):
+            for lang in os.listdir(self.root):
+                lang_dir = os.path.join(self.root, lang)
+                if not os.path.isdir(lang_dir):
+                    continue
+                for name in os.listdir(lang_dir):
+                    path = os.path.join(lang_dir, name)
+                    if name.endswith('.mp3') and os.path.isfile(path):
+                        path = self._migrate(lang, name[:-4], path)
+                        if path is None:
+                            continue
+                        name = os.path.basename(path)
+                        entries.append(self._entry(lang, name[:-4], path))
+                    elif len(name) == 2 and os.path.isdir(path):
+                        for shard_name in os.listdir(path):
+                            if HASHED_NAME.match(shard_name):
+                                entries.append(self._entry(lang, shard_name[:-4], os.path.join(path, shard_name)))
+        entries.sort(key=lambda entry: entry[1][2])
+        self._index = OrderedDict(entries)
+        self._total = sum(entry[1] for entry in self._index.values())
+        logging.info(f"Indexed {len(self._index)} audio files ({self._total} bytes)")
+        self._evict()
+
+    def _entry(self, lang: str, key: str, path: str):
+        stat = os.stat(path)
+        return key, [lang, stat.st_size, stat.st_mtime, stat.st_mtime]
+
+    def _migrate(self, lang: str, word: str, legacy_path: str):
+        """Move a file of the old flat layout to its hashed path, return the new path (None if it failed)."""
+        path = self.path(word, lang)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(legacy_path, path)
+        except OSError as e:
+            logging.warning(f"Could not move {legacy_path} into the audio cache: {e}")
+            return None
+        self._metrics['migrated'] += 1
+        return path
+
+    def _drop(self, key: str):
+        lang, size, _, _ = self._index.pop(key)
+        self._total -= size
+        try:
+            os.remove(os.path.join(self.root, lang, key[:2], f"{key}.mp3"))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Remove least recently used files until the cache is back under its byte quota."""
+        while self._total > self.max_bytes and len(self._index) > 1:
+            self._drop(next(iter(self._index)))
+            self._metrics['evictions'] += 1
+
+    def contains(self, path: str, touch: bool = True) -> bool:
+        """
+        Whether an audio file is cached
+
+        param: path: from path() or path_for_name()
+        param: touch: count this as an access (keeps it from being evicted)
+        """
+        key = os.path.basename(path)[:-4]
+        if audio_packs.contains(os.path.basename(os.path.dirname(os.path.dirname(path))), key):
+            return True
+        with self._lock:
+            self._load()
+            entry = self._index.get(key)
+            if entry is None or not os.path.isfile(path):
+                if entry is not None:
+                    # Removed behind our back
+                    self._index.pop(key)
+                    self._total -= entry[1]
+                if touch:
+                    self._metrics['misses'] += 1
+                return False
+            if touch:
+                self._metrics['hits'] += 1
+                now = time.time()
+                entry[2] = now
+                self._index.move_to_end(key)
+                if now - entry[3] >= TOUCH_INTERVAL:
+                    entry[3] = now
+                    try:
+                        os.utime(path, (now, now))
+                    except OSError:
+                        pass
+            return True
+
+    def add(self, path: str):
+        """Index an audio file just written to path, evicting older files if the quota is exceeded."""
+        key = os.path.basename(path)[:-4]
+        lang = os.path.basename(os.path.dirname(os.path.dirname(path)))
+        with self._lock:
+            self._load()
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            try:
+                key, entry = self._entry(lang, key, path)
+            except FileNotFoundError:
+                return
+            self._index[key] = entry
+            self._total += entry[1]
+            self._metrics['added'] += 1
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load()
+            return dict(self._metrics, files=len(self._index), bytes=self._total, max_bytes=self.max_bytes)
+
+audio_cache = AudioCache()
@@ -0,0 +1,269 @@
+"""
+AudioPack.py
+================
+Packed per-language pronunciation archives.
+All audio of a language is concatenated into audio_files/<lang>.pack, with
+an index audio_files/<lang>.pack.idx of one "<hash> <offset> <length>" line
+per file (the hash being the audio cache's content key). The server reads
+each index once, memory-maps the data file, and serves a word's audio as a
+slice of the mapping, so there is no file to look up, open or stat per
+request. Indexes are checked for changes at most every
+settings.AUDIO_PACK_RELOAD_INTERVAL seconds, and a language's index is
+checked again on every lookup that misses, so audio packed since the last
+check (whose loose file the tool has already removed) is still found.
+
+Packs are append-only. The tool below appends every loose file of the
+audio cache that is not packed yet (new generations included) and then
+removes the loose copies; run it at image build time or whenever the
+cache has grown. Data is written and synced before its index lines, so an
+interrupted run leaves at most unreferenced bytes at the end of the pack
+and a partial last index line, both dropped by the next run.
+Run one instance at a time.
+
+Run from backend/:
+    python -m utils.audio_pack
+    python -m utils.audio_pack --language spanish --keep-files
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import argparse
+import logging
+import mmap
+import os
+import threading
+import time
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+from utils.assignment_index import file_signature
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_DIR = os.path.join(BACKEND_DIR, 'audio_files')
+PACK_SUFFIX = '.pack'
+INDEX_SUFFIX = '.pack.idx'
+
+def pack_paths(root: str, lang: str):
+    """(data file, index file) of a language's pack."""
+    return os.path.join(root, lang + PACK_SUFFIX), os.path.join(root, lang + INDEX_SUFFIX)
+
+def read_index(index_path: str, data_size: int) -> dict:
+    """
+    Read a pack index, skipping a partial last line and entries past the end of the data
+
+    return: dict of key -> (offset, length)
+    """
+    entries = {}
+    if not os.path.exists(index_path):
+        return entries
+    with open(index_path, 'r', encoding='ascii') as f:
+        for line in f:
+            parts = line.split()
+            if not line.endswith('\n') or len(parts) != 3:
+                continue
+            offset, length = int(parts[1]), int(parts[2])
+            if offset + length <= data_size:
+                entries[parts[0]] = (offset, length)
+    return entries
+
+class _LanguagePack:
+
+    def __init__(self, data_path: str, index_path: str):
+        self.signature = file_signature(index_path)
+        self.entries = {}
+        self.view = None
+        data_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+        if data_size:
+            with open(data_path, 'rb') as f:
+                # The mapping stays valid after the file is closed; it is released
+                # once the last slice handed out by get() is gone
+                self.view = memoryview(mmap.mmap(f.fileno(), data_size, access=mmap.ACCESS_READ))
+            self.entries = read_index(index_path, data_size)
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self.view[offset:offset + length]
+
+class AudioPacks:
+
+    def __init__(self, root: str = AUDIO_DIR, reload_interval: float = None):
+        """
+        Create the reader of the packs of every language
+
+        param: root: the audio_files directory
+        param: reload_interval: seconds between checks of the index files for changes
+        """
+        self.root = root
+        self.reload_interval = reload_interval if reload_interval is not None else settings.AUDIO_PACK_RELOAD_INTERVAL
+        self._lock = threading.Lock()
+        self._packs = {}  # lang -> _LanguagePack
+        self._checked = None  # time of the last check of the index files
+        self._metrics = {'hits': 0, 'misses': 0, 'reloads': 0}
+
+    def _refresh(self):
+        """Map new or changed packs, called with the lock held."""
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < self.reload_interval:
+            return
+        self._checked = now
+        langs = [name[:-len(INDEX_SUFFIX)] for name in os.listdir(self.root)
+                 if name.endswith(INDEX_SUFFIX)] if os.path.isdir(self.root) else []
+        packs = {}
+        for lang in langs:
+            data_path, index_path = pack_paths(self.root, lang)
+            pack = self._packs.get(lang)
+            if pack is None or pack.signature != file_signature(index_path):
+                pack = _LanguagePack(data_path, index_path)
+                self._metrics['reloads'] += 1
+                logging.info(f"Mapped audio pack {data_path} ({len(pack.entries)} files)")
+            packs[lang] = pack
+        self._packs = packs
+
+    def _lookup(self, lang: str, key: str):
+        """The language's pack, mapped again first if the key is missing and its index changed; called with the lock held."""
+        pack = self._packs.get(lang)
+        if pack is not None and key in pack.entries:
+            return pack
+        # One stat per miss: the packing tool may have moved the key in since the last refresh
+        data_path, index_path = pack_paths(self.root, lang)
+        signature = file_signature(index_path)
+        if signature is None or (pack is not None and pack.signature == signature):
+            return pack
+        pack = _LanguagePack(data_path, index_path)
+        self._packs[lang] = pack
+        self._metrics['reloads'] += 1
+        logging.info(f"Mapped audio pack {data_path} ({len(pack.entries)} files)")
+        return pack
+
+    def load(self):
+        """Map every pack now instead of on the first request."""
+        with self._lock:
+            self._checked = None
+            self._refresh()
+
+    def get(self, lang: str, key: str):
+        """
+        Audio of a content key from the language's pack
+
+        return: a read-only memoryview of the mapped bytes, or None if it is not packed
+        """
+        with self._lock:
+            self._refresh()
+            pack = self._lookup(lang, key)
+            data = pack.get(key) if pack is not None else None
+            self._metrics['hits' if data is not None else 'misses'] += 1
+            return data
+
+    def contains(self, lang: str, key: str) -> bool:
+        with self._lock:
+            self._refresh()
+            pack = self._lookup(lang, key)
+            return pack is not None and key in pack.entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            languages = dict((lang, {'files': len(pack.entries), 'bytes': len(pack.view) if pack.view else 0})
+                             for lang, pack in self._packs.items())
+            return dict(self._metrics, languages=languages)
+
+audio_packs = AudioPacks()
+
+def loose_files(root: str, lang: str) -> list:
+    """(content key, path) of every unpacked audio file of a language, in the sharded or the old flat layout."""
+    from utils.audio_cache import audio_key, HASHED_NAME
+    lang_dir = os.path.join(root, lang)
+    files = []
+    for name in sorted(os.listdir(lang_dir)):
+        path = os.path.join(lang_dir, name)
+        if name.endswith('.mp3') and os.path.isfile(path):
+            files.append((audio_key(name[:-4], lang), path))
+        elif len(name) == 2 and os.path.isdir(path):
+            for shard_name in sorted(os.listdir(path)):
+                if HASHED_NAME.match(shard_name):
+                    files.append((shard_name[:-4], os.path.join(path, shard_name)))
+    return files
+
+def _drop_partial_line(index_path: str):
+    """Cut a partial last line left by an interrupted run, so the next entry starts on its own line."""
+    if not os.path.exists(index_path):
+        return
+    with open(index_path, 'r+b') as f:
+        content = f.read()
+        if content and not content.endswith(b'\n'):
+            f.truncate(content.rfind(b'\n') + 1)
+
+def pack_language(root: str, lang: str, remove_files: bool = True) -> dict:
+    """
+    Append a language's loose audio files to its pack
+
+    param: root: the audio_files directory
+    param: lang: the TTS lang, e.g. spanish
+    param: remove_files: delete loose files once they are in the pack
+    return: counts of files packed, already packed and bytes appended
+    """
+    data_path, index_path = pack_paths(root, lang)
+    packed = read_index(index_path, os.path.getsize(data_path) if os.path.exists(data_path) else 0)
+    data_size = max((offset + length for offset, length in packed.values()), default=0)
+    counts = {'packed': 0, 'already_packed': 0, 'bytes': 0}
+    new_entries = []
+    done = []
+    with open(data_path, 'ab') as data:
+        # Drop bytes left behind by an interrupted run so offsets line up
+        data.truncate(data_size)
+        for key, path in loose_files(root, lang):
+            if key in packed:
+                counts['already_packed'] += 1
+                done.append(path)
+                continue
+            with open(path, 'rb') as f:
+                audio = f.read()
+            if not audio:
+                continue
+            data.write(audio)
+            packed[key] = (data_size, len(audio))
+            new_entries.append(f"{key} {data_size} {len(audio)}\n")
+            data_size += len(audio)
+            counts['packed'] += 1
+            counts['bytes'] += len(audio)
+            done.append(path)
+        data.flush()
+        os.fsync(data.fileno())
+    if new_entries:
+        _drop_partial_line(index_path)
+        with open(index_path, 'a', encoding='ascii') as index:
+            index.writelines(new_entries)
+            index.flush()
+            os.fsync(index.fileno())
+    if remove_files:
+        for path in done:
+            os.remove(path)
+        for name in os.listdir(os.path.join(root, lang)):
+            shard_dir = os.path.join(root, lang, name)
+            if len(name) == 2 and os.path.isdir(shard_dir) and not os.listdir(shard_dir):
+                os.rmdir(shard_dir)
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pack loose pronunciation audio files into per-language archives.')
+    parser.add_argument('--language', metavar='LANG', help='only this TTS lang, e.g. spanish (default: every language)')
+    parser.add_argument('--keep-files', action='store_true', help='keep the loose files after packing them')
+    parser.add_argument('--root', default=AUDIO_DIR, help='the audio_files directory')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    langs = [args.language] if args.language else sorted(
+        name for name in os.listdir(args.root) if os.path.isdir(os.path.join(args.root, name)))
+    for lang in langs:
+        if not os.path.isdir(os.path.join(args.root, lang)):
+            parser.error(f"No audio directory for {lang}")
+        counts = pack_language(args.root, lang, remove_files=not args.keep_files)
+        print(f"{lang}: packed {counts['packed']} files ({counts['bytes']} bytes), "
+              f"{counts['already_packed']} already packed")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
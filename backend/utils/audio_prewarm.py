@@ -0,0 +1,292 @@
+"""
+AudioPrewarm.py
+================
+Bulk pre-generation of pronunciation audio, so first-time cards do not
+wait on a TTS round trip. A run walks a word list (a study session's
+current words, an assignment's words or a whole Template_<language>.csv)
+and feeds it to the TTS worker pool as background jobs, keeping a bounded
+number in flight so interactive requests stay ahead of it.
+
+Progress of assignment and template runs is checkpointed to
+AudioPrewarm/<run id>.json. Starting such a run again for the same word
+list resumes from its checkpoint: the words before it are recounted (only
+checked, never regenerated) and the rest are pre-warmed. Session runs are
+short and never checkpointed.
+
+Run from backend/:
+    python -m utils.audio_prewarm --template Spanish
+    python -m utils.audio_prewarm --assignment <assignment_id>
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+from utils import text_to_speech
+from utils.audio_cache import audio_cache
+from utils.assignment_index import assignments as assignment_index
+from utils.tts_worker import tts_pool, TTSBusy
+
+PREWARM_DIR = 'AudioPrewarm'
+USER_WORDS_DIR = 'UserWords'
+ASSIGNMENTS_CSV = 'ClassroomAssignments.csv'
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w@.-]')
+
+def template_words(language: str) -> list:
+    """Foreign words of Template_<language>.csv in file order."""
+    path = os.path.join(USER_WORDS_DIR, f"Template_{language}.csv")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No word list template for {language}")
+    with open(path, 'r', encoding='utf-8') as f:
+        return [row.get('Foreign', '').strip() for row in csv.DictReader(f) if row.get('Foreign', '').strip()]
+
+def assignment_language(assignment_id: str):
+    """Language of an assignment from ClassroomAssignments.csv, or None if it is not there."""
+    if not os.path.exists(ASSIGNMENTS_CSV):
+        return None
+    with open(ASSIGNMENTS_CSV, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get('assignment_id') == assignment_id:
+                return row.get('language', '').strip() or None
+    return None
+
+def assignment_words(assignment_id: str) -> list:
+    words = sorted(assignment_index.assignment_words(assignment_id), key=lambda w: w['word_order'])
+    return [w['foreign'].strip() for w in words if w['foreign'].strip()]
+
+def _words_digest(words: list) -> str:
+    return hashlib.sha1('\n'.join(words).encode('utf-8')).hexdigest()[:16]
+
+class PrewarmRun:
+
+    def __init__(self, run_id: str, language: str, words: list, checkpoint: bool = True):
+        self.run_id = run_id
+        self.language = language
+        self.words = words
+        self.digest = _words_digest(words)
+        self.checkpoint = checkpoint  # whether progress is saved to AudioPrewarm/
+        self.position = 0  # words before this index are accounted for
+        self.counts = {'ready': 0, 'generated': 0, 'failed': 0, 'unsupported': 0}
+        self.status = 'running'
+        self.resumed = False
+        self.started = time.time()
+        self.finished = None
+
+    def to_dict(self) -> dict:
+        total = len(self.words)
+        return dict(self.counts, run_id=self.run_id, language=self.language, status=self.status,
+                    total=total, position=self.position, resumed=self.resumed,
+                    percent=round(100.0 * self.position / total, 1) if total else 100.0,
+                    started=self.started, finished=self.finished)
+
+class AudioPrewarmer:
+
+    def __init__(self, pool=tts_pool, directory: str = PREWARM_DIR, in_flight: int = None):
+        """
+        Create a pre-warmer
+
+        param: pool: the TTS worker pool the jobs go to
+        param: directory: where run checkpoints are kept
+        param: in_flight: background jobs a run keeps queued or running at once
+        """
+        self.pool = pool
+        self.directory = directory
+        self.in_flight = in_flight or settings.AUDIO_PREWARM_IN_FLIGHT
+        self._lock = threading.Lock()
+        self._runs = {}  # run id -> PrewarmRun, running or finished in this process
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.directory, UNSAFE_FILENAME_CHARS.sub('_', run_id) + '.json')
+
+    def _load_checkpoint(self, run_id: str):
+        path = self._path(run_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable pre-warm checkpoint {path}: {e}")
+            return None
+
+    def _save_checkpoint(self, run: PrewarmRun):
+        if not run.checkpoint:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        data = dict(run.to_dict(), digest=run.digest)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._path(run.run_id))
+
+    def _new_run(self, run_id: str, language: str, words: list, checkpoint: bool = True) -> PrewarmRun:
+        run = PrewarmRun(run_id, language, words, checkpoint)
+        saved = self._load_checkpoint(run_id) if checkpoint else None
+        # Resume an interrupted run over the same words, anything else starts over. The saved
+        # counters may include words past the saved position, so _run() recounts instead
+        if saved and saved.get('digest') == run.digest and saved.get('status') == 'running':
+            run.position = min(int(saved.get('position', 0)), len(words))
+            run.resumed = True
+        return run
+
+    def start(self, run_id: str, language: str, words: list, checkpoint: bool = True) -> PrewarmRun:
+        """
+        Pre-warm a word list in the background, or return the run already going for run_id
+
+        param: run_id: names the run and its checkpoint, e.g. template-Spanish
+        param: language: study language of the words, e.g. Spanish
+        param: words: foreign words in order
+        param: checkpoint: save progress so the run can resume after a restart
+        return: the run, see progress() for its state
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run.status == 'running':
+                return run
+            run = self._new_run(run_id, language, words, checkpoint)
+            self._runs[run_id] = run
+        threading.Thread(target=self._guarded_run, args=(run,), name='audio-prewarm', daemon=True).start()
+        return run
+
+    def run(self, run_id: str, language: str, words: list, on_progress=None) -> PrewarmRun:
+        """Pre-warm a word list on the calling thread (used by the CLI), see start() for the parameters."""
+        run = self._new_run(run_id, language, words)
+        with self._lock:
+            self._runs[run_id] = run
+        self._run(run, on_progress)
+        return run
+
+    def _guarded_run(self, run: PrewarmRun):
+        try:
+            self._run(run)
+        except Exception as e:
+            logging.error(f"Pre-warming audio for {run.run_id} failed: {e}", exc_info=True)
+            run.status = 'failed'
+            run.finished = time.time()
+            self._save_checkpoint(run)
+
+    def _recount(self, run: PrewarmRun, lang: str):
+        """Count the words before a resumed run's position from the audio that exists now."""
+        for word in run.words[:run.position]:
+            target = text_to_speech.audio_target(word, lang)
+            if target is None:
+                run.counts['unsupported'] += 1
+            elif audio_cache.contains(target[1], touch=False):
+                run.counts['ready'] += 1
+            else:
+                run.counts['failed'] += 1
+
+    def _run(self, run: PrewarmRun, on_progress=None):
+        lang = text_to_speech.tts_lang(run.language)
+        self._recount(run, lang)
+        outstanding = deque()  # (index, job) in submission order
+        checkpoint_every = settings.AUDIO_PREWARM_CHECKPOINT_EVERY
+        last_checkpoint = run.position
+
+        def settle_oldest():
+            index, job = outstanding.popleft()
+            if not job.wait(settings.AUDIO_PREWARM_JOB_TIMEOUT) or job.status != 'ready':
+                run.counts['failed'] += 1
+            else:
+                run.counts['generated'] += 1
+            run.position = outstanding[0][0] if outstanding else index + 1
+
+        index = run.position
+        while index < len(run.words):
+            target = text_to_speech.audio_target(run.words[index], lang)
+            if target is None:
+                run.counts['unsupported'] += 1
+            elif audio_cache.contains(target[1], touch=False):
+                run.counts['ready'] += 1
+            else:
+                while len(outstanding) >= self.in_flight:
+                    settle_oldest()
+                try:
+                    outstanding.append((index, self.pool.submit(target[0], lang, target[1], background=True)))
+                except TTSBusy:
+                    # The pool is full of interactive work, back off and retry this word
+                    if outstanding:
+                        settle_oldest()
+                    else:
+                        time.sleep(1)
+                    continue
+            index += 1
+            if not outstanding:
+                run.position = index
+            if run.position - last_checkpoint >= checkpoint_every:
+                last_checkpoint = run.position
+                self._save_checkpoint(run)
+                if on_progress:
+                    on_progress(run)
+        while outstanding:
+            settle_oldest()
+        run.position = len(run.words)
+        run.status = 'done'
+        run.finished = time.time()
+        self._save_checkpoint(run)
+        if on_progress:
+            on_progress(run)
+
+    def progress(self, run_id: str):
+        """State of a run in this process, else its last checkpoint, or None if it never ran."""
+        with self._lock:
+            run = self._runs.get(run_id)
+        if run is not None:
+            return run.to_dict()
+        checkpoint = self._load_checkpoint(run_id)
+        if checkpoint is not None:
+            checkpoint.pop('digest', None)
+        return checkpoint
+
+prewarmer = AudioPrewarmer()
+
+def prewarm_session(session_id: str, language: str, walking_window) -> PrewarmRun:
+    """
+    Pre-warm the current words of a study session, without a checkpoint
+
+    param: session_id: the study session id
+    param: language: the language the session studies, e.g. Spanish
+    param: walking_window: the session's WalkingWindow
+    """
+    words = [word.foreign for word in list(walking_window.current_words)]
+    return prewarmer.start(f"session-{session_id}", language, words, checkpoint=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-generate pronunciation audio for a word list.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--template', metavar='LANGUAGE', help='every word of UserWords/Template_<LANGUAGE>.csv')
+    source.add_argument('--assignment', metavar='ASSIGNMENT_ID', help="an assignment's word list")
+    parser.add_argument('--language', help='language of the assignment, read from ClassroomAssignments.csv by default')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.template:
+        run_id, language, words = f"template-{args.template}", args.template, template_words(args.template)
+    else:
+        language = args.language or assignment_language(args.assignment)
+        if not language:
+            parser.error('Could not find the language of the assignment, pass --language')
+        run_id, words = f"assignment-{args.assignment}", assignment_words(args.assignment)
+
+    def report(run):
+        progress = run.to_dict()
+        print(f"{progress['position']}/{progress['total']} ({progress['percent']}%) ready {progress['ready']}, "
+              f"generated {progress['generated']}, failed {progress['failed']}, unsupported {progress['unsupported']}")
+
+    run = prewarmer.run(run_id, language, words, on_progress=report)
+    return 0 if run.counts['failed'] == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+ClassMatrix.py
+================
+Classroom-wide students x words matrices for one language.
+Seen / correct / incorrect counts and known flags of every student in a
+classroom are held as NumPy arrays so class analytics (hardest words,
+per-word accuracy, groups of students struggling on the same words) are
+vectorized reductions. Matrices are cached per (classroom, language) and
+patched cell by cell from the study write path.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import csv
+import logging
+import os
+import threading
+import numpy as np
+
+USER_WORDS_DIR = 'UserWords'
+
+def _read_counts(csv_path: str):
+    """Yield (foreign, english, seen, correct, wrong, known) for each valid row of a deck."""
+    if not os.path.exists(csv_path):
+        return
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            foreign = row.get('Foreign', '').strip()
+            if not foreign:
+                continue
+            try:
+                yield (foreign, row.get('English', '').strip(),
+                       int(row.get('seen', 0) or 0), int(row.get('correct', 0) or 0),
+                       int(row.get('wrong', 0) or 0), bool(int(row.get('known', 0) or 0)))
+            except (ValueError, TypeError):
+                continue
+
+class ClassroomWordMatrix:
+
+    def __init__(self, classroom_code: str, language: str, students: list):
+        """
+        Build the matrix from the template deck and each student's deck
+
+        param: classroom_code: the classroom's code
+        param: language: one of settings.LANGUAGE_OPTIONS
+        param: students: student emails, one matrix row each
+        """
+        self.classroom_code = classroom_code
+        self.language = language
+        self.students = list(students)
+        self.student_rows = {email: i for i, email in enumerate(self.students)}
+        self.stale = False
+
+        # Columns follow the template order, words only found in student decks come after
+        self.words = []
+        self.english = []
+        self.word_columns = {}
+        for foreign, english, *_ in _read_counts(f"{USER_WORDS_DIR}/Template_{language}.csv"):
+            self._add_column(foreign, english)
+
+        decks = [list(_read_counts(f"{USER_WORDS_DIR}/{email}_{language}.csv")) for email in self.students]
+        for deck in decks:
+            for foreign, english, *_ in deck:
+                self._add_column(foreign, english)
+
+        shape = (len(self.students), len(self.words))
+        self.seen = np.zeros(shape, dtype=np.int32)
+        self.correct = np.zeros(shape, dtype=np.int32)
+        self.incorrect = np.zeros(shape, dtype=np.int32)
+        self.known = np.zeros(shape, dtype=bool)
+
+        for row, deck in enumerate(decks):
+            if not deck:
+                continue
+            columns = np.fromiter((self.word_columns[entry[0]] for entry in deck), dtype=np.intp, count=len(deck))
+            counts = np.array([entry[2:] for entry in deck], dtype=np.int32)
+            self.seen[row, columns] = counts[:, 0]
+            self.correct[row, columns] = counts[:, 1]
+            self.incorrect[row, columns] = counts[:, 2]
+            self.known[row, columns] = counts[:, 3].astype(bool)
+
+        logging.info(f"Built {shape[0]}x{shape[1]} word matrix for {classroom_code} {language}")
+
+    def _add_column(self, foreign: str, english: str):
+        if foreign not in self.word_columns:
+            self.word_columns[foreign] = len(self.words)
+            self.words.append(foreign)
+            self.english.append(english)
+
+    def update_word(self, email: str, foreign: str, seen: int, correct: int, incorrect: int, known: bool):
+        """
+        Overwrite one student's counters for one word.
+        A word without a column marks the matrix stale so the next read rebuilds it.
+        """
+        row = self.student_rows.get(email)
+        if row is None:
+            return
+        column = self.word_columns.get(foreign)
+        if column is None:
+            self.stale = True
+            return
+        self.seen[row, column] = seen
+        self.correct[row, column] = correct
+        self.incorrect[row, column] = incorrect
+        self.known[row, column] = known
+
+    def analyze(self, top_k: int = 10, min_attempts: int = 3) -> dict:
+        """
+        Compute class analytics with vectorized reductions over the matrix
+
+        param: top_k: number of hardest words to return
+        param: min_attempts: class-wide answers a word needs before it can rank as hard
+        return: dict with hardest_words, word_accuracy and struggling_clusters
+        """
+        correct_sum = self.correct.sum(axis=0)
+        incorrect_sum = self.incorrect.sum(axis=0)
+        seen_sum = self.seen.sum(axis=0)
+        known_rate = self.known.mean(axis=0) if len(self.students) else np.zeros(len(self.words))
+        attempts = correct_sum + incorrect_sum
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            accuracy = np.where(attempts > 0, correct_sum / attempts, np.nan)
+        error_rate = np.where(attempts > 0, 1.0 - np.nan_to_num(accuracy), 0.0)
+
+        # Hardest: highest error rate among words with enough attempts, ties by most incorrect answers
+        eligible = np.flatnonzero(attempts >= max(min_attempts, 1))
+        order = np.lexsort((-incorrect_sum[eligible], -error_rate[eligible]))
+        hardest_columns = eligible[order[:top_k]]
+
+        hardest_words = [{
+            'foreign': self.words[c],
+            'english': self.english[c],
+            'class_accuracy': round(float(accuracy[c]) * 100, 2),
+            'total_incorrect': int(incorrect_sum[c]),
+            'total_correct': int(correct_sum[c]),
+            'total_seen': int(seen_sum[c]),
+            'students_attempted': int(np.count_nonzero(self.seen[:, c])),
+            'known_rate': round(float(known_rate[c]) * 100, 2)
+        } for c in hardest_columns]
+
+        attempted = np.flatnonzero(attempts > 0)
+        word_accuracy = [{
+            'foreign': self.words[c],
+            'class_accuracy': round(float(accuracy[c]) * 100, 2),
+            'attempts': int(attempts[c])
+        } for c in attempted[np.argsort(accuracy[attempted], kind='stable')]]
+
+        # Students struggling (more wrong than correct and multiple wrong attempts) on the same hard words
+        clusters = []
+        if len(hardest_columns) and len(self.students):
+            struggling = ((self.incorrect[:, hardest_columns] > self.correct[:, hardest_columns]) &
+                          (self.incorrect[:, hardest_columns] > 2))
+            patterns, membership = np.unique(struggling, axis=0, return_inverse=True)
+            membership = membership.reshape(-1)
+            for pattern_id, pattern in enumerate(patterns):
+                if not pattern.any():
+                    continue
+                rows = np.flatnonzero(membership == pattern_id)
+                clusters.append({
+                    'words': [self.words[c] for c in hardest_columns[pattern]],
+                    'students': [self.students[r] for r in rows]
+                })
+            clusters.sort(key=lambda cluster: (len(cluster['students']), len(cluster['words'])), reverse=True)
+
+        return {
+            'hardest_words': hardest_words,
+            'word_accuracy': word_accuracy,
+            'struggling_clusters': clusters
+        }
+
+_lock = threading.Lock()
+_matrices = {}
+_writes = {}  # language -> number of writes recorded, lets a build notice writes it may have missed
+MAX_BUILD_ATTEMPTS = 3
+
+def get_matrix(classroom_code: str, language: str, students: list) -> ClassroomWordMatrix:
+    """
+    Return the cached matrix for a classroom and language, rebuilding it when
+    the member list changed or an update could not be applied in place.
+    A build that a write of the language raced is built again.
+
+    param: classroom_code: the classroom's code
+    param: language: one of settings.LANGUAGE_OPTIONS
+    param: students: current student emails of the classroom
+    """
+    key = (classroom_code, language)
+    for attempt in range(MAX_BUILD_ATTEMPTS):
+        with _lock:
+            matrix = _matrices.get(key)
+            if matrix is not None and not matrix.stale and matrix.students == list(students):
+                return matrix
+            writes = _writes.get(language, 0)
+
+        # Decks are read without the lock, a write landing meanwhile may be missing from the new matrix
+        matrix = ClassroomWordMatrix(classroom_code, language, students)
+        with _lock:
+            missed = _writes.get(language, 0) != writes
+            if missed and attempt < MAX_BUILD_ATTEMPTS - 1:
+                continue
+            # A build still racing writes after the last attempt is served but kept stale, so the next read rebuilds it
+            matrix.stale = missed
+            _matrices[key] = matrix
+            return matrix
+
+def record_word(email: str, language: str, word):
+    """Patch a student's cell for a Word in every cached matrix of that language."""
+    with _lock:
+        _writes[language] = _writes.get(language, 0) + 1
+        for (_, matrix_language), matrix in _matrices.items():
+            if matrix_language == language:
+                matrix.update_word(email, word.foreign, word.count_seen, word.count_correct,
+                                   word.count_incorrect, word.is_known)
+
+def invalidate_student(email: str, language: str):
+    """Mark matrices holding a student as stale after a write that touched many of their words."""
+    with _lock:
+        _writes[language] = _writes.get(language, 0) + 1
+        for (_, matrix_language), matrix in _matrices.items():
+            if matrix_language == language and email in matrix.student_rows:
+                matrix.stale = True
@@ -0,0 +1,199 @@
+"""
+ContentCache.py
+================
+Two-tier cache for generated reading content.
+An in-memory LRU sits over a disk store under ContentCache/, both keyed on
+a canonical hash of (endpoint, language, sorted words, topic, prompt
+version). Entries expire after settings.CONTENT_CACHE_TTL seconds, the
+memory tier is bounded by entry count and the disk tier by total bytes
+(least recently used files are evicted first). Hit and miss counters are
+kept per tier.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+
+CONTENT_CACHE_DIR = 'ContentCache'
+
+def make_key(endpoint: str, language: str, words: list, topic: str, prompt_version: int) -> str:
+    """
+    Canonical cache key of a generation request
+
+    param: endpoint: the reading endpoint, e.g. 'short-story'
+    param: language: the target language
+    param: words: foreign words in the prompt (order does not matter)
+    param: topic: topic of the passage, '' if none
+    param: prompt_version: bump when a prompt changes so old content is not served
+    return: hex sha256 of the canonical request
+    """
+    canonical = json.dumps({
+        'endpoint': endpoint,
+        'language': language,
+        'words': sorted(word.strip() for word in words),
+        'topic': ' '.join((topic or '').lower().split()),
+        'prompt_version': prompt_version
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class ContentCache:
+
+    def __init__(self, directory: str = CONTENT_CACHE_DIR, memory_entries: int = None,
+                 disk_bytes: int = None, ttl: float = None):
+        """
+        Create a two-tier content cache
+
+        param: directory: where disk entries are stored
+        param: memory_entries: entries kept in the memory tier
+        param: disk_bytes: total size of the disk tier before eviction
+        param: ttl: seconds an entry stays valid
+        """
+        self.directory = directory
+        self.memory_entries = memory_entries or settings.CONTENT_CACHE_MEMORY_ENTRIES
+        self.disk_bytes = disk_bytes or settings.CONTENT_CACHE_DISK_BYTES
+        self.ttl = ttl or settings.CONTENT_CACHE_TTL
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._disk = None  # key -> [size, last_used], loaded on first use
+        self._disk_total = 0
+        self._metrics = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'puts': 0,
+                         'expired': 0, 'memory_evictions': 0, 'disk_evictions': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_disk_index(self):
+        if self._disk is not None:
+            return
+        self._disk = {}
+        self._disk_total = 0
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith('.json'):
+                    continue
+                stat = os.stat(os.path.join(shard_dir, name))
+                self._disk[name[:-5]] = [stat.st_size, stat.st_mtime]
+                self._disk_total += stat.st_size
+
+    def _remember(self, key: str, expires_at: float, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._metrics['memory_evictions'] += 1
+
+    def _drop_disk(self, key: str):
+        entry = self._disk.pop(key, None)
+        if entry is not None:
+            self._disk_total -= entry[0]
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str):
+        """
+        Look a key up in memory, then on disk
+
+        param: key: from make_key()
+        return: the cached value, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._metrics['memory_hits'] += 1
+                    return entry[1]
+                del self._memory[key]
+                self._metrics['expired'] += 1
+
+            self._load_disk_index()
+            if key in self._disk:
+                try:
+                    with open(self._path(key), 'r', encoding='utf-8') as f:
+                        stored = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Dropping unreadable content cache entry {key}: {e}")
+                    stored = None
+                if stored is not None and stored['expires_at'] > now:
+                    self._disk[key][1] = now
+                    self._remember(key, stored['expires_at'], stored['value'])
+                    self._metrics['disk_hits'] += 1
+                    return stored['value']
+                self._drop_disk(key)
+                if stored is not None:
+                    self._metrics['expired'] += 1
+
+            self._metrics['misses'] += 1
+            return None
+
+    def put(self, key: str, value):
+        """
+        Store a JSON-serializable value in both tiers
+
+        param: key: from make_key()
+        param: value: the generated content
+        """
+        expires_at = time.time() + self.ttl
+        data = json.dumps({'expires_at': expires_at, 'value': value}, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._metrics['puts'] += 1
+            self._load_disk_index()
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except OSError as e:
+                # The memory tier still holds the entry
+                logging.warning(f"Could not write content cache entry {key}: {e}")
+                return
+            if key in self._disk:
+                self._disk_total -= self._disk[key][0]
+            self._disk[key] = [len(data), time.time()]
+            self._disk_total += len(data)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Remove least recently used disk entries until the tier is back under its size bound."""
+        if self._disk_total <= self.disk_bytes:
+            return
+        for key, _ in sorted(self._disk.items(), key=lambda item: item[1][1]):
+            if self._disk_total <= self.disk_bytes:
+                break
+            self._drop_disk(key)
+            self._metrics['disk_evictions'] += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current tier sizes."""
+        with self._lock:
+            self._load_disk_index()
+            lookups = self._metrics['memory_hits'] + self._metrics['disk_hits'] + self._metrics['misses']
+            hits = self._metrics['memory_hits'] + self._metrics['disk_hits']
+            return dict(self._metrics,
+                        hit_rate=round(hits / lookups * 100, 2) if lookups else 0,
+                        memory_entries=len(self._memory),
+                        disk_entries=len(self._disk),
+                        disk_bytes=self._disk_total)
+
+cache = ContentCache()
@@ -0,0 +1,144 @@
+"""
+DeckManifest.py
+================
+Lazy initialization of a user's per-language word decks.
+A small JSON manifest per user records which decks have been
+materialized from their template and validated, so only the first
+study session in a language pays for copying or checking the CSV.
+Whenever a deck file is replaced or removed the student's materialized
+summary is recomputed and cached class matrices holding them are marked
+stale, so dashboards, leaderboards and class analytics follow.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import csv
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import class_matrix
+from utils import student_summary
+
+USER_WORDS_DIR = 'UserWords'
+MIN_DECK_BYTES = 50 #files smaller than this only hold a header (same check as WalkingWindow)
+
+_lock = threading.Lock()
+_manifests = {}
+
+def user_deck_path(email: str, language: str) -> str:
+    return f"{USER_WORDS_DIR}/{email}_{language}.csv"
+
+def template_deck_path(language: str) -> str:
+    return f"{USER_WORDS_DIR}/Template_{language}.csv"
+
+def manifest_path(email: str) -> str:
+    return f"{USER_WORDS_DIR}/{email}_manifest.json"
+
+def _load_manifest(email: str) -> dict:
+    """Return the cached manifest for a user, reading it from disk on first use."""
+    manifest = _manifests.get(email)
+    if manifest is None:
+        manifest = {'decks': {}}
+        path = manifest_path(email)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                manifest.setdefault('decks', {})
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable deck manifest {path}: {e}")
+                manifest = {'decks': {}}
+        _manifests[email] = manifest
+    return manifest
+
+def _save_manifest(email: str, manifest: dict):
+    path = manifest_path(email)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def _deck_has_rows(user_file: str) -> bool:
+    """Full validation of a deck: the file parses and holds at least one row."""
+    try:
+        with open(user_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            return any(True for row in reader)
+    except (csv.Error, IOError, UnicodeDecodeError):
+        return False
+
+def ensure_user_deck(email: str, language: str) -> bool:
+    """
+    Make sure a user's deck for a language exists and is usable,
+    copying the template in if it is missing, empty or corrupted.
+    Decks already recorded in the manifest only get a stat check.
+
+    param: email: the user's email
+    param: language: one of settings.LANGUAGE_OPTIONS
+    return: True if a usable deck is in place
+    """
+    user_file = user_deck_path(email, language)
+    template = template_deck_path(language)
+
+    with _lock:
+        manifest = _load_manifest(email)
+        entry = manifest['decks'].get(language)
+
+        # Fast path: already validated and still holds more than a header
+        if entry is not None:
+            try:
+                if os.path.getsize(user_file) >= MIN_DECK_BYTES:
+                    return True
+            except OSError:
+                pass
+            logging.warning(f"Deck {user_file} is missing or empty, re-initializing")
+
+        if os.path.exists(user_file) and _deck_has_rows(user_file):
+            source = 'existing'
+        elif os.path.exists(template):
+            shutil.copy(template, user_file)
+            source = 'template'
+        else:
+            logging.warning(f"No template available to initialize {user_file}")
+            return False
+
+        manifest['decks'][language] = {
+            'source': source,
+            'validated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        _save_manifest(email, manifest)
+        logging.info(f"Initialized deck {user_file} from {source}")
+
+    if source == 'template':
+        # The summary and class matrices may still hold the counts of the deck that was replaced
+        class_matrix.invalidate_student(email, language)
+        student_summary.set_language_totals(email, language,
+                                            student_summary.compute_language_totals(email, language))
+    return True
+
+def reset_user_decks(email: str, languages: list):
+    """
+    Discard a user's decks so each one is re-materialized from its
+    template the first time it is studied
+
+    param: email: the user's email
+    param: languages: the languages to reset
+    """
+    with _lock:
+        for language in languages:
+            user_file = user_deck_path(email, language)
+            if os.path.exists(user_file):
+                os.remove(user_file)
+        manifest = {'decks': {}}
+        _manifests[email] = manifest
+        _save_manifest(email, manifest)
+
+    # Drop the removed decks' counts from the summary (and notify the leaderboards) and class matrices
+    for language in languages:
+        class_matrix.invalidate_student(email, language)
+    student_summary.rebuild_summary(email)
@@ -0,0 +1,375 @@
+"""
+EventLog.py
+================
+Append-only log of study events with time-bucketed rollups.
+Every answer and mark-known is appended as one compact CSV record
+(timestamp, user, language, word index, outcome) to the current segment
+under EventLog/segments/. Segments roll over daily or once they reach
+settings.EVENT_SEGMENT_BYTES and are never rewritten.
+
+A rollup pass reads only the bytes appended since its checkpoint and folds
+them into per-user and per-classroom daily aggregates. Passes run on a
+background thread every settings.EVENT_ROLLUP_INTERVAL seconds, so activity
+queries only read a handful of rollup rows and never scan raw events. Events are
+attributed to the classrooms the student belongs to when they are rolled up.
+
+Run from backend/:
+    python -m utils.event_log --rollup
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+
+EVENT_LOG_DIR = 'EventLog'
+SEGMENTS_DIR = os.path.join(EVENT_LOG_DIR, 'segments')
+ROLLUPS_FILE = os.path.join(EVENT_LOG_DIR, 'rollups.json')
+MEMBERS_CSV = 'ClassroomMembers.csv'
+
+# Outcome codes stored in the log
+CORRECT = 'c'
+INCORRECT = 'i'
+KNOWN = 'k'
+COUNTERS = ('answers', 'correct', 'incorrect', 'known')
+
+def outcomes_for_change(before: tuple, after: tuple) -> list:
+    """
+    Work out which events a saved word change represents
+
+    param: before: snapshot_word() of the word before the change
+    param: after: snapshot_word() of the word after the change
+    return: list of outcome codes, e.g. [CORRECT, KNOWN] for the answer that made a word known
+    """
+    outcomes = []
+    if after[1] > before[1]:
+        outcomes.append(CORRECT)
+    if after[2] > before[2]:
+        outcomes.append(INCORRECT)
+    if after[3] and not before[3]:
+        outcomes.append(KNOWN)
+    return outcomes
+
+def _empty_counters() -> dict:
+    return {counter: 0 for counter in COUNTERS}
+
+def _count(counters: dict, outcome: str):
+    if outcome == CORRECT:
+        counters['answers'] += 1
+        counters['correct'] += 1
+    elif outcome == INCORRECT:
+        counters['answers'] += 1
+        counters['incorrect'] += 1
+    elif outcome == KNOWN:
+        counters['known'] += 1
+
+class EventLog:
+
+    def __init__(self, segments_dir: str = SEGMENTS_DIR):
+        """
+        Create a writer for the segmented event log
+
+        param: segments_dir: directory holding the segment files
+        """
+        self.segments_dir = segments_dir
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_day = None
+        self._segment_number = 0
+
+    def _segment_path(self, day: str, number: int) -> str:
+        return os.path.join(self.segments_dir, f"events-{day}-{number:04d}.csv")
+
+    def _open_segment(self, day: str):
+        """Open the newest segment of a day for appending, starting a new one when it is full."""
+        os.makedirs(self.segments_dir, exist_ok=True)
+        number = 0
+        while os.path.exists(self._segment_path(day, number + 1)):
+            number += 1
+        path = self._segment_path(day, number)
+        if os.path.exists(path) and os.path.getsize(path) >= settings.EVENT_SEGMENT_BYTES:
+            number += 1
+            path = self._segment_path(day, number)
+        if self._file is not None:
+            self._file.close()
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+        self._segment_day = day
+        self._segment_number = number
+
+    def append(self, user: str, language: str, word_index: int, outcomes: list, timestamp: float = None):
+        """
+        Append one record per outcome to the current segment
+
+        param: user: the student's email
+        param: language: the language studied
+        param: word_index: position of the word in the deck the session studies
+        param: outcomes: outcome codes from outcomes_for_change()
+        param: timestamp: seconds since the epoch, now if omitted
+        """
+        if not outcomes:
+            return
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        day = datetime.fromtimestamp(timestamp).strftime('%Y%m%d')
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for outcome in outcomes:
+            writer.writerow([timestamp, user, language, word_index, outcome])
+
+        with self._lock:
+            try:
+                if (self._file is None or day != self._segment_day or
+                        self._file.tell() >= settings.EVENT_SEGMENT_BYTES):
+                    self._open_segment(day)
+                self._file.write(buffer.getvalue())
+                self._file.flush()
+            except OSError as e:
+                # Losing an activity record must never fail the answer that produced it
+                logging.error(f"Error appending to event log: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def _classroom_memberships() -> dict:
+    """Return student_email -> list of classroom codes."""
+    memberships = {}
+    if os.path.exists(MEMBERS_CSV):
+        with open(MEMBERS_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                email = row.get('student_email', '').strip()
+                code = row.get('classroom_code', '').strip().upper()
+                if email and code:
+                    memberships.setdefault(email, []).append(code)
+    return memberships
+
+class RollupStore:
+
+    def __init__(self, segments_dir: str = SEGMENTS_DIR, rollups_file: str = ROLLUPS_FILE,
+                 interval: float = None):
+        """
+        Create the daily rollups over an event log
+
+        param: segments_dir: directory holding the segment files
+        param: rollups_file: JSON file holding the aggregates and the checkpoint
+        param: interval: seconds between background rollup passes
+        """
+        self.segments_dir = segments_dir
+        self.rollups_file = rollups_file
+        self.interval = interval or settings.EVENT_ROLLUP_INTERVAL
+        self._lock = threading.Lock()  # guards _state, held only briefly by queries and merges
+        self._rollup_lock = threading.Lock()  # one rollup pass at a time
+        self._state = None
+        self._roller = None
+        self._stop = threading.Event()
+
+    def _load(self):
+        if self._state is not None:
+            return
+        state = None
+        if os.path.exists(self.rollups_file):
+            try:
+                with open(self.rollups_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Rollups unreadable, rebuilding from the event log: {e}")
+        self._state = state or {'checkpoint': {'segment': None, 'offset': 0}, 'users': {}, 'classrooms': {}}
+
+    def _store(self, data: str):
+        directory = os.path.dirname(self.rollups_file) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, self.rollups_file)
+
+    def _pending_segments(self, checkpoint: dict):
+        """Yield (segment name, start offset) for every segment with events past the checkpoint."""
+        if not os.path.isdir(self.segments_dir):
+            return
+        for name in sorted(os.listdir(self.segments_dir)):
+            if not name.endswith('.csv'):
+                continue
+            if checkpoint['segment'] is not None and name < checkpoint['segment']:
+                continue
+            offset = checkpoint['offset'] if name == checkpoint['segment'] else 0
+            if os.path.getsize(os.path.join(self.segments_dir, name)) > offset:
+                yield name, offset
+
+    def rollup(self) -> int:
+        """
+        Fold every event appended since the checkpoint into the daily aggregates.
+        The backlog is read and counted without holding the lock queries take;
+        only merging the counts into the aggregates does.
+
+        return: number of events rolled up
+        """
+        with self._rollup_lock:
+            with self._lock:
+                self._load()
+                checkpoint = dict(self._state['checkpoint'])
+            # Only this pass writes the aggregates, so reading them here without the lock is safe
+            users = self._state['users']
+            user_deltas = {}
+            classroom_deltas = {}
+            memberships = None
+            processed = 0
+
+            for name, offset in list(self._pending_segments(checkpoint)):
+                with open(os.path.join(self.segments_dir, name), 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+                # A writer may be mid-record, stop at the last complete line
+                end = data.rfind(b'\n') + 1
+                if end == 0:
+                    continue
+                if memberships is None:
+                    memberships = _classroom_memberships()
+
+                for record in csv.reader(io.StringIO(data[:end].decode('utf-8'))):
+                    try:
+                        timestamp, user, language, _, outcome = record
+                        day = datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d')
+                    except ValueError:
+                        logging.warning(f"Skipping malformed event in {name}: {record}")
+                        continue
+                    user_key = f"{user}|{language}|{day}"
+                    user_counters = user_deltas.get(user_key)
+                    first_event_of_day = user_counters is None and user_key not in users
+                    if user_counters is None:
+                        user_counters = user_deltas[user_key] = _empty_counters()
+                    _count(user_counters, outcome)
+
+                    for code in memberships.get(user, ()):
+                        classroom_key = f"{code}|{language}|{day}"
+                        classroom_counters = classroom_deltas.get(classroom_key)
+                        if classroom_counters is None:
+                            classroom_counters = classroom_deltas[classroom_key] = dict(_empty_counters(), active_students=0)
+                        _count(classroom_counters, outcome)
+                        if first_event_of_day:
+                            classroom_counters['active_students'] += 1
+                    processed += 1
+
+                checkpoint = {'segment': name, 'offset': offset + end}
+
+            if not processed:
+                return 0
+            with self._lock:
+                for table, deltas in (('users', user_deltas), ('classrooms', classroom_deltas)):
+                    rows = self._state[table]
+                    for key, delta in deltas.items():
+                        row = rows.get(key)
+                        if row is None:
+                            rows[key] = delta
+                        else:
+                            for counter, value in delta.items():
+                                row[counter] = row.get(counter, 0) + value
+                self._state['checkpoint'] = checkpoint
+                data = json.dumps(self._state)
+            self._store(data)
+            logging.info(f"Rolled up {processed} events")
+            return processed
+
+    def start(self):
+        """Start the periodic rollup thread once; later calls do nothing."""
+        if self._roller is not None:
+            return
+        with self._lock:
+            if self._roller is not None:
+                return
+            self._roller = threading.Thread(target=self._rollup_loop, name='event-rollup', daemon=True)
+            self._roller.start()
+
+    def _rollup_loop(self):
+        while True:
+            try:
+                self.rollup()
+            except Exception as e:
+                logging.error(f"Rolling up the event log failed: {e}", exc_info=True)
+            if self._stop.wait(self.interval):
+                return
+
+    def _series(self, table: str, prefix: str, days: int, language: str, extra: tuple = ()) -> dict:
+        """
+        Daily counters for the last `days` days of one user or classroom, summed over languages unless one is given.
+        Only reads the rollups, which the background thread keeps within settings.EVENT_ROLLUP_INTERVAL of the log.
+        """
+        self.start()
+        languages = [language] if language else settings.LANGUAGE_OPTIONS
+        today = date.today()
+        series = []
+        totals = dict(_empty_counters(), **{key: 0 for key in extra})
+        with self._lock:
+            self._load()
+            rows = self._state[table]
+            for back in range(days - 1, -1, -1):
+                day = (today - timedelta(days=back)).isoformat()
+                counters = dict(_empty_counters(), **{key: 0 for key in extra})
+                for lang in languages:
+                    row = rows.get(f"{prefix}|{lang}|{day}")
+                    if row:
+                        for key in counters:
+                            counters[key] += row.get(key, 0)
+                for key in totals:
+                    totals[key] += counters[key]
+                series.append(dict(counters, date=day))
+        return {'days': series, 'totals': totals}
+
+    def user_activity(self, email: str, days: int = 7, language: str = None) -> dict:
+        """
+        Daily activity of a student
+
+        param: email: the student's email
+        param: days: number of days back, including today
+        param: language: restrict to one language, None for all
+        return: dict with a per-day list and totals of answers, correct, incorrect and known
+        """
+        return self._series('users', email.strip(), days, language)
+
+    def classroom_activity(self, classroom_code: str, days: int = 7, language: str = None) -> dict:
+        """
+        Daily activity of a classroom, like user_activity() plus active_students per day
+        (summed over languages, a student active in two languages counts twice)
+        """
+        return self._series('classrooms', classroom_code.strip().upper(), days, language, ('active_students',))
+
+events = EventLog()
+rollups = RollupStore()
+
+def record(user: str, language: str, word_index: int, before: tuple, after: tuple):
+    """Append the events a saved word change represents to the shared log."""
+    events.append(user, language, word_index, outcomes_for_change(before, after))
+    rollups.start()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Roll up the study event log into daily aggregates.')
+    parser.add_argument('--rollup', action='store_true', help='fold new events into the rollups')
+    parser.add_argument('--user', help='print daily activity of a student')
+    parser.add_argument('--classroom', help='print daily activity of a classroom')
+    parser.add_argument('--days', type=int, default=7, help='number of days to print')
+    args = parser.parse_args(argv)
+
+    if not (args.rollup or args.user or args.classroom):
+        parser.error('give --rollup, --user or --classroom')
+    # Activity is printed from the rollups, bring them up to date first
+    print(f"Rolled up {rollups.rollup()} events")
+    if args.user:
+        print(json.dumps(rollups.user_activity(args.user, args.days), indent=2))
+    if args.classroom:
+        print(json.dumps(rollups.classroom_activity(args.classroom, args.days), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+FillInBlank.py
+================
+Fill-in-the-blank sentences: the prompt, cleanup of the model's reply,
+validation, and a background pool of ready sentences per word.
+The pool periodically scans the words in active walking windows and
+pre-generates validated sentences for them on a bounded worker pool, so
+the endpoint can usually pop a sentence instead of waiting on the model.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import logging
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+
+def build_prompt(language_name: str, foreign: str) -> str:
+    return f"""Write one complete sentence in {language_name} using "{foreign}". Place the word in the middle or end of the sentence, not at the beginning. Avoid exclamations. No explanations, no English, just the sentence."""
+
+def clean_generated_sentence(raw_text: str) -> str:
+    """
+    Extract only the sentence from a model reply - remove any English explanations or metadata
+
+    param: raw_text: the model's reply
+    return: the cleaned sentence
+    """
+    raw_text = raw_text.strip()
+    # Split by common separators and take the first substantial line
+    lines = raw_text.split('\n')
+    sentence = None
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        # Skip lines that are clearly English explanations (contain common English words)
+        english_indicators = ['means', 'translation', 'example', 'sentence', 'word', 'here', 'this is']
+        if any(indicator in line.lower() for indicator in english_indicators):
+            continue
+        # Skip lines that are just punctuation or very short
+        if len(line) < 5:
+            continue
+        # Take the first substantial line that looks like a sentence
+        sentence = line
+        # Remove trailing punctuation that might be from formatting
+        sentence = sentence.rstrip('.,;:')
+        break
+
+    # Fallback: if no good line found, use the first line and clean it
+    if not sentence:
+        sentence = raw_text.split('\n')[0].strip()
+        # Remove common prefixes/suffixes that might be added
+        prefixes_to_remove = ['Sentence:', 'Example:', 'Here is:', 'Translation:']
+        for prefix in prefixes_to_remove:
+            if sentence.lower().startswith(prefix.lower()):
+                sentence = sentence[len(prefix):].strip()
+        sentence = sentence.rstrip('.,;:')
+
+    # Final cleanup: remove quotes if the entire sentence is quoted
+    if sentence.startswith('"') and sentence.endswith('"'):
+        sentence = sentence[1:-1]
+    elif sentence.startswith("'") and sentence.endswith("'"):
+        sentence = sentence[1:-1]
+
+    # Remove exclamation marks (replace with period if at end, or remove if in middle)
+    if '!' in sentence:
+        sentence = sentence.replace('!', '.')
+        # Remove duplicate periods
+        while '..' in sentence:
+            sentence = sentence.replace('..', '.')
+        sentence = sentence.rstrip('.')
+
+    return sentence
+
+def sentence_problem(sentence: str, foreign: str):
+    """
+    Check a cleaned sentence for its target word
+
+    param: sentence: the cleaned sentence
+    param: foreign: the target word
+    return: a description of the problem, or None if the sentence is usable
+    """
+    # Verify the sentence contains the target word (case-insensitive)
+    word_pos = sentence.lower().find(foreign.lower())
+    if word_pos < 0:
+        return f"Target word '{foreign}' not found in generated sentence: {sentence}"
+    # Check if word is at the very beginning (first 5 characters), prefer middle/end
+    if word_pos < 5:
+        return f"Target word '{foreign}' appears near the beginning of sentence: {sentence}"
+    return None
+
+BATCH_LINE = re.compile(r'^\s*(\d+)\s*[.):-]\s*(.+)$')
+
+def build_batch_prompt(language_name: str, foreigns: list) -> str:
+    numbered = '\n'.join(f"{i}. {foreign}" for i, foreign in enumerate(foreigns, start=1))
+    return f"""For each numbered word below, write one complete sentence in {language_name} using that word. Place the word in the middle or end of its sentence, not at the beginning. Avoid exclamations. Reply with exactly one line per word in the form "<number>. <sentence>". No explanations, no English.
+{numbered}"""
+
+def parse_batch_reply(raw_text: str, foreigns: list) -> dict:
+    """
+    Split a reply to build_batch_prompt() into one cleaned, validated sentence per word
+
+    param: raw_text: the model's reply
+    param: foreigns: the target words in prompt order
+    return: dict foreign -> sentence for every word that got a usable sentence
+    """
+    sentences = {}
+    for line in raw_text.splitlines():
+        match = BATCH_LINE.match(line)
+        if not match:
+            continue
+        number = int(match.group(1))
+        if not 1 <= number <= len(foreigns) or foreigns[number - 1] in sentences:
+            continue
+        foreign = foreigns[number - 1]
+        sentence = clean_generated_sentence(match.group(2))
+        problem = sentence_problem(sentence, foreign)
+        if problem:
+            logging.info(f"Discarding batched sentence: {problem}")
+            continue
+        sentences[foreign] = sentence
+    return sentences
+
+class SentencePool:
+
+    def __init__(self, generate, active_words, check=None, pool_size: int = None, workers: int = None):
+        """
+        Create a pool of pre-generated sentences per (language, word)
+
+        param: generate: function (language, foreign) -> raw model reply
+        param: active_words: function returning (language, foreign) pairs currently being studied
+        param: check: function called before queueing or making a generation, raises to hold refills (e.g. a quota)
+        param: pool_size: sentences kept ready per word
+        param: workers: sentences generated at the same time
+        """
+        self.generate = generate
+        self.active_words = active_words
+        self.check = check
+        self.pool_size = pool_size or settings.SENTENCE_POOL_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=workers or settings.SENTENCE_POOL_WORKERS,
+                                            thread_name_prefix='sentence-pool')
+        self._lock = threading.Lock()
+        self._pools = {}  # (language, foreign) -> deque of sentences
+        self._in_flight = {}  # (language, foreign) -> number of queued or running generations
+        self._stop = threading.Event()
+        self._scanner = None
+        self._held = False  # whether check() is holding refills, so it is logged once
+
+    def start(self):
+        """Start the background scanner once; later calls do nothing."""
+        with self._lock:
+            if self._scanner is not None:
+                return
+            self._scanner = threading.Thread(target=self._scan_loop, name='sentence-pool-scanner', daemon=True)
+            self._scanner.start()
+
+    def stop(self, wait: bool = False):
+        """Stop scanning and drop queued generations, waiting for running ones if asked."""
+        self._stop.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def pop(self, language: str, foreign: str):
+        """Take a ready sentence for a word, or None if the pool for it is empty."""
+        with self._lock:
+            pool = self._pools.get((language, foreign))
+            if pool:
+                return pool.popleft()
+        return None
+
+    def _allowed(self) -> bool:
+        if self.check is None:
+            return True
+        try:
+            self.check()
+        except Exception as e:
+            if not self._held:
+                logging.warning(f"Holding sentence pre-generation: {e}")
+            self._held = True
+            return False
+        self._held = False
+        return True
+
+    def request_refill(self, language: str, foreign: str):
+        """Top a word's pool up to its size in the background."""
+        if not self._allowed():
+            return
+        key = (language, foreign)
+        with self._lock:
+            missing = self.pool_size - len(self._pools.get(key, ())) - self._in_flight.get(key, 0)
+            # Bound the backlog so a burst of new sessions cannot queue unbounded model calls
+            backlog = sum(self._in_flight.values())
+            missing = min(missing, settings.SENTENCE_POOL_MAX_PENDING - backlog)
+            if missing <= 0:
+                return
+            self._in_flight[key] = self._in_flight.get(key, 0) + missing
+        try:
+            for _ in range(missing):
+                self._executor.submit(self._fill, key)
+        except RuntimeError:
+            # The pool was stopped
+            return
+
+    def _fill(self, key: tuple):
+        language, foreign = key
+        sentence = None
+        try:
+            # The check may have started failing while this generation was queued
+            if self._allowed():
+                sentence = clean_generated_sentence(self.generate(language, foreign))
+                problem = sentence_problem(sentence, foreign)
+                if problem:
+                    logging.info(f"Discarding pooled sentence: {problem}")
+                    sentence = None
+        except Exception as e:
+            logging.warning(f"Pre-generating a sentence for '{foreign}' failed: {e}")
+        with self._lock:
+            remaining = self._in_flight.get(key, 1) - 1
+            if remaining > 0:
+                self._in_flight[key] = remaining
+            else:
+                self._in_flight.pop(key, None)
+            if sentence is not None:
+                pool = self._pools.setdefault(key, deque())
+                if sentence not in pool:
+                    pool.append(sentence)
+
+    def scan(self):
+        """Refill pools of words in active windows and drop pools of words no longer studied."""
+        active = set(self.active_words())
+        with self._lock:
+            for key in [key for key in self._pools if key not in active]:
+                del self._pools[key]
+        for language, foreign in active:
+            self.request_refill(language, foreign)
+
+    def _scan_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                logging.error(f"Sentence pool scan failed: {e}")
+            self._stop.wait(settings.SENTENCE_POOL_SCAN_INTERVAL)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'words': len(self._pools),
+                'ready_sentences': sum(len(pool) for pool in self._pools.values()),
+                'in_flight': sum(self._in_flight.values())
+            }
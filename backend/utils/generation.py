@@ -0,0 +1,258 @@
+"""
+Generation.py
+================
+Text generation client for the reading endpoints.
+Each attempt runs on a shared worker pool under its own deadline. When the
+first model has not answered by a latency percentile of recent calls, a
+hedged request goes to the next model; a failed attempt falls through to
+the next model immediately. The first successful answer wins and the other
+attempts are cancelled or abandoned. Calls go to a provider from
+utils/generation_providers.py, created once and reused by every request.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+from utils.generation_providers import GENAI_AVAILABLE, create_provider
+
+class GenerationError(Exception):
+    """Raised when every attempt of a generation failed or timed out."""
+
+class GenerationClient:
+
+    def __init__(self, provider, models: list = None, attempt_timeout: float = None,
+                 hedge_percentile: float = None, hedge_delay: float = None, workers: int = None):
+        """
+        Create a generation client
+
+        param: provider: a GenerationProvider
+        param: models: models in order of preference
+        param: attempt_timeout: seconds each attempt may take
+        param: hedge_percentile: latency percentile of recent successes after which a hedge is sent
+        param: hedge_delay: hedge delay used until enough latencies were observed
+        param: workers: size of the worker pool running attempts
+        """
+        self.provider = provider
+        self.models = list(models or settings.GENERATION_MODELS)
+        self.attempt_timeout = attempt_timeout or settings.GENERATION_ATTEMPT_TIMEOUT
+        self.hedge_percentile = hedge_percentile or settings.GENERATION_HEDGE_PERCENTILE
+        self.default_hedge_delay = hedge_delay or settings.GENERATION_HEDGE_DELAY
+        self._executor = ThreadPoolExecutor(max_workers=workers or settings.GENERATION_WORKERS,
+                                            thread_name_prefix='generation')
+        self._latencies = deque(maxlen=200)
+        self._first_chunk_latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, latencies: deque = None) -> float:
+        """Seconds to wait on an attempt before hedging, the configured percentile of recent latencies."""
+        latencies = self._latencies if latencies is None else latencies
+        with self._lock:
+            if len(latencies) < settings.GENERATION_HEDGE_MIN_SAMPLES:
+                return self.default_hedge_delay
+            ordered = sorted(latencies)
+        index = min(len(ordered) - 1, math.ceil(self.hedge_percentile / 100 * len(ordered)) - 1)
+        # A floor keeps jitter on very fast responses from hedging nearly every call
+        return min(max(ordered[index], settings.GENERATION_HEDGE_MIN_DELAY), self.attempt_timeout)
+
+    def _timed(self, model: str, prompt: str):
+        started = time.monotonic()
+        text = self.provider.generate(model, prompt)
+        if not text or not text.strip():
+            raise GenerationError(f"{model} returned an empty response")
+        return text, time.monotonic() - started
+
+    def generate(self, prompt: str) -> str:
+        """
+        Generate text for a prompt
+
+        param: prompt: the prompt
+        return: the generated text
+        raise: GenerationError if every attempt failed or timed out
+        """
+        # With a single model the hedge goes to the same model again
+        plan = self.models if len(self.models) > 1 else self.models * 2
+        pending = {}  # future -> (model, deadline)
+        errors = []
+        launched = 0
+        hedged = False
+        hedge_delay = self.hedge_delay()
+        hedge_at = time.monotonic() + hedge_delay
+
+        def launch():
+            nonlocal launched
+            model = plan[launched]
+            launched += 1
+            future = self._executor.submit(self._timed, model, prompt)
+            pending[future] = (model, time.monotonic() + self.attempt_timeout)
+
+        launch()
+        while pending:
+            now = time.monotonic()
+            wake = min(deadline for _, deadline in pending.values())
+            if not hedged and launched < len(plan):
+                wake = min(wake, hedge_at)
+            done, _ = wait(list(pending), timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                model, _ = pending.pop(future)
+                try:
+                    text, latency = future.result()
+                except Exception as e:
+                    errors.append(f"{model}: {e}")
+                    # Fall back right away instead of waiting for the hedge delay
+                    if launched < len(plan):
+                        launch()
+                    continue
+                with self._lock:
+                    self._latencies.append(latency)
+                self._abandon(pending)
+                if model != plan[0]:
+                    logging.info(f"Generation answered by {model} after {latency:.2f}s")
+                return text.strip()
+
+            now = time.monotonic()
+            for future, (model, deadline) in list(pending.items()):
+                if now >= deadline:
+                    pending.pop(future)
+                    future.cancel()
+                    errors.append(f"{model}: timed out after {self.attempt_timeout}s")
+                    if launched < len(plan):
+                        launch()
+            if not hedged and pending and launched < len(plan) and now >= hedge_at:
+                hedged = True
+                logging.info(f"Hedging generation to {plan[launched]} after {hedge_delay:.2f}s")
+                launch()
+
+        raise GenerationError('; '.join(errors) or 'no models configured')
+
+    def stream(self, prompt: str):
+        """
+        Stream text for a prompt. Attempts race for the first chunk the same way
+        generate() races for a full answer; once one model has produced text only
+        that model is followed and the others are cancelled.
+
+        param: prompt: the prompt
+        return: generator of text chunks
+        raise: GenerationError if no model produced text in time, or the chosen model
+               failed or stalled for longer than the attempt timeout mid-stream
+        """
+        plan = self.models if len(self.models) > 1 else self.models * 2
+        events = queue.Queue()
+        attempts = []  # [model, first chunk deadline, cancel event, alive]
+        errors = []
+        hedged = False
+        hedge_delay = self.hedge_delay(self._first_chunk_latencies)
+        started = time.monotonic()
+        hedge_at = started + hedge_delay
+
+        def run(attempt, model, cancel):
+            try:
+                for chunk in self.provider.stream(model, prompt):
+                    if cancel.is_set():
+                        return
+                    events.put((attempt, 'chunk', chunk))
+                events.put((attempt, 'done', None))
+            except Exception as e:
+                events.put((attempt, 'error', e))
+
+        def launch():
+            model = plan[len(attempts)]
+            cancel = threading.Event()
+            attempts.append([model, time.monotonic() + self.attempt_timeout, cancel, True])
+            self._executor.submit(run, len(attempts) - 1, model, cancel)
+
+        def fail(attempt, reason):
+            attempts[attempt][2].set()
+            attempts[attempt][3] = False
+            errors.append(f"{attempts[attempt][0]}: {reason}")
+            if len(attempts) < len(plan):
+                launch()
+
+        winner = None
+        launch()
+        try:
+            while True:
+                now = time.monotonic()
+                if winner is None:
+                    live = [a for a in attempts if a[3]]
+                    if not live:
+                        raise GenerationError('; '.join(errors))
+                    wake = min(a[1] for a in live)
+                    if not hedged and len(attempts) < len(plan):
+                        wake = min(wake, hedge_at)
+                else:
+                    # Once text is flowing the deadline applies to the gap between chunks
+                    wake = last_chunk + self.attempt_timeout
+                try:
+                    attempt, kind, payload = events.get(timeout=max(0.0, wake - now))
+                except queue.Empty:
+                    now = time.monotonic()
+                    if winner is not None:
+                        raise GenerationError(f"{attempts[winner][0]}: stalled for {self.attempt_timeout}s")
+                    for index, (model, deadline, _, alive) in enumerate(attempts):
+                        if alive and now >= deadline:
+                            fail(index, f"no text after {self.attempt_timeout}s")
+                    if not hedged and len(attempts) < len(plan) and now >= hedge_at:
+                        hedged = True
+                        logging.info(f"Hedging streamed generation to {plan[len(attempts)]} after {hedge_delay:.2f}s")
+                        launch()
+                    continue
+
+                if winner is None:
+                    if not attempts[attempt][3]:
+                        continue
+                    if kind == 'chunk':
+                        winner = attempt
+                        last_chunk = time.monotonic()
+                        with self._lock:
+                            self._first_chunk_latencies.append(last_chunk - started)
+                        for index, other in enumerate(attempts):
+                            if index != winner:
+                                other[2].set()
+                        yield payload
+                    else:
+                        fail(attempt, payload if kind == 'error' else 'empty response')
+                elif attempt == winner:
+                    if kind == 'chunk':
+                        last_chunk = time.monotonic()
+                        yield payload
+                    elif kind == 'done':
+                        return
+                    else:
+                        raise GenerationError(f"{attempts[winner][0]}: {payload}")
+        finally:
+            # Also reached when the caller stops reading, e.g. the client disconnected
+            for other in attempts:
+                other[2].set()
+
+    def _abandon(self, pending: dict):
+        """Cancel attempts that have not started and stop waiting on the running ones."""
+        for future in pending:
+            future.cancel()
+        pending.clear()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_generation_client():
+    """
+    Return the shared generation client, or None when the selected provider cannot run
+    here (GENERATION_PROVIDER=gemini without GEMINI_API_KEY or the google-genai package)
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            provider = create_provider(os.getenv('GENERATION_PROVIDER', 'gemini'), settings.GENERATION_ATTEMPT_TIMEOUT)
+            if provider is not None:
+                _client = GenerationClient(provider)
+        return _client
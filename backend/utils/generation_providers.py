@@ -0,0 +1,173 @@
+"""
+GenerationProviders.py
+================
+Text generation providers behind utils/generation.py.
+A provider turns (model, prompt) into text, whole or streamed. The Gemini
+provider wraps one long-lived google-genai client; the local provider is a
+deterministic offline stand-in with injectable latency and errors for
+tests, load tests and benchmarks.
+
+Select one with the GENERATION_PROVIDER environment variable:
+    gemini (default)  needs GEMINI_API_KEY and the google-genai package
+    local             configured by LOCAL_PROVIDER_LATENCY, LOCAL_PROVIDER_JITTER,
+                      LOCAL_PROVIDER_CHUNK_DELAY, LOCAL_PROVIDER_ERROR_RATE and
+                      LOCAL_PROVIDER_SEED
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import os
+import random
+import re
+import threading
+import time
+
+# Try to import Gemini API (will fail gracefully if not installed)
+try:
+    from google import genai
+    from google.genai import types as genai_types
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+    genai = None
+    genai_types = None
+
+class ProviderError(Exception):
+    """Raised by a provider for a failed call (the local provider raises it for injected errors)."""
+
+class GenerationProvider:
+    """Interface of a text generation provider."""
+
+    name = 'provider'
+
+    def generate(self, model: str, prompt: str) -> str:
+        """Return the full text for a prompt."""
+        raise NotImplementedError
+
+    def stream(self, model: str, prompt: str):
+        """Yield text chunks for a prompt, by default the full text as one chunk."""
+        yield self.generate(model, prompt)
+
+class GeminiProvider(GenerationProvider):
+
+    name = 'gemini'
+
+    def __init__(self, attempt_timeout: float):
+        """
+        Wrap one long-lived Gemini client, its HTTP connections are pooled across requests
+
+        param: attempt_timeout: seconds before the HTTP call itself gives up, so abandoned
+                                attempts do not hold a worker thread much past their deadline
+        """
+        # Client automatically gets API key from GEMINI_API_KEY environment variable
+        self.client = genai.Client(http_options=genai_types.HttpOptions(timeout=int(attempt_timeout * 1000)))
+
+    def generate(self, model: str, prompt: str) -> str:
+        response = self.client.models.generate_content(model=model, contents=prompt)
+        return response.text
+
+    def stream(self, model: str, prompt: str):
+        """Yield text chunks as the model produces them."""
+        for chunk in self.client.models.generate_content_stream(model=model, contents=prompt):
+            if chunk.text:
+                yield chunk.text
+
+NUMBERED_WORD = re.compile(r'^(\d+)\. (.+)$', re.MULTILINE)
+QUOTED_WORD = re.compile(r'using "([^"]+)"')
+LISTED_WORD = re.compile(r'(\S+) \(')
+
+def local_response(model: str, prompt: str) -> str:
+    """
+    Canned reply shaped like the real one for each reading prompt: numbered lines for
+    batched sentences, one sentence for a single word, paragraphs for stories and passages
+    """
+    numbered = NUMBERED_WORD.findall(prompt)
+    if numbered:
+        return '\n'.join(f"{number}. Hoy vemos {word} en la casa." for number, word in numbered)
+    quoted = QUOTED_WORD.search(prompt)
+    if quoted:
+        return f"Hoy vemos {quoted.group(1)} en la casa."
+    words = LISTED_WORD.findall(prompt) or ['palabra']
+    paragraphs = []
+    for start in range(0, len(words), 4):
+        paragraphs.append(' '.join(f"Hoy vemos {word} en la casa." for word in words[start:start + 4]))
+    return '\n\n'.join(paragraphs)
+
+class LocalProvider(GenerationProvider):
+
+    name = 'local'
+
+    def __init__(self, latency=0.0, jitter: float = 0.0, chunk_delay: float = 0.0,
+                 error_rate: float = 0.0, failures: dict = None, seed: int = 0, respond=None):
+        """
+        Deterministic offline provider
+
+        param: latency: seconds per call (before the first chunk when streaming), or dict model -> seconds
+        param: jitter: extra seconds drawn uniformly from [0, jitter) per call
+        param: chunk_delay: seconds between streamed chunks
+        param: error_rate: fraction of calls that raise ProviderError
+        param: failures: dict model -> exception always raised by calls to that model
+        param: seed: seed of the generator behind jitter and errors, the same seed and call
+                     order give the same latencies and failures
+        param: respond: function (model, prompt) -> text, local_response by default
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.failures = failures or {}
+        self.respond = respond or local_response
+        self.calls = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(latency=float(os.getenv('LOCAL_PROVIDER_LATENCY', '0')),
+                   jitter=float(os.getenv('LOCAL_PROVIDER_JITTER', '0')),
+                   chunk_delay=float(os.getenv('LOCAL_PROVIDER_CHUNK_DELAY', '0')),
+                   error_rate=float(os.getenv('LOCAL_PROVIDER_ERROR_RATE', '0')),
+                   seed=int(os.getenv('LOCAL_PROVIDER_SEED', '0')))
+
+    def _wait(self, model: str):
+        with self._lock:
+            self.calls.append(model)
+            extra = self._random.random() * self.jitter
+            failed = self._random.random() < self.error_rate
+        latency = self.latency.get(model, 0.0) if isinstance(self.latency, dict) else self.latency
+        if latency + extra:
+            time.sleep(latency + extra)
+        if model in self.failures:
+            raise self.failures[model]
+        if failed:
+            raise ProviderError(f"injected error from {model}")
+
+    def generate(self, model: str, prompt: str) -> str:
+        self._wait(model)
+        return self.respond(model, prompt)
+
+    def stream(self, model: str, prompt: str):
+        """Yield the response word by word."""
+        self._wait(model)
+        for i, piece in enumerate(self.respond(model, prompt).split(' ')):
+            if i and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield piece if i == 0 else ' ' + piece
+
+def create_provider(name: str, attempt_timeout: float):
+    """
+    Build the provider named by GENERATION_PROVIDER
+
+    param: name: 'gemini' or 'local'
+    param: attempt_timeout: per-call timeout handed to network providers
+    return: the provider, or None if it cannot run here (no API key or package)
+    raise: ValueError for an unknown name
+    """
+    name = (name or 'gemini').lower()
+    if name == 'local':
+        return LocalProvider.from_env()
+    if name == 'gemini':
+        if os.getenv('GEMINI_API_KEY') and GENAI_AVAILABLE:
+            return GeminiProvider(attempt_timeout)
+        return None
+    raise ValueError(f"Unknown GENERATION_PROVIDER '{name}', expected gemini or local")
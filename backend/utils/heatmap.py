@@ -0,0 +1,164 @@
+"""
+Heatmap.py
+================
+Student x word heatmaps of assignment progress rendered as PNG.
+Rendering runs on a small worker pool off the request thread using
+matplotlib's object-oriented Agg API (no pyplot global state), and the
+PNG bytes are cached keyed on the assignment's progress version so
+repeated views are free until the underlying data changes.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import io
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+
+METRICS = ('status', 'accuracy')
+STATUS_LABELS = ['Not started', 'In progress', 'Known']
+STATUS_COLORS = ['#e5e7eb', '#fbbf24', '#22c55e']
+
+_executor = None
+_lock = threading.Lock()
+_cache = OrderedDict()
+_in_flight = {}
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.HEATMAP_WORKERS, thread_name_prefix='heatmap')
+        return _executor
+
+def build_cells(students: list, words: list, progress: dict, metric: str):
+    """
+    Turn assignment progress into a students x words grid
+
+    param: students: student emails (rows)
+    param: words: assignment word dicts with foreign and english (columns)
+    param: progress: student_email -> progress group from the assignment index
+    param: metric: 'status' (0 not started, 1 in progress, 2 known) or 'accuracy' (0-100, None if unanswered)
+    return: list of rows
+    """
+    rows = []
+    for email in students:
+        student_words = (progress.get(email) or {}).get('words', {})
+        row = []
+        for word in words:
+            cell = student_words.get(f"{word['foreign']}|{word['english']}")
+            if metric == 'status':
+                if cell is None:
+                    row.append(0)
+                elif cell['is_known']:
+                    row.append(2)
+                else:
+                    row.append(1 if cell['count_seen'] > 0 else 0)
+            else:
+                attempts = (cell['count_correct'] + cell['count_incorrect']) if cell else 0
+                row.append(cell['count_correct'] / attempts * 100 if attempts else None)
+        rows.append(row)
+    return rows
+
+def render_png(title: str, students: list, word_labels: list, cells: list, metric: str) -> bytes:
+    """
+    Render a grid from build_cells() to PNG bytes
+
+    param: title: figure title
+    param: students: row labels
+    param: word_labels: column labels
+    param: cells: grid from build_cells()
+    param: metric: 'status' or 'accuracy'
+    """
+    import numpy as np
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import ListedColormap, BoundaryNorm
+
+    width = min(max(6.0, 0.35 * len(word_labels) + 3), 40.0)
+    height = min(max(3.0, 0.3 * len(students) + 2), 40.0)
+    figure = Figure(figsize=(width, height), dpi=100)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot(1, 1, 1)
+
+    if metric == 'status':
+        data = np.array(cells, dtype=float).reshape(len(students), len(word_labels))
+        cmap = ListedColormap(STATUS_COLORS)
+        norm = BoundaryNorm([-0.5, 0.5, 1.5, 2.5], cmap.N)
+        image = axes.imshow(data, cmap=cmap, norm=norm, aspect='auto', interpolation='nearest')
+        colorbar = figure.colorbar(image, ax=axes, ticks=[0, 1, 2])
+        colorbar.ax.set_yticklabels(STATUS_LABELS)
+    else:
+        data = np.array([[np.nan if value is None else value for value in row] for row in cells],
+                        dtype=float).reshape(len(students), len(word_labels))
+        image = axes.imshow(np.ma.masked_invalid(data), cmap='RdYlGn', vmin=0, vmax=100,
+                            aspect='auto', interpolation='nearest')
+        axes.set_facecolor('#e5e7eb')
+        figure.colorbar(image, ax=axes, label='Accuracy (%)')
+
+    axes.set_title(title)
+    axes.set_xticks(range(len(word_labels)))
+    axes.set_xticklabels(word_labels, rotation=90, fontsize=8)
+    axes.set_yticks(range(len(students)))
+    axes.set_yticklabels(students, fontsize=8)
+    figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+def get_heatmap(cache_key: tuple, title: str, students: list, words: list, progress: dict, metric: str) -> bytes:
+    """
+    Return a rendered heatmap, from cache when the key was rendered before.
+    Concurrent requests for the same key share one render.
+
+    param: cache_key: identifies the assignment, metric and data version
+    param: title: figure title
+    param: students: student emails (rows)
+    param: words: assignment word dicts (columns)
+    param: progress: student_email -> progress group from the assignment index
+    param: metric: 'status' or 'accuracy'
+    return: PNG bytes
+    raise: concurrent.futures.TimeoutError if rendering takes longer than settings.HEATMAP_TIMEOUT
+    """
+    with _lock:
+        png = _cache.get(cache_key)
+        if png is not None:
+            _cache.move_to_end(cache_key)
+            return png
+        future = _in_flight.get(cache_key)
+
+    if future is None:
+        cells = build_cells(students, words, progress, metric)
+        word_labels = [word['foreign'] for word in words]
+        executor = _get_executor()
+        with _lock:
+            # Another request may have rendered or started the same key meanwhile, share theirs
+            png = _cache.get(cache_key)
+            if png is not None:
+                return png
+            future = _in_flight.get(cache_key)
+            submitted = None
+            if future is None:
+                future = submitted = executor.submit(render_png, title, list(students), word_labels, cells, metric)
+                _in_flight[cache_key] = submitted
+        if submitted is not None:
+            submitted.add_done_callback(lambda done: _finish(cache_key, done))
+
+    return future.result(timeout=settings.HEATMAP_TIMEOUT)
+
+def _finish(cache_key: tuple, future):
+    with _lock:
+        _in_flight.pop(cache_key, None)
+        if future.exception() is not None:
+            logging.error(f"Heatmap rendering failed for {cache_key[0]}: {future.exception()}")
+            return
+        _cache[cache_key] = future.result()
+        _cache.move_to_end(cache_key)
+        while len(_cache) > settings.HEATMAP_CACHE_SIZE:
+            _cache.popitem(last=False)
@@ -0,0 +1,141 @@
+"""
+LeaderboardIndex.py
+================
+Per-classroom leaderboards kept in rank order.
+Each classroom holds a sorted list of (total_known, accuracy) keys that is
+updated in place whenever a member's student summary changes, so rank
+lookups are a binary search and top-N pages are a slice instead of
+recomputing and sorting every student's stats per request.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import bisect
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import student_summary
+
+_lock = threading.RLock()  # guards every leaderboard and the student -> classrooms map
+
+class ClassroomLeaderboard:
+
+    def __init__(self, classroom_code: str):
+        """
+        Create an empty leaderboard for a classroom
+
+        param: classroom_code: the classroom's code
+        """
+        self.classroom_code = classroom_code
+        self._keys = []  # sorted ascending, so the best student comes first
+        self._entries = {}  # email -> (key, stats)
+
+    @staticmethod
+    def _key(email: str, stats: dict) -> tuple:
+        # Highest total_known first, then highest accuracy, ties broken by email
+        return (-stats['total_known'], -stats['accuracy'], email)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, email: str):
+        return email in self._entries
+
+    def members(self) -> set:
+        with _lock:
+            return set(self._entries)
+
+    def update(self, email: str, stats: dict):
+        """Insert a student or move them to the position matching their new stats."""
+        self.remove(email)
+        key = self._key(email, stats)
+        bisect.insort(self._keys, key)
+        self._entries[email] = (key, stats)
+
+    def remove(self, email: str):
+        entry = self._entries.pop(email, None)
+        if entry is not None:
+            index = bisect.bisect_left(self._keys, entry[0])
+            del self._keys[index]
+
+    def rank(self, email: str):
+        """
+        Return a student's 1-based rank
+
+        param: email: the student's email
+        return: the rank, or None if the student is not on this leaderboard
+        """
+        # Summary listeners move students from other threads
+        with _lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                return None
+            return bisect.bisect_left(self._keys, entry[0]) + 1
+
+    def page(self, offset: int = 0, limit: int = None) -> list:
+        """
+        Return leaderboard entries in rank order
+
+        param: offset: number of top entries to skip
+        param: limit: maximum number of entries, None for all remaining
+        return: list of dicts with student_email, the student's stats and rank
+        """
+        with _lock:
+            end = len(self._keys) if limit is None else offset + limit
+            entries = []
+            for rank, key in enumerate(self._keys[offset:end], start=offset + 1):
+                email = key[2]
+                entries.append({'student_email': email, **self._entries[email][1], 'rank': rank})
+            return entries
+
+_boards = {}
+_student_classrooms = {}
+
+def get_leaderboard(classroom_code: str, students: list, stats_for_student) -> ClassroomLeaderboard:
+    """
+    Return the leaderboard for a classroom, reconciled with its current members.
+    Only students that joined or left since the last call are touched.
+
+    param: classroom_code: the classroom's code
+    param: students: current student emails of the classroom
+    param: stats_for_student: callable(email) returning a student's stats dict
+    return: the classroom's ClassroomLeaderboard
+    """
+    with _lock:
+        board = _boards.get(classroom_code)
+        if board is None:
+            board = ClassroomLeaderboard(classroom_code)
+            _boards[classroom_code] = board
+
+        current = set(students)
+        existing = board.members()
+        for email in existing - current:
+            board.remove(email)
+            _student_classrooms.get(email, set()).discard(classroom_code)
+        joined = current - existing
+        for email in joined:
+            _student_classrooms.setdefault(email, set()).add(classroom_code)
+
+    # Stats are read outside the lock because summary listeners take it while holding the summary lock
+    for email in joined:
+        stats = stats_for_student(email)
+        with _lock:
+            # A summary change that landed meanwhile already placed the student with fresher stats
+            if email not in board:
+                board.update(email, stats)
+    return board
+
+def _on_summary_changed(email: str, summary: dict):
+    """Move a student on every leaderboard they appear on."""
+    with _lock:
+        codes = _student_classrooms.get(email)
+        if not codes:
+            return
+        stats = student_summary.summary_stats(summary)
+        for code in codes:
+            board = _boards.get(code)
+            if board is not None:
+                board.update(email, stats)
+
+student_summary.add_listener(_on_summary_changed)
@@ -0,0 +1,180 @@
+"""
+SentenceCorpus.py
+================
+Disk-backed corpus of validated fill-in-the-blank sentences.
+Every sentence served for a word is appended to a per-language JSON Lines
+file under SentenceCorpus/ instead of being thrown away after one use. An
+inverted index from deck word to sentence ids, with the byte offset of each
+sentence, is rebuilt from the file on first use of a language and kept up
+to date on append, so a lookup reads a single line from disk.
+
+Which sentences each student has already seen is appended to
+SentenceCorpus/seen/<username>_<language>.txt, so a student is only served
+sentences that are new to them and the model is called only on a miss.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import json
+import logging
+import os
+import threading
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+
+SENTENCE_CORPUS_DIR = 'SentenceCorpus'
+
+def _normalize(foreign: str) -> str:
+    return ' '.join(foreign.lower().split())
+
+class _LanguageIndex:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets = {}  # sentence id -> byte offset of its line
+        self.words = {}  # normalized word -> list of sentence ids, oldest first
+        self.sentences = {}  # (normalized word, sentence) -> sentence id
+        self.next_id = 0
+
+    def load(self):
+        """Scan the corpus file once, dropping a partial last line left by an interrupted append."""
+        if not os.path.exists(self.path):
+            return
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                    self._index(record['id'], record['word'], record['sentence'], offset)
+                except (ValueError, KeyError) as e:
+                    logging.warning(f"Skipping unreadable line in {self.path}: {e}")
+                offset += len(line)
+                good_end = offset
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+
+    def _index(self, sentence_id: int, word: str, sentence: str, offset: int):
+        self.offsets[sentence_id] = offset
+        self.words.setdefault(word, []).append(sentence_id)
+        self.sentences[(word, sentence)] = sentence_id
+        self.next_id = max(self.next_id, sentence_id + 1)
+
+    def append(self, word: str, sentence: str) -> int:
+        sentence_id = self.next_id
+        line = json.dumps({'id': sentence_id, 'word': word, 'sentence': sentence}, ensure_ascii=False) + '\n'
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(line.encode('utf-8'))
+        self._index(sentence_id, word, sentence, offset)
+        return sentence_id
+
+    def read(self, sentence_id: int) -> str:
+        with open(self.path, 'rb') as f:
+            f.seek(self.offsets[sentence_id])
+            return json.loads(f.readline())['sentence']
+
+class SentenceCorpus:
+
+    def __init__(self, directory: str = SENTENCE_CORPUS_DIR, max_per_word: int = None):
+        """
+        Create a sentence corpus
+
+        param: directory: where the corpus files are stored
+        param: max_per_word: sentences kept per word, later ones are not stored
+        """
+        self.directory = directory
+        self.max_per_word = max_per_word or settings.SENTENCE_CORPUS_MAX_PER_WORD
+        self._lock = threading.Lock()
+        self._languages = {}  # language -> _LanguageIndex, loaded on first use
+        self._seen = {}  # (username, language) -> set of sentence ids, loaded on first use
+        self._metrics = {'hits': 0, 'misses': 0, 'stored': 0}
+
+    def _language(self, language: str) -> _LanguageIndex:
+        index = self._languages.get(language)
+        if index is None:
+            os.makedirs(self.directory, exist_ok=True)
+            index = _LanguageIndex(os.path.join(self.directory, f"{language}.jsonl"))
+            index.load()
+            self._languages[language] = index
+        return index
+
+    def _seen_path(self, user: str, language: str) -> str:
+        return os.path.join(self.directory, 'seen', f"{user}_{language}.txt")
+
+    def _seen_ids(self, user: str, language: str) -> set:
+        seen = self._seen.get((user, language))
+        if seen is None:
+            seen = set()
+            path = self._seen_path(user, language)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    seen.update(int(line) for line in f if line.strip().isdigit())
+            self._seen[(user, language)] = seen
+        return seen
+
+    def _mark_seen(self, user: str, language: str, sentence_id: int):
+        seen = self._seen_ids(user, language)
+        if sentence_id in seen:
+            return
+        seen.add(sentence_id)
+        path = self._seen_path(user, language)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(f"{sentence_id}\n")
+
+    def take(self, language: str, foreign: str, user: str):
+        """
+        Serve a stored sentence for a word that the user has not seen yet
+
+        param: language: the target language
+        param: foreign: the target word
+        param: user: the student, the sentence is marked as seen by them
+        return: the sentence, or None if every stored sentence for the word was seen
+        """
+        with self._lock:
+            index = self._language(language)
+            seen = self._seen_ids(user, language)
+            for sentence_id in index.words.get(_normalize(foreign), ()):
+                if sentence_id not in seen:
+                    sentence = index.read(sentence_id)
+                    self._mark_seen(user, language, sentence_id)
+                    self._metrics['hits'] += 1
+                    return sentence
+            self._metrics['misses'] += 1
+            return None
+
+    def keep(self, language: str, foreign: str, sentence: str, user: str = None):
+        """
+        Store a validated sentence for a word (once) and mark it as seen by the user it was served to
+
+        param: language: the target language
+        param: foreign: the word the sentence was validated for
+        param: sentence: the cleaned sentence
+        param: user: the student it was served to, None if it was not served
+        """
+        word = _normalize(foreign)
+        with self._lock:
+            index = self._language(language)
+            if (word, sentence) in index.sentences:
+                if user:
+                    self._mark_seen(user, language, index.sentences[(word, sentence)])
+                return
+            if len(index.words.get(word, ())) >= self.max_per_word:
+                return
+            sentence_id = index.append(word, sentence)
+            self._metrics['stored'] += 1
+            if user:
+                self._mark_seen(user, language, sentence_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._metrics,
+                        sentences=sum(len(index.offsets) for index in self._languages.values()),
+                        words=sum(len(index.words) for index in self._languages.values()))
+
+corpus = SentenceCorpus()
@@ -23,6 +23,70 @@ LANGUAGE_OPTIONS = ["Spanish", "French", "Arabic", "Japanese", "Mandarin", "Hier
 AUTO_TTS:bool = False
 VOLUME:int = 100
 
+# Dashboard Settings
+DASHBOARD_WORKERS:int = 4 #number of workers that rebuild missing student summaries in parallel
+DASHBOARD_POOL:str = "thread" #"thread" to stay in-process, "process" (spawned workers) for CPU-bound CSV parsing on multi-core hosts
+DASHBOARD_DEADLINE:float = 20.0 #seconds a dashboard request waits for rebuilt summaries before reporting them pending
+
+# Heatmap Settings
+HEATMAP_WORKERS:int = 2 #worker threads that render assignment heatmaps off the request thread
+HEATMAP_CACHE_SIZE:int = 64 #rendered heatmaps kept in memory
+HEATMAP_TIMEOUT:float = 30.0 #seconds a request waits for its heatmap to render
+
+# Event Log Settings
+EVENT_SEGMENT_BYTES:int = 4 * 1024 * 1024 #size at which the answer event log starts a new segment file
+EVENT_ROLLUP_INTERVAL:float = 30.0 #seconds between background passes folding new events into the daily rollups
+
+# Generation Settings
+GENERATION_MODELS = ['gemini-1.5-flash', 'gemini-2.5-flash'] #models tried in order, fastest flash models first
+GENERATION_ATTEMPT_TIMEOUT:float = 20.0 #seconds one model call may take before it is abandoned
+GENERATION_HEDGE_PERCENTILE:float = 95 #latency percentile after which a hedged request goes to the next model
+GENERATION_HEDGE_DELAY:float = 4.0 #hedge delay used until enough latencies have been observed
+GENERATION_HEDGE_MIN_SAMPLES:int = 20 #latencies needed before the percentile is trusted
+GENERATION_HEDGE_MIN_DELAY:float = 1.0 #never hedge sooner than this
+GENERATION_WORKERS:int = 8 #worker threads running model calls
+GENERATION_MAX_CONCURRENT:int = 16 #reading generations running at once across all users, identical requests count once
+GENERATION_MAX_PER_USER:int = 2 #reading generations running at once for one user
+GENERATION_QUEUE_TIMEOUT:float = 10.0 #seconds a generation waits for a free slot before the request is turned away
+
+# Text-to-Speech Settings
+TTS_WORKERS:int = 4 #pronunciations synthesized at once
+TTS_MAX_PER_LANGUAGE:int = 2 #pronunciations synthesized at once for one language
+TTS_MAX_PENDING:int = 500 #pronunciations queued or running before new requests are turned away
+TTS_WAIT_TIMEOUT:float = 5.0 #seconds a TTS request waits for new audio before answering that it is pending
+AUDIO_CACHE_MAX_BYTES:int = 200 * 1024 * 1024 #size of the audio files before the least recently used ones are deleted
+AUDIO_PACK_RELOAD_INTERVAL:float = 30.0 #seconds between checks of the packed audio archives for new entries
+AUDIO_PREWARM_ON_INIT:bool = True #pre-generate audio for a session's current words when it starts
+AUDIO_PREWARM_IN_FLIGHT:int = 8 #background pronunciations one pre-warm run keeps queued or running
+AUDIO_PREWARM_CHECKPOINT_EVERY:int = 25 #words between pre-warm progress checkpoints
+AUDIO_PREWARM_JOB_TIMEOUT:float = 60.0 #seconds a pre-warm run waits for one pronunciation before counting it failed
+
+# Content Cache Settings
+CONTENT_CACHE_MEMORY_ENTRIES:int = 512 #generated texts kept in memory
+CONTENT_CACHE_DISK_BYTES:int = 50 * 1024 * 1024 #size of the on-disk content cache before least recently used entries are evicted
+CONTENT_CACHE_TTL:float = 24 * 60 * 60 #seconds generated content is served from the cache
+
+# Sentence Pool Settings
+SENTENCE_POOL_SIZE:int = 2 #fill-in-the-blank sentences kept ready per word in an active walking window
+SENTENCE_POOL_WORKERS:int = 2 #sentences generated in the background at the same time
+SENTENCE_POOL_MAX_PENDING:int = 40 #queued background generations before new refills are skipped
+SENTENCE_POOL_SCAN_INTERVAL:float = 15.0 #seconds between scans of active walking windows
+SENTENCE_POOL_ACTIVE_SECONDS:float = 1800.0 #a walking window counts as active if a request used its session this recently
+FILL_IN_BLANK_BATCH_DEFAULT:int = 5 #fill-in-the-blank items in a batched quiz set
+FILL_IN_BLANK_BATCH_MAX:int = 10 #largest batch asked of the model in one call
+
+# Sentence Corpus Settings
+SENTENCE_CORPUS_MAX_PER_WORD:int = 50 #validated fill-in-the-blank sentences stored per word
+
+# Usage Settings
+USAGE_USER_DAILY_CALLS:int = 300 #model calls a user may cause per day, 0 for unlimited
+USAGE_USER_DAILY_TOKENS:int = 300000 #estimated tokens a user may use per day, 0 for unlimited
+USAGE_CLASSROOM_DAILY_CALLS:int = 5000 #model calls all students of a classroom may cause per day, 0 for unlimited
+USAGE_CLASSROOM_DAILY_TOKENS:int = 5000000 #estimated tokens a classroom may use per day, 0 for unlimited
+USAGE_BACKGROUND_DAILY_CALLS:int = 2000 #model calls background sentence pre-generation may make per day, 0 for unlimited
+USAGE_BACKGROUND_DAILY_TOKENS:int = 500000 #estimated tokens background sentence pre-generation may use per day, 0 for unlimited
+USAGE_FLUSH_INTERVAL:float = 30.0 #seconds between writes of the usage counters to disk
+
 # Settings Min/Max Values
 KNOWN_THRESHOLD_MIN:int = 1
 KNOWN_THRESHOLD_MAX:int = 20
@@ -0,0 +1,196 @@
+"""
+SingleFlight.py
+================
+Coalescing of identical concurrent generation requests.
+Requests carrying the same key share one in-flight call: the first one
+(the leader) runs it and every request that arrives while it runs waits
+for and receives the same result. Streams are fanned out the same way,
+late joiners first replay the chunks produced so far.
+
+Leaders also take a slot under a global and a per-user concurrency cap,
+queueing for up to a timeout before GenerationBusy is raised, so a burst
+of requests neither multiplies model calls nor overruns the provider.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+
+class GenerationBusy(Exception):
+    """Raised when a generation could not get a concurrency slot within the queue timeout."""
+
+class _Flight:
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.chunks = []
+        self.result = None
+        self.error = None
+        self.done = False
+
+    def finish(self, error=None):
+        with self.condition:
+            self.error = error
+            self.done = True
+            self.condition.notify_all()
+
+class Coalescer:
+
+    def __init__(self, max_concurrent: int = None, max_per_user: int = None, queue_timeout: float = None):
+        """
+        Create a coalescing layer
+
+        param: max_concurrent: calls running at once across all users
+        param: max_per_user: calls running at once for one user
+        param: queue_timeout: seconds a call may wait for a slot
+        """
+        self.max_concurrent = max_concurrent or settings.GENERATION_MAX_CONCURRENT
+        self.max_per_user = max_per_user or settings.GENERATION_MAX_PER_USER
+        self.queue_timeout = queue_timeout or settings.GENERATION_QUEUE_TIMEOUT
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._streams = {}
+        self._slots = threading.Condition()
+        self._active = 0
+        self._active_by_user = {}
+        self._queued = 0
+        self._metrics = {'calls': 0, 'coalesced': 0, 'rejected': 0}
+
+    def _acquire(self, user: str):
+        deadline = time.monotonic() + self.queue_timeout
+        with self._slots:
+            self._queued += 1
+            try:
+                while self._active >= self.max_concurrent or self._active_by_user.get(user, 0) >= self.max_per_user:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics['rejected'] += 1
+                        raise GenerationBusy('Too many generation requests, try again shortly')
+                    self._slots.wait(remaining)
+            finally:
+                self._queued -= 1
+            self._active += 1
+            self._active_by_user[user] = self._active_by_user.get(user, 0) + 1
+            self._metrics['calls'] += 1
+
+    def _release(self, user: str):
+        with self._slots:
+            self._active -= 1
+            remaining = self._active_by_user.get(user, 1) - 1
+            if remaining > 0:
+                self._active_by_user[user] = remaining
+            else:
+                self._active_by_user.pop(user, None)
+            self._slots.notify_all()
+
+    def _join(self, flights: dict, key: str):
+        """Return (flight, is_leader) for a key."""
+        with self._lock:
+            flight = flights.get(key)
+            if flight is not None:
+                self._metrics['coalesced'] += 1
+                return flight, False
+            flight = _Flight()
+            flights[key] = flight
+            return flight, True
+
+    def _leave(self, flights: dict, key: str, flight: _Flight, error=None):
+        with self._lock:
+            if flights.get(key) is flight:
+                del flights[key]
+        flight.finish(error)
+
+    def do(self, key: str, user: str, fn):
+        """
+        Run fn() once for all concurrent callers with the same key
+
+        param: key: canonical key of the request
+        param: user: who asked, for the per-user cap
+        param: fn: function producing the result
+        return: the result of the shared call
+        raise: GenerationBusy if no slot freed up in time, or whatever fn() raised
+        """
+        flight, leader = self._join(self._flights, key)
+        if not leader:
+            with flight.condition:
+                while not flight.done:
+                    flight.condition.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        error = None
+        try:
+            self._acquire(user)
+            try:
+                flight.result = fn()
+            finally:
+                self._release(user)
+            return flight.result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._leave(self._flights, key, flight, error)
+
+    def stream(self, key: str, user: str, produce):
+        """
+        Share one stream among all concurrent callers with the same key.
+        The stream is driven by a background thread so it completes for the
+        other callers even if the one that started it disconnects.
+
+        param: key: canonical key of the request
+        param: user: who asked, for the per-user cap
+        param: produce: function returning an iterator of chunks
+        return: iterator of chunks
+        raise: GenerationBusy (right away, before any chunk) if no slot freed up in time
+        """
+        flight, leader = self._join(self._streams, key)
+        if leader:
+            try:
+                self._acquire(user)
+            except GenerationBusy as e:
+                self._leave(self._streams, key, flight, e)
+                raise
+            threading.Thread(target=self._pump, args=(key, user, flight, produce),
+                             name='generation-stream', daemon=True).start()
+        return self._follow(flight)
+
+    def _pump(self, key: str, user: str, flight: _Flight, produce):
+        error = None
+        try:
+            for chunk in produce():
+                with flight.condition:
+                    flight.chunks.append(chunk)
+                    flight.condition.notify_all()
+        except Exception as e:
+            error = e
+        finally:
+            self._release(user)
+            self._leave(self._streams, key, flight, error)
+
+    def _follow(self, flight: _Flight):
+        index = 0
+        while True:
+            with flight.condition:
+                while index >= len(flight.chunks) and not flight.done:
+                    flight.condition.wait()
+                chunks = flight.chunks[index:]
+                index += len(chunks)
+                finished = flight.done and index >= len(flight.chunks)
+            for chunk in chunks:
+                yield chunk
+            if finished:
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    def stats(self) -> dict:
+        with self._slots:
+            return dict(self._metrics, active=self._active, queued=self._queued,
+                        in_flight=len(self._flights) + len(self._streams))
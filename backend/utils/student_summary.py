@@ -0,0 +1,333 @@
+"""
+StudentSummary.py
+================
+Materialized per-student progress totals.
+Each student has a small JSON summary holding total_known, total_correct,
+total_incorrect, total_seen and a per-language breakdown. The study write
+path keeps it current with per-word deltas, so dashboards and leaderboards
+read one record instead of parsing every language CSV.
+
+Rebuild summaries from the word CSVs with:
+    python -m utils.student_summary --all
+    python -m utils.student_summary student@example.com
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from functools import partial
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+
+SUMMARY_DIR = 'StudentSummaries'
+USER_WORDS_DIR = 'UserWords'
+TOTAL_FIELDS = ('known', 'correct', 'incorrect', 'seen')
+
+_lock = threading.RLock()
+_summaries = {}
+_listeners = []
+_executor = None
+
+def summary_path(email: str) -> str:
+    return os.path.join(SUMMARY_DIR, f"{email}.json")
+
+def empty_totals() -> dict:
+    return {field: 0 for field in TOTAL_FIELDS}
+
+def snapshot_word(word) -> tuple:
+    """Capture the counters of a Word so a later change can be applied as a delta."""
+    return (word.count_seen, word.count_correct, word.count_incorrect, bool(word.is_known))
+
+def compute_language_totals(email: str, language: str) -> dict:
+    """
+    Parse one of a student's word CSVs into per-language totals
+
+    param: email: the student's email
+    param: language: one of settings.LANGUAGE_OPTIONS
+    return: dict with known, correct, incorrect and seen counts
+    """
+    totals = empty_totals()
+    user_file = f"{USER_WORDS_DIR}/{email}_{language}.csv"
+    if not os.path.exists(user_file):
+        return totals
+
+    try:
+        with open(user_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                # Skip empty rows
+                if not row.get('Foreign', '').strip():
+                    continue
+                try:
+                    seen = int(row.get('seen', 0) or 0)
+                    correct = int(row.get('correct', 0) or 0)
+                    wrong = int(row.get('wrong', 0) or 0)
+                    known = bool(int(row.get('known', 0) or 0))
+                except (ValueError, KeyError, TypeError) as e:
+                    logging.warning(f"Error processing row for {email} {language}: {e}, row: {row}")
+                    continue
+                totals['seen'] += seen
+                totals['correct'] += correct
+                totals['incorrect'] += wrong
+                if known:
+                    totals['known'] += 1
+    except Exception as e:
+        logging.error(f"Error reading {user_file} for {email}: {e}")
+    return totals
+
+def _with_overall_totals(languages: dict) -> dict:
+    summary = {'languages': languages}
+    for field in TOTAL_FIELDS:
+        summary[f"total_{field}"] = sum(totals[field] for totals in languages.values())
+    return summary
+
+def _store(email: str, summary: dict):
+    """Cache and persist a summary, then notify listeners."""
+    _summaries[email] = summary
+    os.makedirs(SUMMARY_DIR, exist_ok=True)
+    path = summary_path(email)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, path)
+
+    for listener in list(_listeners):
+        try:
+            listener(email, summary)
+        except Exception as e:
+            logging.error(f"Student summary listener failed for {email}: {e}", exc_info=True)
+
+def compute_student_languages(email: str) -> dict:
+    """
+    Parse all of a student's language CSVs. Has no side effects so it can run in a worker process.
+
+    param: email: the student's email
+    return: dict of language -> totals
+    """
+    return {lang: compute_language_totals(email, lang) for lang in settings.LANGUAGE_OPTIONS}
+
+def _store_languages(email: str, languages: dict) -> dict:
+    summary = _with_overall_totals(languages)
+    with _lock:
+        _store(email, summary)
+    return summary
+
+def rebuild_summary(email: str) -> dict:
+    """
+    Recompute a student's summary from all of their language CSVs
+
+    param: email: the student's email
+    return: the rebuilt summary
+    """
+    email = email.strip()
+    return _store_languages(email, compute_student_languages(email))
+
+def _load_summary(email: str):
+    """Return a summary from memory or disk, or None if it was never materialized."""
+    with _lock:
+        summary = _summaries.get(email)
+        if summary is not None:
+            return summary
+
+        path = summary_path(email)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    summary = json.load(f)
+                _summaries[email] = summary
+                return summary
+            except (OSError, ValueError) as e:
+                logging.warning(f"Rebuilding unreadable summary {path}: {e}")
+    return None
+
+def get_summary(email: str) -> dict:
+    """
+    Return a student's summary from memory or disk, rebuilding it
+    from the CSVs only if it has never been materialized
+
+    param: email: the student's email
+    return: the summary dict (do not mutate)
+    """
+    email = email.strip()
+    summary = _load_summary(email)
+    if summary is None:
+        summary = rebuild_summary(email)
+    return summary
+
+def _get_executor():
+    """Lazily create the shared pool used to rebuild summaries for cold dashboards."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            if settings.DASHBOARD_POOL == 'process':
+                try:
+                    # Spawned, not forked: a fork inside a threaded server can copy locks held by other threads
+                    _executor = ProcessPoolExecutor(max_workers=settings.DASHBOARD_WORKERS,
+                                                    mp_context=multiprocessing.get_context('spawn'))
+                except (OSError, NotImplementedError, ValueError) as e:
+                    logging.warning(f"Process pool unavailable, rebuilding summaries on threads: {e}")
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.DASHBOARD_WORKERS,
+                                               thread_name_prefix='summary-rebuild')
+        return _executor
+
+def _store_future_result(email: str, future):
+    try:
+        _store_languages(email, future.result())
+    except Exception as e:
+        logging.error(f"Background summary rebuild failed for {email}: {e}")
+
+def iter_summaries(emails: list, deadline: float = None):
+    """
+    Yield (email, summary) for several students as soon as each is available.
+    Materialized summaries come first; missing ones are rebuilt in parallel on
+    the shared worker pool and streamed back as they finish.
+
+    param: emails: the students to look up
+    param: deadline: seconds to wait for rebuilds, defaults to settings.DASHBOARD_DEADLINE
+    return: generator of (email, summary); summary is None for rebuilds still
+            running at the deadline, which finish and are stored in the background
+    """
+    if deadline is None:
+        deadline = settings.DASHBOARD_DEADLINE
+
+    missing = []
+    for email in emails:
+        email = email.strip()
+        summary = _load_summary(email)
+        if summary is None:
+            missing.append(email)
+        else:
+            yield email, summary
+
+    if len(missing) == 1:
+        yield missing[0], rebuild_summary(missing[0])
+        return
+    if not missing:
+        return
+
+    executor = _get_executor()
+    futures = {executor.submit(compute_student_languages, email): email for email in missing}
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            pending.discard(future)
+            email = futures[future]
+            try:
+                summary = _store_languages(email, future.result())
+            except Exception as e:
+                logging.error(f"Parallel summary rebuild failed for {email}, rebuilding inline: {e}")
+                summary = rebuild_summary(email)
+            yield email, summary
+    except FuturesTimeoutError:
+        logging.warning(f"{len(pending)} student summaries still rebuilding after {deadline}s")
+        timed_out = [futures[future] for future in pending]
+        for future in pending:
+            future.add_done_callback(partial(_store_future_result, futures[future]))
+        pending.clear()
+        for email in timed_out:
+            yield email, None
+    finally:
+        # The caller stopped early (e.g. a closed stream), keep whatever is still being rebuilt
+        for future in pending:
+            future.add_done_callback(partial(_store_future_result, futures[future]))
+
+def apply_word_delta(email: str, language: str, before: tuple, after: tuple):
+    """
+    Update a student's summary after a single word changed
+
+    param: email: the student's email
+    param: language: the language of the word
+    param: before: snapshot_word() taken before the change
+    param: after: snapshot_word() taken after the change
+    """
+    if before == after:
+        return
+    email = email.strip()
+    with _lock:
+        summary = _load_summary(email)
+        if summary is None:
+            # A fresh rebuild already reads the saved change, applying the delta would count it twice
+            rebuild_summary(email)
+            return
+        languages = {lang: dict(totals) for lang, totals in summary['languages'].items()}
+        totals = languages.setdefault(language, empty_totals())
+        totals['seen'] += after[0] - before[0]
+        totals['correct'] += after[1] - before[1]
+        totals['incorrect'] += after[2] - before[2]
+        totals['known'] += int(after[3]) - int(before[3])
+        _store(email, _with_overall_totals(languages))
+
+def set_language_totals(email: str, language: str, totals: dict):
+    """
+    Replace one language's totals, used by write paths that already hold the whole deck
+
+    param: email: the student's email
+    param: language: the language that was written
+    param: totals: dict with known, correct, incorrect and seen counts
+    """
+    email = email.strip()
+    with _lock:
+        summary = get_summary(email)
+        languages = {lang: dict(lang_totals) for lang, lang_totals in summary['languages'].items()}
+        languages[language] = {field: int(totals.get(field, 0)) for field in TOTAL_FIELDS}
+        _store(email, _with_overall_totals(languages))
+
+def summary_stats(summary: dict) -> dict:
+    """Shape a materialized student summary into the stats returned by the API."""
+    total_correct = summary['total_correct']
+    total_incorrect = summary['total_incorrect']
+    
+    # Calculate accuracy percentage
+    total_attempts = total_correct + total_incorrect
+    accuracy = (total_correct / total_attempts * 100) if total_attempts > 0 else 0.0
+    
+    return {
+        'total_known': summary['total_known'],
+        'total_correct': total_correct,
+        'total_incorrect': total_incorrect,
+        'total_seen': summary['total_seen'],
+        'accuracy': round(accuracy, 2)
+    }
+
+def add_listener(listener):
+    """Register a callable(email, summary) invoked whenever a summary changes."""
+    _listeners.append(listener)
+
+def _all_user_emails() -> list:
+    """Emails of every user that has at least one word CSV."""
+    emails = set()
+    if os.path.exists(USER_WORDS_DIR):
+        for filename in os.listdir(USER_WORDS_DIR):
+            if not filename.endswith('.csv') or filename.startswith('Template_'):
+                continue
+            email, _, language = filename[:-len('.csv')].rpartition('_')
+            if email and language in settings.LANGUAGE_OPTIONS:
+                emails.add(email)
+    return sorted(emails)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild materialized student summaries from word CSVs.')
+    parser.add_argument('emails', nargs='*', help='students to rebuild')
+    parser.add_argument('--all', action='store_true', help='rebuild every student with a word CSV')
+    args = parser.parse_args(argv)
+
+    emails = _all_user_emails() if args.all else args.emails
+    if not emails:
+        parser.error('give at least one email or --all')
+
+    for email in emails:
+        summary = rebuild_summary(email)
+        print(f"{email}: known={summary['total_known']} seen={summary['total_seen']}")
+
+if __name__ == '__main__':
+    main()
@@ -10,9 +10,11 @@ import pygame
 import os
 import logging
 import threading
+import tempfile
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils import settings
+from utils.audio_cache import audio_cache
 import re
 
 #Base directory for audio files
@@ -20,6 +22,16 @@ import re
 BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 BASE_AUDIO_DIR = os.path.join(BACKEND_DIR, "audio_files")
 LANGUAGES = {"english": "en", "spanish": "es", "french": "fr", "arabic": "ar", "japanese": "ja", "mandarin": "zh", "tokipona": "en"}
+# Map study language names to lowercase TTS langs
+LANG_MAP = {
+    'Spanish': 'spanish',
+    'French': 'french',
+    'Arabic': 'arabic',
+    'Japanese': 'japanese',
+    'Mandarin': 'mandarin',
+    'Hieroglyphic': 'english',  # Fallback for hieroglyphic
+    'TokiPona': 'tokipona'
+}
 
 # Initialize pygame mixer (handle environments without audio devices like Cloud Run)
 _pygame_mixer_available = False
@@ -35,18 +47,22 @@ except Exception as e:
 for language in LANGUAGES:
     os.makedirs(os.path.join(BASE_AUDIO_DIR, language), exist_ok=True)
 
+def tts_lang(language):
+    """TTS lang of a study language name, e.g. 'Spanish' -> 'spanish'."""
+    return LANG_MAP.get(language, language.lower())
+
 def get_audio_file_path(word, lang):
-    """Generates a standardized path for each word's audio file based on lang."""
-    return os.path.join(BASE_AUDIO_DIR, lang, f"{word}.mp3")
+    """Generates the path of a word's audio file in the content-addressed audio cache."""
+    return audio_cache.path(word, lang)
 
-def generate_pronunciation(word, lang):
+def audio_target(word, lang):
     """
-    Generates and saves the pronunciation audio for a word if it doesn't already exist.
+    Work out what is spoken for a word and where its audio is stored.
     :param word: The word to pronounce
     :param lang: The lang of the word ('english', 'spanish', 'french')
+    :return: (spoken word, audio file path), or None if the word cannot be pronounced
     """
-    lang_code = LANGUAGES.get(lang.lower())
-    if not lang_code:
+    if not LANGUAGES.get(lang.lower()):
         logging.info(f"Language '{lang.lower()}' is not supported.")
         return None
 
@@ -57,15 +73,47 @@ def generate_pronunciation(word, lang):
             logging.warning(f"No valid Chinese characters found for pronunciation.")
             return None
 
-    # Get the path for the audio file
-    audio_file_path = get_audio_file_path(word, lang)
+    return word, get_audio_file_path(word, lang)
+
+def synthesize(word, lang, audio_file_path):
+    """
+    Synthesize a word into its audio file. The audio is written to a temporary
+    file in the same directory and renamed into place, so readers never see a
+    partly written file and concurrent writers cannot interleave. The new file
+    is then added to the audio cache, which may evict older ones.
+    :param word: The spoken word, as returned by audio_target
+    :param lang: The lang of the word
+    :param audio_file_path: Where the audio goes
+    """
+    tts = gTTS(text=word, lang=LANGUAGES[lang.lower()])
+    audio_dir = os.path.dirname(audio_file_path)
+    os.makedirs(audio_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=audio_dir, suffix='.mp3.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            tts.write_to_fp(f)
+        os.replace(tmp_path, audio_file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    audio_cache.add(audio_file_path)
+
+def generate_pronunciation(word, lang):
+    """
+    Generates and saves the pronunciation audio for a word if it doesn't already exist.
+    :param word: The word to pronounce
+    :param lang: The lang of the word ('english', 'spanish', 'french')
+    """
+    target = audio_target(word, lang)
+    if target is None:
+        return None
+    word, audio_file_path = target
 
     # Check if the file already exists
-    if not os.path.isfile(audio_file_path):
+    if not audio_cache.contains(audio_file_path):
         try:
             # Generate the pronunciation audio and save it
-            tts = gTTS(text=word, lang=lang_code)
-            tts.save(audio_file_path)
+            synthesize(word, lang, audio_file_path)
             logging.info(f"Saved pronunciation for '{word}' in {lang}.")
         except Exception as e:
             logging.error(f"Error generating pronunciation: {e}")
@@ -0,0 +1,171 @@
+"""
+TTSWorker.py
+================
+Pronunciation audio generated off the request thread.
+Jobs run on a bounded worker pool with at most one job in flight per
+(word, language): a request for a word that is already being synthesized
+joins the running job instead of starting a second one. Each language has
+its own cap on running jobs, further jobs for it wait in a per-language
+queue without holding a worker, so one busy language cannot starve the
+others. Background jobs (pre-warming) only start when no interactive job
+of their language is waiting, and are promoted when a request joins them.
+Audio files are written to a temporary file and renamed into place by
+text_to_speech.synthesize.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import logging
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+from utils import text_to_speech
+from utils.audio_cache import audio_cache
+
+MAX_REMEMBERED_FAILURES = 256
+
+class TTSBusy(Exception):
+    """Raised when the queue of pending pronunciations is full."""
+
+class TTSJob:
+
+    def __init__(self, word: str, lang: str, audio_file_path: str, background: bool = False):
+        self.word = word
+        self.lang = lang
+        self.audio_file_path = audio_file_path
+        self.background = background
+        self.status = 'pending'  # pending, running, ready or failed
+        self.error = None
+        self._done = threading.Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait for the job to finish, return whether it did."""
+        return self._done.wait(timeout)
+
+    def _finish(self, error=None):
+        self.status = 'failed' if error else 'ready'
+        self.error = error
+        self._done.set()
+
+class TTSWorkerPool:
+
+    def __init__(self, workers: int = None, max_per_language: int = None, max_pending: int = None,
+                 synthesize=None):
+        """
+        Create a pronunciation worker pool
+
+        param: workers: pronunciations synthesized at once
+        param: max_per_language: pronunciations synthesized at once for one language
+        param: max_pending: jobs queued or running before new ones are refused
+        param: synthesize: function (word, lang, path) writing the audio file, text_to_speech.synthesize by default
+        """
+        self.max_per_language = max_per_language or settings.TTS_MAX_PER_LANGUAGE
+        self.max_pending = max_pending or settings.TTS_MAX_PENDING
+        self.synthesize = synthesize or text_to_speech.synthesize
+        self._executor = ThreadPoolExecutor(max_workers=workers or settings.TTS_WORKERS,
+                                            thread_name_prefix='tts-worker')
+        self._lock = threading.Lock()
+        self._jobs = {}  # (word, lang) -> TTSJob queued or running
+        self._queues = {}  # lang -> deque of interactive jobs waiting for a language slot
+        self._background = {}  # lang -> deque of background jobs waiting for a language slot
+        self._running = {}  # lang -> jobs running
+        self._failures = OrderedDict()  # (word, lang) -> error of the last failed job
+        self._metrics = {'submitted': 0, 'joined': 0, 'ready': 0, 'failed': 0, 'refused': 0}
+
+    def submit(self, word: str, lang: str, audio_file_path: str, background: bool = False) -> TTSJob:
+        """
+        Queue a pronunciation, or join the job already in flight for the same word and language
+
+        param: word: the spoken word, as returned by text_to_speech.audio_target
+        param: lang: the lang of the word
+        param: audio_file_path: where the audio goes
+        param: background: queue behind interactive jobs (pre-warming)
+        return: the job
+        raise: TTSBusy if max_pending jobs are already queued or running
+        """
+        key = (word, lang)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._metrics['joined'] += 1
+                if job.background and not background and job.status == 'pending':
+                    # Someone is waiting for it now, move it to the interactive queue
+                    self._background[lang].remove(job)
+                    job.background = False
+                    self._queues.setdefault(lang, deque()).append(job)
+                    self._dispatch(lang)
+                return job
+            if len(self._jobs) >= self.max_pending:
+                self._metrics['refused'] += 1
+                raise TTSBusy('Too many pronunciations pending, try again shortly')
+            job = TTSJob(word, lang, audio_file_path, background)
+            self._jobs[key] = job
+            self._failures.pop(key, None)
+            self._metrics['submitted'] += 1
+            queues = self._background if background else self._queues
+            queues.setdefault(lang, deque()).append(job)
+            self._dispatch(lang)
+        return job
+
+    def _dispatch(self, lang: str):
+        """Start queued jobs of a language while it has free slots, interactive ones first; called with the lock held."""
+        for queues in (self._queues, self._background):
+            queue = queues.get(lang)
+            while queue and self._running.get(lang, 0) < self.max_per_language:
+                job = queue.popleft()
+                self._running[lang] = self._running.get(lang, 0) + 1
+                job.status = 'running'
+                self._executor.submit(self._run, job)
+            if not queue:
+                queues.pop(lang, None)
+
+    def _run(self, job: TTSJob):
+        error = None
+        try:
+            if not audio_cache.contains(job.audio_file_path, touch=False):
+                self.synthesize(job.word, job.lang, job.audio_file_path)
+                logging.info(f"Saved pronunciation for '{job.word}' in {job.lang}.")
+        except Exception as e:
+            logging.error(f"Error generating pronunciation for '{job.word}' in {job.lang}: {e}")
+            error = str(e) or type(e).__name__
+        with self._lock:
+            key = (job.word, job.lang)
+            self._jobs.pop(key, None)
+            self._running[job.lang] -= 1
+            if error:
+                self._metrics['failed'] += 1
+                self._failures[key] = error
+                while len(self._failures) > MAX_REMEMBERED_FAILURES:
+                    self._failures.popitem(last=False)
+            else:
+                self._metrics['ready'] += 1
+            job._finish(error)
+            self._dispatch(job.lang)
+
+    def status(self, word: str, lang: str, audio_file_path: str):
+        """
+        Where the pronunciation of a word stands
+
+        return: (status, error) with status ready, pending, running, failed or missing
+        """
+        if audio_cache.contains(audio_file_path, touch=False):
+            return 'ready', None
+        with self._lock:
+            job = self._jobs.get((word, lang))
+            if job is not None:
+                return job.status, None
+            error = self._failures.get((word, lang))
+        if error is not None:
+            return 'failed', error
+        return 'missing', None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._metrics, pending=len(self._jobs),
+                        running=dict((lang, count) for lang, count in self._running.items() if count))
+
+tts_pool = TTSWorkerPool()
@@ -0,0 +1,283 @@
+"""
+UsageLedger.py
+================
+Generation usage accounting and quotas per user and per classroom.
+Every model call made for a request is charged to the user who asked and
+to each classroom they belong to: calls, estimated tokens (prompt and
+reply, about four characters per token) and seconds spent waiting on the
+model. Counters live in memory and are flushed by a background thread to
+one JSON file per day under UsageLedger/.
+
+Daily quotas on calls and tokens come from settings, with per-user and
+per-classroom overrides kept in UsageLedger/quotas.json, and are checked
+before any model call so a runaway client is stopped without costing a
+call. Background pre-generation is charged to BACKGROUND_USER, which has
+its own daily quota.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import atexit
+import csv
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import settings
+from utils.assignment_index import file_signature
+
+USAGE_DIR = 'UsageLedger'
+QUOTAS_FILE = os.path.join(USAGE_DIR, 'quotas.json')
+MEMBERS_CSV = 'ClassroomMembers.csv'
+BACKGROUND_USER = 'background'  # charged for sentences pre-generated for no one in particular
+LIMITS = ('calls', 'tokens')
+
+class QuotaExceeded(Exception):
+    """Raised before a model call when the user or one of their classrooms is out of quota."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or '') + 3) // 4
+
+def _empty_counters() -> dict:
+    return {'calls': 0, 'tokens': 0, 'seconds': 0.0, 'failed': 0, 'rejected': 0}
+
+def _day(timestamp: float = None) -> str:
+    return datetime.fromtimestamp(timestamp if timestamp is not None else time.time()).strftime('%Y%m%d')
+
+def _seconds_until_tomorrow() -> int:
+    now = datetime.now()
+    tomorrow = datetime(now.year, now.month, now.day) + timedelta(days=1)
+    return max(1, int((tomorrow - now).total_seconds()))
+
+class UsageLedger:
+
+    def __init__(self, directory: str = USAGE_DIR, quotas_file: str = QUOTAS_FILE):
+        """
+        Create a usage ledger
+
+        param: directory: where the daily usage files are flushed
+        param: quotas_file: JSON file of per-user and per-classroom quota overrides
+        """
+        self.directory = directory
+        self.quotas_file = quotas_file
+        self._lock = threading.Lock()
+        self._days = {}  # day -> {'users': {email: counters}, 'classrooms': {code: counters}}
+        self._dirty = set()  # days changed since the last flush
+        self._overrides = None  # loaded on first use
+        self._memberships = {}
+        self._memberships_signature = None
+        self._flush_lock = threading.Lock()  # keeps an older snapshot from overwriting a newer one
+        self._flusher = None
+        self._stop = threading.Event()
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.directory, f"usage-{day}.json")
+
+    def _day_table(self, day: str) -> dict:
+        table = self._days.get(day)
+        if table is None:
+            table = {'users': {}, 'classrooms': {}}
+            path = self._path(day)
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        table = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Ignoring unreadable usage file {path}: {e}")
+            self._days[day] = table
+        return table
+
+    def _classrooms(self, user: str) -> list:
+        """Classroom codes of a user, re-read only when the members CSV changes."""
+        signature = file_signature(MEMBERS_CSV)
+        if signature != self._memberships_signature:
+            memberships = {}
+            if signature is not None:
+                with open(MEMBERS_CSV, 'r', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        email = row.get('student_email', '').strip()
+                        code = row.get('classroom_code', '').strip().upper()
+                        if email and code:
+                            memberships.setdefault(email, []).append(code)
+            self._memberships = memberships
+            self._memberships_signature = signature
+        return self._memberships.get(user, [])
+
+    def _load_overrides(self) -> dict:
+        if self._overrides is None:
+            self._overrides = {'users': {}, 'classrooms': {}}
+            if os.path.exists(self.quotas_file):
+                try:
+                    with open(self.quotas_file, 'r', encoding='utf-8') as f:
+                        self._overrides.update(json.load(f))
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Ignoring unreadable quotas file {self.quotas_file}: {e}")
+        return self._overrides
+
+    def _limits(self, scope: str, name: str) -> dict:
+        """Daily limits of a user or classroom, 0 meaning unlimited."""
+        if scope == 'users' and name == BACKGROUND_USER:
+            limits = {'calls': settings.USAGE_BACKGROUND_DAILY_CALLS, 'tokens': settings.USAGE_BACKGROUND_DAILY_TOKENS}
+        elif scope == 'users':
+            limits = {'calls': settings.USAGE_USER_DAILY_CALLS, 'tokens': settings.USAGE_USER_DAILY_TOKENS}
+        else:
+            limits = {'calls': settings.USAGE_CLASSROOM_DAILY_CALLS, 'tokens': settings.USAGE_CLASSROOM_DAILY_TOKENS}
+        limits.update(self._load_overrides()[scope].get(name, {}))
+        return limits
+
+    def check(self, user: str):
+        """
+        Make sure a user may start a model call
+
+        param: user: who asked
+        raise: QuotaExceeded if the user or one of their classrooms used up a daily limit
+        """
+        with self._lock:
+            table = self._day_table(_day())
+            scopes = [('users', user)] + [('classrooms', code) for code in self._classrooms(user)]
+            for scope, name in scopes:
+                counters = table[scope].get(name, {})
+                limits = self._limits(scope, name)
+                for limit in LIMITS:
+                    if limits.get(limit) and counters.get(limit, 0) >= limits[limit]:
+                        user_counters = table['users'].setdefault(user, _empty_counters())
+                        user_counters['rejected'] += 1
+                        self._dirty.add(_day())
+                        owner = 'Your' if scope == 'users' else f"Classroom {name}'s"
+                        raise QuotaExceeded(f"{owner} daily generation {limit} quota is used up",
+                                            _seconds_until_tomorrow())
+
+    def record(self, user: str, prompt: str, text: str, seconds: float, failed: bool = False):
+        """
+        Charge one model call to a user and their classrooms
+
+        param: user: who asked, BACKGROUND_USER for background generations
+        param: prompt: the prompt sent
+        param: text: the reply, or the part received before a failure
+        param: seconds: time spent waiting on the model
+        param: failed: whether the call failed
+        """
+        tokens = estimate_tokens(prompt) + estimate_tokens(text)
+        self.start()
+        with self._lock:
+            day = _day()
+            table = self._day_table(day)
+            names = [('users', user)]
+            if user != BACKGROUND_USER:
+                names += [('classrooms', code) for code in self._classrooms(user)]
+            for scope, name in names:
+                counters = table[scope].setdefault(name, _empty_counters())
+                counters['calls'] += 1
+                counters['tokens'] += tokens
+                counters['seconds'] = round(counters['seconds'] + seconds, 3)
+                if failed:
+                    counters['failed'] += 1
+            self._dirty.add(day)
+
+    def set_quota(self, scope: str, name: str, calls: int = None, tokens: int = None):
+        """
+        Override the daily limits of one user or classroom
+
+        param: scope: 'users' or 'classrooms'
+        param: name: the user's email or the classroom code
+        param: calls: daily model calls, 0 for unlimited, None to use the default
+        param: tokens: daily estimated tokens, 0 for unlimited, None to use the default
+        """
+        with self._lock:
+            overrides = self._load_overrides()
+            entry = {limit: value for limit, value in (('calls', calls), ('tokens', tokens)) if value is not None}
+            if entry:
+                overrides[scope][name] = entry
+            else:
+                overrides[scope].pop(name, None)
+            os.makedirs(os.path.dirname(self.quotas_file) or '.', exist_ok=True)
+            with open(self.quotas_file, 'w', encoding='utf-8') as f:
+                json.dump(overrides, f, indent=2)
+
+    def report(self, days: int = 1, user: str = None, classroom: str = None) -> dict:
+        """
+        Usage per day, with the limits in force today
+
+        param: days: number of days back to include, today first
+        param: user: only this user
+        param: classroom: only this classroom
+        return: dict with 'days' (day -> users/classrooms counters) and 'quotas'
+        """
+        with self._lock:
+            today = datetime.now()
+            report_days = {}
+            for offset in range(days):
+                day = (today - timedelta(days=offset)).strftime('%Y%m%d')
+                table = self._day_table(day)
+                users = table['users']
+                classrooms = table['classrooms']
+                if user is not None or classroom is not None:
+                    users = {user: users[user]} if user in users else {}
+                    classrooms = {classroom: classrooms[classroom]} if classroom in classrooms else {}
+                report_days[day] = {'users': dict(users), 'classrooms': dict(classrooms)}
+            # Days other than today are only read for the report
+            for day in list(self._days):
+                if day != _day() and day not in self._dirty:
+                    del self._days[day]
+            quotas = {
+                'user_default': self._limits('users', ''),
+                'classroom_default': self._limits('classrooms', ''),
+                'overrides': self._load_overrides()
+            }
+            return {'days': report_days, 'quotas': quotas}
+
+    def flush(self):
+        """Write the days changed since the last flush."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            pending = {day: json.dumps(self._days[day]) for day in self._dirty}
+            self._dirty.clear()
+            for day in [day for day in self._days if day != _day()]:
+                del self._days[day]
+        if not pending:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for day, data in pending.items():
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(day))
+
+    def start(self):
+        """Start the periodic flusher once; later calls do nothing."""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='usage-ledger-flusher', daemon=True)
+            self._flusher.start()
+
+    def stop(self):
+        """Stop the periodic flusher and write what is left."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.wait(settings.USAGE_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Flushing generation usage failed: {e}")
+
+ledger = UsageLedger()
+atexit.register(ledger.flush)
@@ -0,0 +1,207 @@
+"""
+VocabHighlighter.py
+================
+Marks the deck words that appear in generated stories and passages.
+An Aho-Corasick automaton over every word of a student's deck finds all
+occurrences in one linear pass over the text, which also works for
+Japanese, Mandarin and hieroglyphs where words are not separated by spaces.
+Overlapping matches are resolved leftmost-longest and each span is tagged
+window, known or unknown from the session's current state.
+
+Automata are cached per study session and rebuilt only when the session's
+deck changes, the word categories are looked up per call so they follow
+the student's progress without a rebuild.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import threading
+from collections import deque, OrderedDict
+
+MAX_CACHED_AUTOMATA = 64
+
+# Scripts written without spaces between words, matches in them are not held to word boundaries
+UNSEGMENTED_RANGES = (
+    (0x2E80, 0x9FFF),  # CJK radicals, kana, CJK ideographs
+    (0xF900, 0xFAFF),  # CJK compatibility ideographs
+    (0xFF66, 0xFF9F),  # halfwidth katakana
+    (0x13000, 0x1345F),  # Egyptian hieroglyphs
+    (0x20000, 0x3FFFF)  # CJK ideograph extensions
+)
+
+def is_unsegmented(char: str) -> bool:
+    code = ord(char)
+    return any(low <= code <= high for low, high in UNSEGMENTED_RANGES)
+
+def _is_spaced_word_char(char: str) -> bool:
+    return char.isalnum() and not is_unsegmented(char)
+
+def fold(text: str) -> str:
+    """Lowercase a text without changing its length, so offsets into the result are offsets into the text."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+def surface_forms(foreign: str) -> list:
+    """
+    Forms of a deck word to look for in text. Mandarin decks store the
+    characters followed by pinyin (e.g. 的de), text only has the characters.
+    """
+    forms = [foreign]
+    lead = 0
+    while lead < len(foreign) and is_unsegmented(foreign[lead]):
+        lead += 1
+    if 0 < lead < len(foreign):
+        forms.append(foreign[:lead])
+    return forms
+
+class Automaton:
+
+    def __init__(self, patterns: dict):
+        """
+        Build an Aho-Corasick automaton
+
+        param: patterns: dict surface form -> payload returned with its matches
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]  # (length, payload) of the pattern ending at a node
+        self._next_output = [0]  # nearest node on the fail chain with an output, 0 if none
+        for pattern, payload in patterns.items():
+            pattern = fold(pattern)
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._next_output.append(0)
+                node = child
+            if self._output[node] is None:
+                self._output[node] = (len(pattern), payload)
+        self._link()
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                fail_node = self._fail[child]
+                self._next_output[child] = fail_node if self._output[fail_node] is not None else self._next_output[fail_node]
+                queue.append(child)
+
+    def __len__(self):
+        return len(self._goto)
+
+    def matches(self, text: str):
+        """
+        Yield every occurrence of every pattern in one pass over the text
+
+        param: text: the text to search
+        return: iterator of (start, end, payload), by end offset
+        """
+        node = 0
+        for end, char in enumerate(fold(text), start=1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found = node if self._output[node] is not None else self._next_output[node]
+            while found:
+                length, payload = self._output[found]
+                yield end - length, end, payload
+                found = self._next_output[found]
+
+    def spans(self, text: str) -> list:
+        """
+        Non-overlapping whole-word occurrences, leftmost and then longest first
+
+        param: text: the text to search
+        return: list of (start, end, payload) in text order
+        """
+        candidates = []
+        for start, end, payload in self.matches(text):
+            # In spaced scripts a match must not start or end inside a longer word
+            if start > 0 and _is_spaced_word_char(text[start - 1]) and _is_spaced_word_char(text[start]):
+                continue
+            if end < len(text) and _is_spaced_word_char(text[end]) and _is_spaced_word_char(text[end - 1]):
+                continue
+            candidates.append((start, end, payload))
+        candidates.sort(key=lambda match: (match[0], -match[1]))
+        spans = []
+        covered = 0
+        for start, end, payload in candidates:
+            if start >= covered:
+                spans.append((start, end, payload))
+                covered = end
+        return spans
+
+def build_deck_automaton(foreign_words) -> Automaton:
+    """Automaton whose payload is the deck word, the first deck word wins a shared surface form."""
+    patterns = {}
+    for foreign in foreign_words:
+        for form in surface_forms(foreign):
+            patterns.setdefault(form, foreign)
+    return Automaton(patterns)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def deck_automaton(session_id: str, walking_window) -> Automaton:
+    """Automaton over a live session's deck, rebuilt only when the session or its deck changes."""
+    version = (id(walking_window), len(walking_window.words_dict))
+    with _cache_lock:
+        entry = _cache.get(session_id)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(session_id)
+            return entry[1]
+    automaton = build_deck_automaton(list(walking_window.words_dict))
+    with _cache_lock:
+        _cache[session_id] = (version, automaton)
+        _cache.move_to_end(session_id)
+        while len(_cache) > MAX_CACHED_AUTOMATA:
+            _cache.popitem(last=False)
+    return automaton
+
+def highlight(text: str, session_id: str, walking_window) -> list:
+    """
+    Annotate a text with the deck words it contains
+
+    param: text: the generated text
+    param: session_id: the study session, its automaton is cached under it
+    param: walking_window: the session's WalkingWindow
+    return: list of span dicts (start, end, text, foreign, english, category) in text order,
+            offsets are in characters (Unicode code points) and category is window, known or unknown
+    """
+    automaton = deck_automaton(session_id, walking_window)
+    window = {word.foreign for word in list(walking_window.current_words)}
+    highlights = []
+    for start, end, foreign in automaton.spans(text):
+        word = walking_window.words_dict.get(foreign)
+        if word is None:
+            continue
+        if foreign in window:
+            category = 'window'
+        elif word.is_known:
+            category = 'known'
+        else:
+            category = 'unknown'
+        highlights.append({
+            'start': start,
+            'end': end,
+            'text': text[start:end],
+            'foreign': foreign,
+            'english': word.english,
+            'category': category
+        })
+    return highlights
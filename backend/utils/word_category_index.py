@@ -0,0 +1,202 @@
+"""
+WordCategoryIndex.py
+================
+Precomputed known / learning / struggling indexes over a student's words,
+with opaque cursors for paging through them. Indexes are cached per deck
+file (or per live session) and rebuilt only when the underlying words
+change, so each page is a slice instead of a full parse and sort.
+
+Version: 1.0
+Since: 10-19-2026
+"""
+import base64
+import csv
+import json
+import os
+import threading
+from collections import OrderedDict
+
+CATEGORIES = ('known', 'learning', 'struggling')
+DEFAULT_SORTS = {
+    'known': 'foreign',  # alphabetically
+    'learning': 'seen',  # most seen first
+    'struggling': 'incorrect'  # most wrong first
+}
+SORT_KEYS = {
+    'foreign': (lambda w: w['foreign'], False),
+    'seen': (lambda w: w['count_seen'], True),
+    'correct': (lambda w: w['count_correct'], True),
+    'incorrect': (lambda w: w['count_incorrect'], True)
+}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_CACHED_INDEXES = 64
+
+def categorize(word: dict):
+    """Return the category of a word dict, or None for words that were never studied."""
+    if word['is_known']:
+        return 'known'
+    # Struggling: more wrong than correct and has multiple wrong attempts
+    if word['count_incorrect'] > word['count_correct'] and word['count_incorrect'] > 2:
+        return 'struggling'
+    # Learning: has been seen but not known
+    if word['count_seen'] > 0:
+        return 'learning'
+    return None
+
+class CategoryIndex:
+
+    def __init__(self, words):
+        """
+        Split word dicts into categories, each sorted by its default order
+
+        param: words: iterable of word dicts (foreign, english, count_seen, count_correct,
+                      count_incorrect, is_known)
+        """
+        self._lists = {category: [] for category in CATEGORIES}
+        for word in words:
+            category = categorize(word)
+            if category is not None:
+                self._lists[category].append(word)
+        self._sorted = {}
+        self._lock = threading.Lock()
+
+    def total(self, category: str) -> int:
+        return len(self._lists[category])
+
+    def totals(self) -> dict:
+        return {category: len(words) for category, words in self._lists.items()}
+
+    def words(self, category: str, sort: str = None) -> list:
+        """
+        Return a category's words in the requested order (do not mutate)
+
+        param: category: known, learning or struggling
+        param: sort: foreign, seen, correct or incorrect; None for the category default
+        """
+        sort = sort or DEFAULT_SORTS[category]
+        with self._lock:
+            ordered = self._sorted.get((category, sort))
+            if ordered is None:
+                key, reverse = SORT_KEYS[sort]
+                ordered = sorted(self._lists[category], key=key, reverse=reverse)
+                self._sorted[(category, sort)] = ordered
+            return ordered
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cached(key, version, build) -> CategoryIndex:
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(key)
+            return entry[1]
+    index = build()
+    with _cache_lock:
+        _cache[key] = (version, index)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_INDEXES:
+            _cache.popitem(last=False)
+    return index
+
+def _read_deck(csv_path: str) -> list:
+    words = []
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            # Skip empty rows
+            if not row.get('Foreign', '').strip():
+                continue
+            try:
+                words.append({
+                    'foreign': row.get('Foreign', '').strip(),
+                    'english': row.get('English', '').strip(),
+                    'count_seen': int(row.get('seen', 0)),
+                    'count_correct': int(row.get('correct', 0)),
+                    'count_incorrect': int(row.get('wrong', 0)),
+                    'is_known': bool(int(row.get('known', 0)))
+                })
+            except (ValueError, KeyError):
+                continue
+    return words
+
+def deck_index(csv_path: str) -> CategoryIndex:
+    """Category index of a saved deck, rebuilt only when the file changes."""
+    stat = os.stat(csv_path)
+    return _cached(('deck', csv_path), (stat.st_mtime_ns, stat.st_size),
+                   lambda: CategoryIndex(_read_deck(csv_path)))
+
+def session_index(session_id: str, walking_window, word_to_dict) -> CategoryIndex:
+    """Category index of a live session's words, rebuilt only after the session records a change."""
+    version = (id(walking_window), walking_window.revision)
+    return _cached(('session', session_id), version,
+                   lambda: CategoryIndex(word_to_dict(w) for w in list(walking_window.words_dict.values())))
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'o': offset}).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Turn a cursor back into an offset
+
+    param: cursor: a cursor from encode_cursor, or None/'' for the first page
+    return: the offset
+    raise: ValueError if the cursor is malformed
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode()))['o'])
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
+
+def page(words: list, cursor: str, limit: int):
+    """
+    Slice one page out of an ordered word list
+
+    param: words: the ordered words
+    param: cursor: cursor of the page to return, None for the first page
+    param: limit: page size
+    return: (page_words, next_cursor) where next_cursor is None on the last page
+    raise: ValueError if the cursor is malformed
+    """
+    offset = decode_cursor(cursor)
+    end = offset + limit
+    next_cursor = encode_cursor(end) if end < len(words) else None
+    return words[offset:end], next_cursor
+
+def parse_page_args(args, categories=CATEGORIES):
+    """
+    Read category, sort, cursor and limit from request args
+
+    param: args: request.args
+    param: categories: categories this endpoint serves
+    return: (category, sort, cursor, limit)
+    raise: ValueError with a user-facing message on bad input
+    """
+    category = args.get('category', categories[0])
+    if not isinstance(category, str) or category not in categories:
+        raise ValueError(f"Category must be one of: {', '.join(categories)}")
+    sort = args.get('sort') or None
+    if sort is not None and (not isinstance(sort, str) or sort not in SORT_KEYS):
+        raise ValueError(f"Sort must be one of: {', '.join(SORT_KEYS)}")
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError('Limit must be a number')
+    if limit < 1:
+        raise ValueError('Limit must be positive')
+    cursor = args.get('cursor') or None
+    decode_cursor(cursor)
+    return category, sort, cursor, min(limit, MAX_PAGE_SIZE)
+
+def ndjson_lines(words: list, next_cursor, totals: dict):
+    """Yield one JSON line per word followed by a closing line with the next cursor and totals."""
+    for word in words:
+        yield json.dumps(word) + '\n'
+    yield json.dumps({'done': True, 'next_cursor': next_cursor, 'totals': totals}) + '\n'
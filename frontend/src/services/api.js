@@ -1,6 +1,9 @@
 // Use environment variable for API URL, fallback to localhost for development
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000/api';
 const API_BASE_HOST = import.meta.env.VITE_API_BASE_URL?.replace('/api', '') || 'http://localhost:5000';
+// New pronunciations that take longer than the server's wait come back pending and are polled
+const TTS_POLL_INTERVAL_MS = 500;
+const TTS_POLL_ATTEMPTS = 40;
 
 // Log API URL in development or if not configured (for debugging)
 if (import.meta.env.DEV || !import.meta.env.VITE_API_BASE_URL) {
@@ -165,9 +168,24 @@ export const api = {
         return { error: `Failed to get TTS: ${response.statusText}` };
       }
       
-      const result = await response.json();
+      let result = await response.json();
       console.log('TTS result:', result);
       
+      // 202 pending: poll the status URL until the audio is ready or failed
+      const statusUrl = result.status_url;
+      for (let attempt = 0; statusUrl && (result.status === 'pending' || result.status === 'running'); attempt++) {
+        if (attempt >= TTS_POLL_ATTEMPTS) {
+          return { error: 'Pronunciation is still being generated, try again shortly' };
+        }
+        await new Promise(resolve => setTimeout(resolve, TTS_POLL_INTERVAL_MS));
+        const statusResponse = await fetch(`${API_BASE_HOST}${statusUrl}`);
+        result = await statusResponse.json().catch(() => ({ status: 'failed', error: `HTTP ${statusResponse.status}` }));
+        console.log('TTS status:', result);
+      }
+      if (result.status === 'failed') {
+        return { error: `Failed to get TTS: ${result.error || 'generation failed'}` };
+      }
+      
       // If successful, play the audio
       if (result.success && result.audio_url) {
         const audioUrl = `${API_BASE_HOST}${result.audio_url}`;